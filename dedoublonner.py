@@ -6,13 +6,18 @@ Usage : python3 dedoublonner.py [dossier]
 
 import os
 import sys
-import hashlib
 from pathlib import Path
-from collections import defaultdict
+
+# Ajouter src/ pour les utilitaires partagés
+sys.path.append(str(Path(__file__).parent / 'src'))
+
+from utils.duplicate_finder import DuplicateFinder
+from utils.parallel_scanner import ParallelScanner
 
 class DedoublonneurSimple:
     def __init__(self):
         self.simulation_mode = True
+        self.finder = DuplicateFinder()
         
     def analyser_dossier(self, dossier_path):
         """Analyse un dossier pour trouver les doublons"""
@@ -24,28 +29,27 @@ class DedoublonneurSimple:
             print(f"❌ Dossier introuvable: {path}")
             return
             
-        print("🕐 Calcul des empreintes des fichiers...")
+        print("🕐 Inventaire des fichiers...")
         
-        # Regrouper les fichiers par hash
-        fichiers_par_hash = defaultdict(list)
+        # Relever les tailles: seules les tailles en collision seront lues
+        fichiers = []
         total_fichiers = 0
         
+        def visibles(racine, noms):
+            return [nom for nom in noms if not nom.startswith('.')]
+        
         try:
-            for fichier in path.rglob("*"):
-                if fichier.is_file() and not fichier.name.startswith('.'):
-                    try:
-                        # Calculer le hash MD5
-                        hash_md5 = self.calculer_hash(fichier)
-                        if hash_md5:
-                            fichiers_par_hash[hash_md5].append(fichier)
-                            total_fichiers += 1
-                            
-                        # Afficher le progrès
-                        if total_fichiers % 100 == 0:
-                            print(f"   📄 {total_fichiers} fichiers analysés...")
-                            
-                    except Exception as e:
-                        continue
+            # Type tiré du listage: un seul stat par fichier, transmis au détecteur
+            for fichier, stat in ParallelScanner().files(path, keep=visibles):
+                fichiers.append((fichier, stat))
+                total_fichiers += 1
+                
+                # Afficher le progrès
+                if total_fichiers % 100 == 0:
+                    print(f"   📄 {total_fichiers} fichiers analysés...")
+                        
+            print("🕐 Vérification des doublons (taille → empreinte → contenu)...")
+            groupes = self.finder.find_duplicates(fichiers)
                         
         except KeyboardInterrupt:
             print("\n⏹️  Analyse interrompue par l'utilisateur")
@@ -55,12 +59,10 @@ class DedoublonneurSimple:
         doublons_groupes = []
         espace_total_doublons = 0
         
-        for hash_md5, fichiers in fichiers_par_hash.items():
-            if len(fichiers) > 1:
-                doublons_groupes.append(fichiers)
-                # Calculer l'espace des doublons (garder 1, supprimer les autres)
-                taille_fichier = fichiers[0].stat().st_size
-                espace_total_doublons += taille_fichier * (len(fichiers) - 1)
+        for groupe in groupes.values():
+            doublons_groupes.append(groupe['files'])
+            # Calculer l'espace des doublons (garder 1, supprimer les autres)
+            espace_total_doublons += groupe['size'] * (len(groupe['files']) - 1)
                 
         # Afficher les résultats
         print(f"\n📊 RÉSULTATS DE L'ANALYSE")
@@ -71,6 +73,7 @@ class DedoublonneurSimple:
         total_doublons = sum(len(groupe) - 1 for groupe in doublons_groupes)
         print(f"📁 Fichiers doublons: {total_doublons}")
         print(f"💾 Espace récupérable: {self.formater_taille(espace_total_doublons)}")
+        self.finder.print_stats(indent="")
         
         if doublons_groupes:
             print(f"\n🔍 DÉTAIL DES DOUBLONS (premiers 10 groupes):")
@@ -91,22 +94,15 @@ class DedoublonneurSimple:
             print(f"\n⚠️  MODE SIMULATION - Aucun fichier supprimé")
             print("💡 Pour supprimer réellement, utilisez --nettoyer")
         else:
-            self.proposer_nettoyage(doublons_groupes)
+            self.proposer_nettoyage(groupes)
             
     def calculer_hash(self, fichier):
-        """Calcule le hash MD5 d'un fichier"""
-        try:
-            hash_md5 = hashlib.md5()
-            with open(fichier, "rb") as f:
-                # Lire par chunks pour les gros fichiers
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hash_md5.update(chunk)
-            return hash_md5.hexdigest()
-        except:
-            return None
+        """Calcule l'empreinte complète d'un fichier"""
+        return self.finder.full_hash(fichier)
             
-    def proposer_nettoyage(self, doublons_groupes):
-        """Propose de nettoyer les doublons"""
+    def proposer_nettoyage(self, groupes):
+        """Propose de nettoyer les doublons (groupes retournés par DuplicateFinder)"""
+        doublons_groupes = [groupe['files'] for groupe in groupes.values()]
         if not doublons_groupes:
             print("✅ Aucun doublon à nettoyer !")
             return
@@ -120,9 +116,18 @@ class DedoublonneurSimple:
             fichiers_supprimes = 0
             espace_libere = 0
             
-            for groupe in doublons_groupes:
+            for empreinte, groupe in groupes.items():
                 # Garder le premier, supprimer les autres
-                for fichier in groupe[1:]:
+                garde = groupe['files'][0]
+                if not self.finder.revalidate(garde, groupe['expect'][str(garde)], empreinte):
+                    print(f"⏭️  Modifié depuis l'analyse, groupe ignoré: {garde}")
+                    continue
+                    
+                for fichier in groupe['files'][1:]:
+                    # stat inchangé: aucune relecture; sinon contenu revérifié
+                    if not self.finder.revalidate(fichier, groupe['expect'][str(fichier)], empreinte):
+                        print(f"⏭️  Modifié depuis l'analyse, ignoré: {fichier}")
+                        continue
                     try:
                         taille = fichier.stat().st_size
                         fichier.unlink()
@@ -135,6 +140,7 @@ class DedoublonneurSimple:
             print(f"\n✅ Nettoyage terminé !")
             print(f"   📁 {fichiers_supprimes} fichiers supprimés")
             print(f"   💾 {self.formater_taille(espace_libere)} libérés")
+            self.finder.print_revalidation(indent="   ")
         else:
             print("❌ Nettoyage annulé")
             
@@ -8,7 +8,11 @@ import os
 import sys
 from pathlib import Path
 from collections import defaultdict
-import hashlib
+
+# Ajouter src/ pour les utilitaires partagés
+sys.path.append(str(Path(__file__).parent / 'src'))
+
+from utils.duplicate_finder import DuplicateFinder
 
 def taille_readable(taille_bytes):
     """Formate une taille en bytes"""
@@ -18,31 +22,6 @@ def taille_readable(taille_bytes):
         taille_bytes /= 1024
     return f"{taille_bytes:.1f} TB"
 
-def hash_rapide(fichier):
-    """Hash rapide basé sur la taille et le début du fichier"""
-    try:
-        stat = fichier.stat()
-        taille = stat.st_size
-        
-        if taille == 0:
-            return f"empty_{fichier.name}"
-            
-        # Pour les petits fichiers, hash complet
-        if taille < 1024 * 1024:  # 1MB
-            with open(fichier, 'rb') as f:
-                return hashlib.md5(f.read()).hexdigest()
-        
-        # Pour les gros fichiers, hash des premiers et derniers Ko
-        with open(fichier, 'rb') as f:
-            debut = f.read(1024)
-            f.seek(-1024, 2)  # Aller à la fin
-            fin = f.read(1024)
-            
-        return hashlib.md5(f"{taille}_{debut}_{fin}".encode()).hexdigest()
-        
-    except Exception:
-        return None
-
 def analyser_doublons_rapide(dossier_path, max_fichiers=2000):
     """Analyse rapide des doublons"""
     print(f"🔍 ANALYSE RAPIDE DES DOUBLONS")
@@ -83,7 +62,7 @@ def analyser_doublons_rapide(dossier_path, max_fichiers=2000):
     candidats_doublons = []
     for taille, fichiers in fichiers_par_taille.items():
         if len(fichiers) > 1 and taille > 0:
-            candidats_doublons.extend(fichiers)
+            candidats_doublons.extend((fichier, taille) for fichier in fichiers)
     
     print(f"📄 {total_fichiers} fichiers analysés")
     print(f"🤔 {len(candidats_doublons)} candidats doublons (même taille)")
@@ -95,25 +74,20 @@ def analyser_doublons_rapide(dossier_path, max_fichiers=2000):
     # Hash des candidats pour confirmation
     print("🕐 Vérification des doublons réels...")
     
-    fichiers_par_hash = defaultdict(list)
-    
-    for i, fichier in enumerate(candidats_doublons[:500]):  # Limiter pour la vitesse
-        hash_val = hash_rapide(fichier)
-        if hash_val:
-            fichiers_par_hash[hash_val].append(fichier)
-            
-        if i % 50 == 0:
-            print(f"   🔄 {i+1}/{min(len(candidats_doublons), 500)} vérifiés...")
+    # Même moteur que le mode complet: empreinte début/fin, puis hash ou
+    # comparaison directe selon la taille de chaque groupe
+    finder = DuplicateFinder()
+    candidats = candidats_doublons[:500]  # Limiter pour la vitesse
+    groupes = finder.find_duplicates(candidats)
+    print(f"   🔄 {len(candidats)}/{len(candidats_doublons)} vérifiés")
     
     # Résultats finaux
     doublons_reels = []
     espace_recuperable = 0
     
-    for hash_val, fichiers in fichiers_par_hash.items():
-        if len(fichiers) > 1:
-            doublons_reels.append(fichiers)
-            taille_fichier = fichiers[0].stat().st_size
-            espace_recuperable += taille_fichier * (len(fichiers) - 1)
+    for groupe in groupes.values():
+        doublons_reels.append(groupe['files'])
+        espace_recuperable += groupe['size'] * (len(groupe['files']) - 1)
     
     # Affichage des résultats
     print(f"\n📊 RÉSULTATS FINAUX")
@@ -14,6 +14,13 @@ import subprocess
 from pathlib import Path
 import json
 
+# Ajouter src/ pour les utilitaires partagés
+sys.path.append(str(Path(__file__).parent / 'src'))
+
+from utils.duplicate_finder import DuplicateFinder
+from utils.file_linker import FileLinker
+from utils.parallel_scanner import ParallelScanner
+
 class SmartOptimizerUniversal:
     def __init__(self):
         self.system = platform.system().lower()
@@ -410,13 +417,13 @@ class SmartOptimizerUniversal:
     def optimize_folder(self):
         """Optimisation avec respect du mode simulation/réel"""
         mode_text = "SIMULATION" if self.simulation_mode else "RÉEL"
-        mode_color = self.colors['green'] if self.simulation_mode else self.colors['red']
+        mode_color = self.colors['success'] if self.simulation_mode else self.colors['real_danger']
         
         print(f"\n🧹 OPTIMISATION DE DOSSIER - MODE {mode_color}{mode_text}{self.colors['reset']}")
         print("=" * 40)
         
         if not self.simulation_mode:
-            print(f"{self.colors['bg_red']}{self.colors['white']} ⚠️  MODE RÉEL ACTIF - MODIFICATIONS PERMANENTES ⚠️  {self.colors['reset']}")
+            print(f"{self.colors['real_danger_bg']} ⚠️  MODE RÉEL ACTIF - MODIFICATIONS PERMANENTES ⚠️  {self.colors['reset']}")
             print()
         
         print("💡 Dossiers suggérés :")
@@ -453,61 +460,87 @@ class SmartOptimizerUniversal:
         print(f"🔍 Analyse de: {path}")
         print()
         
-        # Recherche de doublons
-        files_by_size = {}
+        # Recherche de doublons (même taille ne suffit pas: le contenu est vérifié)
+        files_with_size = []
         duplicates_found = 0
         space_recoverable = 0
+        finder = DuplicateFinder()
         
         try:
-            for file_path in path.rglob("*"):
-                if file_path.is_file():
-                    try:
-                        size = file_path.stat().st_size
-                        if size > 0:
-                            if size not in files_by_size:
-                                files_by_size[size] = []
-                            files_by_size[size].append(file_path)
-                    except:
-                        continue
+            # Type tiré du listage, un seul stat par fichier transmis tel quel au détecteur
+            files_with_size = list(ParallelScanner().files(path))
                         
             doublons_groupes = []
-            for size, files in files_by_size.items():
-                if len(files) > 1:
-                    doublons_groupes.append(files)
-                    duplicates_found += len(files) - 1
-                    space_recoverable += size * (len(files) - 1)
+            for fingerprint, group in finder.find_duplicates(files_with_size).items():
+                doublons_groupes.append((fingerprint, group))
+                duplicates_found += len(group['files']) - 1
+                space_recoverable += group['size'] * (len(group['files']) - 1)
                     
             print(f"📊 Résultats ({'SIMULATION' if self.simulation_mode else 'MODE RÉEL'}):")
-            print(f"   🔍 Doublons potentiels: {duplicates_found}")
+            print(f"   🔍 Doublons vérifiés: {duplicates_found}")
             print(f"   💾 Espace récupérable: {self.format_size(space_recoverable)}")
+            finder.print_stats(indent="")
             print()
             
             if self.simulation_mode:
-                print(f"{self.colors['green']}ℹ️  Mode simulation - Aucun fichier supprimé{self.colors['reset']}")
+                print(f"{self.colors['success']}ℹ️  Mode simulation - Aucun fichier supprimé{self.colors['reset']}")
             else:
                 if doublons_groupes:
-                    print(f"{self.colors['red']}⚠️  MODE RÉEL - Suppression possible{self.colors['reset']}")
-                    confirm = input(f"{self.colors['red']}Voulez-vous VRAIMENT supprimer {duplicates_found} doublons ? (tapez 'SUPPRIMER') : {self.colors['reset']}")
+                    print(f"{self.colors['real_danger']}⚠️  MODE RÉEL - Suppression possible{self.colors['reset']}")
+                    print(f"{self.colors['text']}💡 'LIER' remplace chaque doublon par un reflink ou un lien physique: tous les chemins restent valides{self.colors['reset']}")
+                    confirm = input(f"{self.colors['real_danger']}Voulez-vous VRAIMENT supprimer {duplicates_found} doublons ? (tapez 'SUPPRIMER' ou 'LIER') : {self.colors['reset']}")
                     
-                    if confirm == "SUPPRIMER":
+                    def unchanged(fichier, fingerprint, group):
+                        # stat identique à l'analyse: aucune relecture; sinon contenu revérifié
+                        if finder.revalidate(fichier, group['expect'][str(fichier)], fingerprint):
+                            return True
+                        print(f"⏭️  Modifié depuis l'analyse, ignoré: {fichier.name}")
+                        return False
+                    
+                    if confirm == "LIER":
+                        linker = FileLinker()
+                        for fingerprint, group in doublons_groupes:
+                            # Garder le premier, lier les autres à son contenu
+                            groupe = group['files']
+                            if not unchanged(groupe[0], fingerprint, group):
+                                continue
+                            for fichier in groupe[1:]:
+                                if not unchanged(fichier, fingerprint, group):
+                                    continue
+                                method = linker.consolidate(groupe[0], fichier)
+                                if method:
+                                    print(f"🔗 {method}: {fichier.name}")
+                                else:
+                                    print(f"❌ Consolidation impossible: {fichier.name}")
+                                    
+                        print(f"\n✅ Consolidation terminée !")
+                        linker.print_stats(indent="   ")
+                        finder.print_revalidation(indent="   ")
+                    elif confirm == "SUPPRIMER":
                         files_deleted = 0
                         space_freed = 0
                         
-                        for groupe in doublons_groupes:
+                        for fingerprint, group in doublons_groupes:
                             # Garder le premier, supprimer les autres
+                            groupe = group['files']
+                            if not unchanged(groupe[0], fingerprint, group):
+                                continue
                             for fichier in groupe[1:]:
+                                if not unchanged(fichier, fingerprint, group):
+                                    continue
                                 try:
                                     size = fichier.stat().st_size
                                     fichier.unlink()
                                     files_deleted += 1
                                     space_freed += size
-                                    print(f"{self.colors['red']}🗑️  Supprimé: {fichier.name}{self.colors['reset']}")
+                                    print(f"{self.colors['real_danger']}🗑️  Supprimé: {fichier.name}{self.colors['reset']}")
                                 except Exception as e:
                                     print(f"❌ Erreur: {e}")
                                     
-                        print(f"\n{self.colors['red']}✅ Suppression terminée !{self.colors['reset']}")
+                        print(f"\n{self.colors['real_danger']}✅ Suppression terminée !{self.colors['reset']}")
                         print(f"   📁 {files_deleted} fichiers supprimés")
                         print(f"   💾 {self.format_size(space_freed)} libérés")
+                        finder.print_revalidation(indent="   ")
                     else:
                         print("❌ Suppression annulée")
                 else:
@@ -682,16 +715,12 @@ class SmartOptimizerUniversal:
         space_recoverable = 0
         
         try:
-            for file_path in path.rglob("*"):
-                if file_path.is_file():
-                    try:
-                        size = file_path.stat().st_size
-                        if size > 0:
-                            if size not in files_by_size:
-                                files_by_size[size] = []
-                            files_by_size[size].append(file_path)
-                    except:
-                        continue
+            for file_path, stat in ParallelScanner().files(path):
+                size = stat.st_size
+                if size > 0:
+                    if size not in files_by_size:
+                        files_by_size[size] = []
+                    files_by_size[size].append(file_path)
                         
             for size, files in files_by_size.items():
                 if len(files) > 1:
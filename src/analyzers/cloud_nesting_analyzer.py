@@ -6,16 +6,41 @@ Détecte les problèmes de synchronisation croisée et les doublons d'espace
 
 import os
 import sys
-import hashlib
 from pathlib import Path
 from datetime import datetime
-import subprocess
 import json
+from collections import defaultdict
+
+# Ajouter le répertoire parent pour les imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.fs_snapshot import get_snapshot
+from utils.directory_sizer import DirectorySizer
+from utils.cloud_placeholders import PlaceholderDetector
+from utils.hash_service import HashService
+from utils.duplicate_finder import DuplicateFinder
+from utils.merkle_tree import MerkleTree
+from utils.path_index import PathIndex
 
 class CloudNestingAnalyzer:
     def __init__(self, home_path=None):
         self.home_path = Path(home_path) if home_path else Path.home()
         self.cloud_services = {}
+        self.cloud_index = PathIndex()  # Racines cloud → service, pour les tests d'inclusion
+        self.symlink_edges = []    # (service, lien, cible) des liens vers des dossiers
+        self.directory_loops = []  # (chemin, chemin déjà parcouru) écartés par le parcours
+        self.sizer = DirectorySizer()
+        self.placeholder_detector = PlaceholderDetector()
+        self.hasher = HashService()
+        # Empreintes complètes: confirment les doublons repérés par les empreintes rapides
+        self.finder = DuplicateFinder(hasher=self.hasher)
+        self.quick_block = 8192  # Octets lus au début et à la fin par quick_hash
+        # Fichiers de métadonnées propres au système ou au service: ignorés dans les empreintes
+        self.merkle = MerkleTree(self.quick_hash, self.hasher,
+                                 ignore=('.DS_Store', 'desktop.ini', 'Thumbs.db', '.dropbox', 'Icon\r'))
+        self.min_tree_size = 1024 * 1024  # Dossiers dupliqués signalés à partir de 1 MB
+        self.duplicate_trees = []
+        self.placeholders = {}  # Fichiers non téléchargés: chemin → taille distante
         self.nesting_issues = []
         self.sync_conflicts = []
         self.space_waste = 0
@@ -128,6 +153,8 @@ class CloudNestingAnalyzer:
                     'size': self.get_directory_size(paths[0]),
                     'file_count': self.get_file_count(paths[0])
                 }
+                for path in paths:
+                    self.cloud_index.add(path, (service_name, path))
                 print(f"  ✅ {service_name}: {len(paths)} chemin(s)")
                 
     def check_if_synced(self, path):
@@ -139,18 +166,15 @@ class CloudNestingAnalyzer:
         ]
         
         try:
-            for item in path.iterdir():
+            items = get_snapshot(path).iterdir(path)
+            for item in items:
                 if any(indicator in item.name.lower() for indicator in sync_indicators):
                     return True
                     
-            # Vérifier les métadonnées étendues (macOS)
-            try:
-                result = subprocess.run(['ls', '-la@', str(path)], 
-                                      capture_output=True, text=True)
-                if 'com.apple.metadata' in result.stdout or 'com.dropbox' in result.stdout:
+            # Vérifier les attributs étendus du dossier et de quelques entrées
+            for candidate in [Path(path)] + [Path(path) / item.name for item in items[:20]]:
+                if self.placeholder_detector.sync_attributes(candidate):
                     return True
-            except:
-                pass
                 
         except:
             pass
@@ -158,27 +182,12 @@ class CloudNestingAnalyzer:
         return False
         
     def get_directory_size(self, path):
-        """Obtient la taille d'un répertoire"""
-        try:
-            result = subprocess.run(['du', '-sb', str(path)], 
-                                  capture_output=True, text=True, timeout=30)
-            if result.returncode == 0:
-                return int(result.stdout.split()[0])
-        except:
-            pass
-        return 0
+        """Obtient la taille d'un répertoire (mémorisée, liens physiques comptés une fois)"""
+        return self.sizer.logical_size(path)
         
     def get_file_count(self, path):
         """Compte approximativement les fichiers"""
-        try:
-            count = 0
-            for root, dirs, files in os.walk(path):
-                count += len(files)
-                if count > 10000:  # Limiter pour performance
-                    break
-            return count
-        except:
-            return 0
+        return get_snapshot(path).file_count(path, limit=10000)  # Limiter pour performance
             
     def analyze_nesting_patterns(self):
         """Analyse les patterns d'imbrication problématiques"""
@@ -203,41 +212,32 @@ class CloudNestingAnalyzer:
         """Détecte les services cloud imbriqués dans d'autres"""
         print("  🔍 Recherche de clouds imbriqués...")
         
-        cloud_paths = []
-        for service_name, info in self.cloud_services.items():
-            for path in info['paths']:
-                cloud_paths.append((service_name, path))
-                
-        # Vérifier chaque combinaison
-        for i, (service1, path1) in enumerate(cloud_paths):
-            for j, (service2, path2) in enumerate(cloud_paths):
-                if i != j:
-                    # Vérifier si path2 est dans path1
-                    try:
-                        path2.relative_to(path1)
-                        
-                        # C'est une imbrication !
-                        nested_size = self.get_directory_size(path2)
-                        issue = {
-                            'type': 'cloud_in_cloud',
-                            'parent_service': service1,
-                            'nested_service': service2,
-                            'parent_path': str(path1),
-                            'nested_path': str(path2),
-                            'wasted_space': nested_size,
-                            'severity': 'critique',
-                            'description': f"{service2} imbriqué dans {service1}"
-                        }
-                        
-                        self.nesting_issues.append(issue)
-                        self.space_waste += nested_size
-                        
-                        print(f"    🚨 CRITIQUE: {service2} dans {service1}")
-                        print(f"       Espace dupliqué: {self.format_size(nested_size)}")
-                        
-                    except ValueError:
+        # Racines qui contiennent chaque racine: O(profondeur) au lieu de toutes les paires
+        for service2, info in self.cloud_services.items():
+            for path2 in info['paths']:
+                for service1, path1 in self.cloud_index.containing(path2):
+                    if (service1, path1) == (service2, path2):
                         continue
                         
+                    # C'est une imbrication !
+                    nested_size = self.get_directory_size(path2)
+                    issue = {
+                        'type': 'cloud_in_cloud',
+                        'parent_service': service1,
+                        'nested_service': service2,
+                        'parent_path': str(path1),
+                        'nested_path': str(path2),
+                        'wasted_space': nested_size,
+                        'severity': 'critique',
+                        'description': f"{service2} imbriqué dans {service1}"
+                    }
+                    
+                    self.nesting_issues.append(issue)
+                    self.space_waste += nested_size
+                    
+                    print(f"    🚨 CRITIQUE: {service2} dans {service1}")
+                    print(f"       Espace dupliqué: {self.format_size(nested_size)}")
+                        
     def detect_universal_sync_folders(self):
         """Détecte Desktop/Documents synchronisés par plusieurs services"""
         print("  🔍 Recherche de dossiers universellement synchronisés...")
@@ -249,17 +249,8 @@ class CloudNestingAnalyzer:
             if not folder_path.exists():
                 continue
                 
-            syncing_services = []
-            
-            # Vérifier quels services synchronisent ce dossier
-            for service_name, info in self.cloud_services.items():
-                for cloud_path in info['paths']:
-                    try:
-                        # Le dossier est-il dans un cloud ?
-                        folder_path.relative_to(cloud_path)
-                        syncing_services.append(service_name)
-                    except ValueError:
-                        continue
+            # Services dont une racine contient ce dossier
+            syncing_services = [service_name for service_name, cloud_path in self.cloud_index.containing(folder_path)]
                         
             if len(syncing_services) > 1:
                 folder_size = self.get_directory_size(folder_path)
@@ -284,56 +275,146 @@ class CloudNestingAnalyzer:
         """Détecte les synchronisations récursives (A→B→A)"""
         print("  🔍 Recherche de synchronisations récursives...")
         
-        # Construire un graphe des dépendances
-        sync_graph = {}
+        # Graphe des services: A → B quand A synchronise une racine de B
+        sync_graph = {service_name: set() for service_name in self.cloud_services}
         
         for service_name, info in self.cloud_services.items():
-            sync_graph[service_name] = []
-            
             for cloud_path in info['paths']:
-                # Chercher d'autres services dans ce chemin
-                for other_service, other_info in self.cloud_services.items():
+                # Imbrication directe: autres racines situées dans ce chemin
+                for other_service, other_path in self.cloud_index.under(cloud_path):
                     if other_service != service_name:
-                        for other_path in other_info['paths']:
-                            try:
-                                other_path.relative_to(cloud_path)
-                                sync_graph[service_name].append(other_service)
-                            except ValueError:
-                                continue
-                                
-        # Détecter les cycles
-        def has_cycle(graph, start, visited, path):
-            if start in path:
-                return path[path.index(start):] + [start]
-            if start in visited:
-                return None
+                        sync_graph[service_name].add(other_service)
+                        
+                # Liens vers des dossiers relevés pendant le parcours (jamais suivis)
+                try:
+                    snapshot = get_snapshot(cloud_path)
+                    links = list(snapshot.symlinks(cloud_path))
+                except Exception:
+                    continue
+                    
+                for link_path, target in links:
+                    # Le client de sync qui suit ce lien synchronise aussi les services visés
+                    try:
+                        loops_back = os.path.commonpath([os.path.realpath(os.path.dirname(link_path)), target]) == target
+                    except ValueError:
+                        loops_back = False  # Lecteurs différents (Windows): aucune inclusion possible
+                    reached = self.cloud_index.containing(target) + self.cloud_index.under(target)
+                    for target_service, target_root in reached:
+                        # Vers son propre service, seul un lien vers un parent forme une boucle
+                        if target_service != service_name or loops_back:
+                            sync_graph[service_name].add(target_service)
+                    self.symlink_edges.append((service_name, link_path, target))
+                    
+                for path, first in snapshot.loops:
+                    if path.startswith(str(cloud_path) + os.sep) and (path, first) not in self.directory_loops:
+                        self.directory_loops.append((path, first))
+                        
+        if self.symlink_edges:
+            print(f"    🔗 {len(self.symlink_edges)} liens vers des dossiers relevés (non suivis)")
+        if self.directory_loops:
+            print(f"    🔁 {len(self.directory_loops)} répertoires atteints deux fois (montage lié ou jonction) ignorés")
+            
+        # Composantes fortement connexes: chaque cycle apparaît une seule fois
+        for component in self.strongly_connected_components(sync_graph):
+            if len(component) == 1 and component[0] not in sync_graph[component[0]]:
+                continue  # Pas de cycle
                 
-            visited.add(start)
-            path.append(start)
+            cycle = self.cycle_through(sync_graph, component)
+            description = f"Cycle de sync: {' → '.join(cycle)}"
+            if len(component) > len(cycle) - 1:
+                # Les autres services de la composante bouclent par d'autres chemins
+                description += f" (services mutuellement atteignables: {', '.join(sorted(component))})"
+            issue = {
+                'type': 'recursive_sync',
+                'cycle': cycle,
+                'services': sorted(component),
+                'wasted_space': 0,  # Difficile à calculer
+                'severity': 'critique',
+                'description': description
+            }
             
-            for neighbor in graph.get(start, []):
-                cycle = has_cycle(graph, neighbor, visited, path.copy())
-                if cycle:
-                    return cycle
-                    
-            return None
+            self.nesting_issues.append(issue)
+            print(f"    🚨 CRITIQUE: {description}")
             
-        visited = set()
-        for service in sync_graph:
-            if service not in visited:
-                cycle = has_cycle(sync_graph, service, visited, [])
-                if cycle:
-                    issue = {
-                        'type': 'recursive_sync',
-                        'cycle': cycle,
-                        'wasted_space': 0,  # Difficile à calculer
-                        'severity': 'critique',
-                        'description': f"Cycle de sync: {' → '.join(cycle)}"
-                    }
+    def cycle_through(self, graph, component):
+        """
+        Cycle réel du graphe passant par le premier service de la composante
+
+        L'ordre des membres d'une composante de Tarjan n'est pas un chemin: le
+        plus court retour au point de départ est cherché en largeur, sur les
+        seuls arcs internes à la composante.
+        """
+        start = component[0]
+        members = set(component)
+        previous = {}
+        frontier = [start]
+        while frontier:
+            following = []
+            for node in frontier:
+                for neighbor in sorted(graph.get(node, ())):
+                    if neighbor not in members:
+                        continue
+                    if neighbor == start:
+                        path = [node]
+                        while path[-1] != start:
+                            path.append(previous[path[-1]])
+                        return [start] + path[::-1][1:] + [start]
+                    if neighbor not in previous:
+                        previous[neighbor] = node
+                        following.append(neighbor)
+            frontier = following
+        return [start, start]  # Inatteignable pour une composante réelle
+
+    def strongly_connected_components(self, graph):
+        """Composantes fortement connexes (Tarjan, sans récursion)"""
+        index = {}
+        lowlink = {}
+        stack = []
+        on_stack = set()
+        components = []
+        
+        for start in graph:
+            if start in index:
+                continue
+                
+            work = [(start, iter(sorted(graph[start])))]
+            index[start] = lowlink[start] = len(index)
+            stack.append(start)
+            on_stack.add(start)
+            
+            while work:
+                node, neighbors = work[-1]
+                advanced = False
+                for neighbor in neighbors:
+                    if neighbor not in index:
+                        index[neighbor] = lowlink[neighbor] = len(index)
+                        stack.append(neighbor)
+                        on_stack.add(neighbor)
+                        work.append((neighbor, iter(sorted(graph.get(neighbor, ())))))
+                        advanced = True
+                        break
+                    if neighbor in on_stack:
+                        lowlink[node] = min(lowlink[node], index[neighbor])
+                if advanced:
+                    continue
                     
-                    self.nesting_issues.append(issue)
-                    print(f"    🚨 CRITIQUE: Cycle détecté {' → '.join(cycle)}")
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                    
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component[::-1])
                     
+        return components
+        
     def detect_backup_in_sync(self):
         """Détecte les dossiers de backup dans la synchronisation"""
         print("  🔍 Recherche de backups dans le sync...")
@@ -346,7 +427,7 @@ class CloudNestingAnalyzer:
         for service_name, info in self.cloud_services.items():
             for cloud_path in info['paths']:
                 try:
-                    for root, dirs, files in os.walk(cloud_path):
+                    for root, dirs, files in get_snapshot(cloud_path).walk(cloud_path):
                         # Limiter la profondeur
                         level = len(Path(root).relative_to(cloud_path).parts)
                         if level > 3:
@@ -391,8 +472,9 @@ class CloudNestingAnalyzer:
         for service_name, info in self.cloud_services.items():
             for cloud_path in info['paths']:
                 try:
-                    for item in cloud_path.iterdir():
-                        if item.is_dir() and item.name in system_folders:
+                    for entry in get_snapshot(cloud_path).iterdir(cloud_path):
+                        if entry.is_dir and not entry.is_symlink and entry.name in system_folders:
+                            item = cloud_path / entry.name
                             system_size = self.get_directory_size(item)
                             
                             if system_size > 50 * 1024 * 1024:  # > 50MB
@@ -419,100 +501,166 @@ class CloudNestingAnalyzer:
         """Détecte les duplications d'espace entre services"""
         print("\n💾 Analyse des duplications d'espace...")
         
-        # Analyser les fichiers identiques entre services
-        self.analyze_cross_cloud_duplicates()
+        # Empreintes de Merkle de toutes les arborescences cloud (un seul parcours)
+        self.build_merkle_trees()
         
-        # Analyser les structures de dossiers dupliquées
+        # Sous-arbres identiques d'abord: une action par dossier dupliqué
         self.analyze_folder_structure_duplication()
         
-    def analyze_cross_cloud_duplicates(self):
-        """Analyse les doublons entre services cloud"""
-        print("  🔍 Recherche de doublons inter-cloud...")
-        
-        file_hashes = {}
+        # Puis les fichiers isolés, hors des dossiers déjà signalés
+        self.analyze_cross_cloud_duplicates()
         
+    def build_merkle_trees(self):
+        """Calcule l'empreinte de chaque dossier des services cloud"""
         for service_name, info in self.cloud_services.items():
             for cloud_path in info['paths']:
                 try:
-                    for root, dirs, files in os.walk(cloud_path):
-                        # Limiter pour performance
-                        level = len(Path(root).relative_to(cloud_path).parts)
-                        if level > 2:
-                            dirs.clear()
-                            continue
-                            
-                        for file in files[:100]:  # Échantillon
-                            if file.startswith('.'):
-                                continue
-                                
-                            file_path = Path(root) / file
-                            try:
-                                # Hash rapide pour les petits fichiers
-                                if file_path.stat().st_size < 10 * 1024 * 1024:  # < 10MB
-                                    file_hash = self.quick_hash(file_path)
-                                    if file_hash:
-                                        if file_hash not in file_hashes:
-                                            file_hashes[file_hash] = []
-                                        file_hashes[file_hash].append((service_name, file_path))
-                            except:
-                                continue
-                                
+                    self.merkle.build(cloud_path)
                 except Exception:
                     continue
                     
+    def service_of(self, path):
+        """Service cloud dont la racine la plus proche contient path"""
+        nearest = self.cloud_index.nearest(path)
+        return nearest[0] if nearest else None
+        
+    def analyze_cross_cloud_duplicates(self):
+        """Analyse les fichiers isolés dupliqués entre services cloud"""
+        print("  🔍 Recherche de doublons inter-cloud...")
+        
+        # Les copies de dossiers dupliqués sont déjà comptées: seule la première reste
+        covered = {path for group in self.duplicate_trees for path in group['paths'][1:]}
+        
+        file_hashes = {}
+        for file_path, (size, file_hash) in self.merkle.files.items():
+            if file_hash is None or Path(file_path).name.startswith('.'):
+                continue
+            if any(str(parent) in covered for parent in Path(file_path).parents):
+                continue
+            service_name = self.service_of(file_path)
+            file_hashes.setdefault((size, file_hash), []).append((service_name, file_path, size))
+                    
+        # Candidats présents dans plusieurs services
+        candidates = [locations for locations in file_hashes.values()
+                      if len({service for service, path, size in locations}) > 1]
+        
+        # L'empreinte rapide ne couvre pas tout un gros fichier: confirmation complète
+        digests = self.full_digests([path for locations in candidates if locations[0][2] > 2 * self.quick_block
+                                     for service, path, size in locations])
+        
         # Identifier les vrais doublons inter-cloud
         cross_cloud_duplicates = 0
         duplicated_space = 0
         
-        for file_hash, locations in file_hashes.items():
-            if len(locations) > 1:
-                services = set(service for service, path in locations)
-                if len(services) > 1:  # Fichier présent dans plusieurs services
+        for locations in candidates:
+            file_size = locations[0][2]
+            if file_size > 2 * self.quick_block:
+                by_digest = defaultdict(list)
+                for location in locations:
+                    if digests.get(location[1]) is not None:
+                        by_digest[digests[location[1]]].append(location)
+                confirmed = list(by_digest.values())
+            else:
+                confirmed = [locations]
+                
+            for same in confirmed:
+                services = set(service for service, path, size in same)
+                if len(same) > 1 and len(services) > 1:  # Fichier présent dans plusieurs services
                     cross_cloud_duplicates += 1
                     
                     # Calculer l'espace dupliqué
-                    file_size = locations[0][1].stat().st_size
-                    duplicated_space += file_size * (len(locations) - 1)
+                    duplicated_space += file_size * (len(same) - 1)
                     
+        if self.placeholders:
+            remote_size = sum(self.placeholders.values())
+            print(f"    ☁️  {len(self.placeholders)} fichiers non téléchargés ignorés ({self.format_size(remote_size)} dans le cloud)")
+            
         if cross_cloud_duplicates > 0:
             print(f"    📊 {cross_cloud_duplicates} fichiers dupliqués entre services")
             print(f"    💾 Espace dupliqué: {self.format_size(duplicated_space)}")
             self.space_waste += duplicated_space
             
     def analyze_folder_structure_duplication(self):
-        """Analyse la duplication des structures de dossiers"""
-        print("  🔍 Analyse des structures de dossiers dupliquées...")
+        """Détecte les dossiers entiers identiques entre services (empreintes de Merkle)"""
+        print("  🔍 Analyse des dossiers dupliqués...")
         
-        folder_structures = {}
+        # Copie interne à un service: hors du périmètre des imbrications
+        candidates = [group for group in self.merkle.duplicates(min_size=self.min_tree_size)
+                      if len({self.service_of(path) for path in group['paths']}) > 1]
         
-        for service_name, info in self.cloud_services.items():
-            for cloud_path in info['paths']:
-                try:
-                    structure = []
-                    for item in cloud_path.iterdir():
-                        if item.is_dir() and not item.name.startswith('.'):
-                            structure.append(item.name)
-                            
-                    structure.sort()
-                    structure_key = tuple(structure)
-                    
-                    if structure_key not in folder_structures:
-                        folder_structures[structure_key] = []
-                    folder_structures[structure_key].append((service_name, cloud_path))
-                    
-                except Exception:
-                    continue
-                    
-        # Identifier les structures similaires
-        similar_structures = 0
-        for structure, services in folder_structures.items():
-            if len(services) > 1 and len(structure) > 3:  # Structure significative
-                similar_structures += 1
-                print(f"    📁 Structure similaire dans {[s[0] for s in services]}")
+        for group in self.verify_trees(candidates):
+            services = sorted({self.service_of(path) for path in group['paths']})
+            if len(services) < 2:
+                continue
                 
-        if similar_structures > 0:
-            print(f"    📊 {similar_structures} structures de dossiers similaires détectées")
+            self.duplicate_trees.append(group)
+            issue = {
+                'type': 'duplicate_tree',
+                'paths': group['paths'],
+                'services': services,
+                'files': group['files'],
+                'wasted_space': group['wasted'],
+                'severity': 'haute',
+                'description': f"Dossier {Path(group['paths'][0]).name} identique dans {len(group['paths'])} emplacements ({', '.join(services)})"
+            }
+            self.nesting_issues.append(issue)
+            self.space_waste += group['wasted']
             
+            print(f"    📁 {Path(group['paths'][0]).name}: {group['files']} fichiers identiques dans {services}")
+            print(f"       Espace dupliqué: {self.format_size(group['wasted'])}")
+            
+        if self.duplicate_trees:
+            print(f"    📊 {len(self.duplicate_trees)} dossiers dupliqués entre services")
+            
+    def full_digests(self, paths):
+        """Empreintes complètes {chemin: Fingerprint ou None}, lues en parallèle par périphérique"""
+        if not paths:
+            return {}
+        return self.hasher.run(paths, lambda path, st: self.finder.full_hash(Path(path), st=st))
+        
+    def verify_trees(self, groups):
+        """
+        Confirme les dossiers identiques par empreintes complètes
+        
+        Les empreintes de Merkle reposent sur quick_hash, qui ne lit que le début
+        et la fin des gros fichiers. Chaque copie est relue en entier pour ces
+        fichiers; seules les copies dont tout le contenu concorde restent groupées.
+        
+        Returns:
+            groupes au format de MerkleTree.duplicates, copies divergentes retirées
+        """
+        partial = {}   # dossier de référence → chemins relatifs des gros fichiers
+        for group in groups:
+            reference = group['paths'][0]
+            partial[reference] = []
+            for root, dirs, files in get_snapshot(reference).walk(reference):
+                dirs[:] = [d for d in dirs if d not in self.merkle.ignore]
+                for name in files:
+                    path = os.path.join(root, name)
+                    size = self.merkle.files.get(path, (0, None))[0]
+                    if name not in self.merkle.ignore and size > 2 * self.quick_block:
+                        partial[reference].append(os.path.relpath(path, reference))
+                        
+        digests = self.full_digests([os.path.join(copy, relative) for group in groups
+                                     for copy in group['paths'] for relative in partial[group['paths'][0]]])
+        
+        verified = []
+        for group in groups:
+            relatives = partial[group['paths'][0]]
+            by_content = defaultdict(list)
+            for copy in group['paths']:
+                signature = tuple(digests.get(os.path.join(copy, relative)) for relative in relatives)
+                if None not in signature:
+                    by_content[signature].append(copy)
+                    
+            for copies in by_content.values():
+                if copies == group['paths']:
+                    verified.append(group)
+                elif len(copies) > 1:
+                    verified.append(dict(group, paths=copies, wasted=group['size'] * (len(copies) - 1)))
+                    
+        return verified
+        
     def analyze_sync_conflicts(self):
         """Analyse les conflits de synchronisation"""
         print("\n⚠️  Analyse des conflits de synchronisation...")
@@ -529,7 +677,7 @@ class CloudNestingAnalyzer:
             
             for cloud_path in info['paths']:
                 try:
-                    for root, dirs, files in os.walk(cloud_path):
+                    for root, dirs, files in get_snapshot(cloud_path).walk(cloud_path):
                         level = len(Path(root).relative_to(cloud_path).parts)
                         if level > 3:
                             dirs.clear()
@@ -595,6 +743,20 @@ class CloudNestingAnalyzer:
                 ]
             }
             
+        elif issue_type == 'duplicate_tree':
+            keep = issue['paths'][0]
+            return {
+                'priority': 'haute',
+                'action': 'supprimer_copie_dossier',
+                'description': f"Garder une seule copie de {Path(keep).name} ({issue['files']} fichiers)",
+                'space_saving': issue['wasted_space'],
+                'steps': [
+                    f"1. Choisir la copie de référence parmi {', '.join(issue['services'])}",
+                    f"2. Vérifier qu'aucune modification n'est en attente de synchronisation",
+                    *[f"{i}. Retirer {path} du service (copie identique)" for i, path in enumerate(issue['paths'][1:], 3)]
+                ]
+            }
+            
         elif issue_type == 'backup_in_sync':
             return {
                 'priority': 'moyenne',
@@ -632,8 +794,10 @@ class CloudNestingAnalyzer:
         
         print(f"☁️  Services cloud détectés: {len(self.cloud_services)}")
         for service, info in self.cloud_services.items():
-            total_size = sum(self.get_directory_size(p) for p in info['paths'])
-            print(f"   • {service}: {self.format_size(total_size)}")
+            sizes = [self.sizer.size(p) for p in info['paths']]
+            total_size = sum(s['logical'] for s in sizes)
+            disk_size = sum(s['physical'] for s in sizes)
+            print(f"   • {service}: {self.format_size(total_size)} (sur disque: {self.format_size(disk_size)})")
             
         print(f"\n🚨 Problèmes d'imbrication détectés: {len(self.nesting_issues)}")
         
@@ -693,21 +857,25 @@ class CloudNestingAnalyzer:
             print(f"   En résolvant ces imbrications, vous pourriez libérer")
             print(f"   {self.format_size(self.space_waste)} d'espace de stockage cloud")
             
-    def quick_hash(self, file_path):
+    def quick_hash(self, file_path, file_size=None, st=None):
         """Calcule un hash rapide d'un fichier"""
         try:
-            hash_md5 = hashlib.md5()
-            with open(file_path, "rb") as f:
-                # Lire seulement le début et la fin pour les gros fichiers
-                chunk = f.read(8192)
-                if chunk:
-                    hash_md5.update(chunk)
-                    if file_path.stat().st_size > 1024*1024:  # > 1MB
-                        f.seek(-8192, 2)  # Aller à la fin
-                        chunk = f.read(8192)
-                        if chunk:
-                            hash_md5.update(chunk)
-            return hash_md5.hexdigest()[:16]
+            # Ne jamais ouvrir un placeholder: la lecture déclencherait le téléchargement
+            if st is None:
+                st = os.stat(file_path)
+            if self.placeholder_detector.is_placeholder(file_path, st):
+                self.placeholders[str(file_path)] = self.placeholder_detector.remote_size(file_path, st)
+                return None
+                
+            if file_size is None:
+                file_size = st.st_size
+                
+            # Début et fin seulement pour les gros fichiers (confirmés ensuite par verify_trees)
+            if file_size > 2 * self.quick_block:
+                fingerprint, read = self.hasher.hash_head_tail(file_path, self.quick_block, st)
+            else:
+                fingerprint, read = self.hasher.hash_full(file_path, st)
+            return fingerprint
         except:
             return None
             
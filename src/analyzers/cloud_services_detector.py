@@ -11,10 +11,17 @@ from pathlib import Path
 from datetime import datetime, timedelta
 import json
 
+# Ajouter le répertoire parent pour les imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.fs_snapshot import get_snapshot
+from utils.directory_sizer import DirectorySizer
+
 class CloudServicesDetector:
     def __init__(self, home_path=None):
         self.home_path = Path(home_path) if home_path else Path.home()
         self.cloud_services = {}
+        self.sizer = DirectorySizer()
         self.optimization_opportunities = []
         
         # Définition des services cloud à détecter
@@ -112,6 +119,7 @@ class CloudServicesDetector:
             'detected': False,
             'paths': [],
             'total_size': 0,
+            'physical_size': 0,
             'file_count': 0,
             'sync_active': False,
             'optimization_potential': 0,
@@ -133,6 +141,7 @@ class CloudServicesDetector:
         for path in detected_paths:
             path_info = self.analyze_cloud_path(path, config)
             service_info['total_size'] += path_info['size']
+            service_info['physical_size'] += path_info['physical_size']
             service_info['file_count'] += path_info['file_count']
             service_info['issues'].extend(path_info['issues'])
             
@@ -140,7 +149,7 @@ class CloudServicesDetector:
                 service_info['sync_active'] = True
                 
             print(f"  📁 {path}")
-            print(f"     💾 Taille: {self.format_size(path_info['size'])}")
+            print(f"     💾 Taille: {self.format_size(path_info['size'])} (sur disque: {self.format_size(path_info['physical_size'])})")
             print(f"     📄 Fichiers: {path_info['file_count']}")
             
             if path_info['issues']:
@@ -186,6 +195,7 @@ class CloudServicesDetector:
         """Analyse un chemin cloud spécifique"""
         path_info = {
             'size': 0,
+            'physical_size': 0,
             'file_count': 0,
             'sync_active': False,
             'issues': []
@@ -193,21 +203,18 @@ class CloudServicesDetector:
         
         cloud_dir = Path(cloud_path)
         
-        try:
-            # Calcul rapide de la taille avec du
-            result = subprocess.run(['du', '-sb', str(cloud_dir)], 
-                                  capture_output=True, text=True, timeout=30)
-            if result.returncode == 0:
-                path_info['size'] = int(result.stdout.split()[0])
-        except:
-            pass
+        # Un seul parcours du disque, partagé par toutes les analyses suivantes
+        snapshot = get_snapshot(cloud_dir)
+        sizes = self.sizer.size(cloud_dir)
+        path_info['size'] = sizes['logical']
+        path_info['physical_size'] = sizes['physical']
             
         # Comptage des fichiers (échantillon)
         try:
             file_count = 0
             sync_files = 0
             
-            for root, dirs, files in os.walk(cloud_dir):
+            for root, dirs, files in snapshot.walk(cloud_dir):
                 # Limiter la profondeur pour la performance
                 level = len(Path(root).relative_to(cloud_dir).parts)
                 if level > 3:
@@ -245,20 +252,18 @@ class CloudServicesDetector:
         # Problèmes communs
         try:
             # Fichiers très volumineux non adaptés au cloud
+            snapshot = get_snapshot(cloud_dir)
             large_files = []
-            for root, dirs, files in os.walk(cloud_dir):
+            for root, dirs, files in snapshot.walk(cloud_dir):
                 level = len(Path(root).relative_to(cloud_dir).parts)
                 if level > 2:
                     dirs.clear()
                     continue
                     
                 for file in files[:100]:  # Limiter l'échantillon
-                    file_path = Path(root) / file
-                    try:
-                        if file_path.stat().st_size > 1024*1024*1024:  # > 1GB
-                            large_files.append(file)
-                    except:
-                        continue
+                    entry = snapshot.entry(Path(root) / file)
+                    if entry and entry.size > 1024*1024*1024:  # > 1GB
+                        large_files.append(file)
                         
                 if len(large_files) >= 10:
                     break
@@ -285,7 +290,7 @@ class CloudServicesDetector:
         seen_names = set()
         
         try:
-            for root, dirs, files in os.walk(cloud_dir):
+            for root, dirs, files in get_snapshot(cloud_dir).walk(cloud_dir):
                 level = len(Path(root).relative_to(cloud_dir).parts)
                 if level > 2:
                     dirs.clear()
@@ -315,20 +320,17 @@ class CloudServicesDetector:
         one_year_ago = datetime.now() - timedelta(days=365)
         
         try:
-            for root, dirs, files in os.walk(cloud_dir):
+            snapshot = get_snapshot(cloud_dir)
+            for root, dirs, files in snapshot.walk(cloud_dir):
                 level = len(Path(root).relative_to(cloud_dir).parts)
                 if level > 2:
                     dirs.clear()
                     continue
                     
                 for file in files[:100]:  # Échantillon
-                    file_path = Path(root) / file
-                    try:
-                        mtime = datetime.fromtimestamp(file_path.stat().st_mtime)
-                        if mtime < one_year_ago:
-                            old_files += 1
-                    except:
-                        continue
+                    entry = snapshot.entry(Path(root) / file)
+                    if entry and datetime.fromtimestamp(entry.mtime) < one_year_ago:
+                        old_files += 1
                         
         except:
             pass
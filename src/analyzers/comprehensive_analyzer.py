@@ -11,7 +11,17 @@ from datetime import datetime
 from collections import defaultdict
 import sys
 
+# Ajouter le répertoire parent pour les imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.tree_walker import TreeWalker
+from utils.directory_sizer import DirectorySizer
+from utils.ignore_rules import IgnoreRules
+
 class ComprehensiveAnalyzer:
+    # Détecteurs branchés sur le parcours partagé: register_<nom> puis finish_<nom>
+    DETECTORS = ('development_projects', 'utilities_and_tools', 'docker_ecosystem', 'ai_ml_ecosystem')
+    
     def __init__(self, home_path):
         self.home_path = Path(home_path)
         self.analysis = {
@@ -25,12 +35,58 @@ class ComprehensiveAnalyzer:
             'optimization_opportunities': [],
             'proposed_improvements': []
         }
+        self.size_index = {}  # {dossier: (octets, fichiers)} agrégé par le parcours partagé
+        self.walker = None
+        self.sizer = DirectorySizer(verbose=False)  # Dossiers élagués, mesurés à la demande
+        # Dossiers système, caches et dépendances: ni visités ni parcourus
+        self.ignore_rules = IgnoreRules([
+            '.git/', '__pycache__/', 'node_modules/', '.venv/', 'venv/',
+            '.npm/', '.cache/', '.config/',
+            '/Library/Caches/', '/Library/Application Support/', '/.local/share/',
+            '/Pictures/Photos Library.photoslibrary/'
+        ], root=self.home_path)
+        
+    def run_detectors(self, *names):
+        """
+        Exécute les détecteurs demandés sur un seul parcours du home
+        
+        Chaque détecteur enregistre ses rappels dans register_<nom> et produit
+        son résultat dans finish_<nom>: en ajouter un ne coûte aucun parcours.
+        Les tailles des dossiers sont agrégées de bas en haut par ce même
+        parcours: les visiteurs les laissent à None, finish_<nom> les complète.
+        """
+        walker = TreeWalker(skip=self.should_skip_directory, measure=True)
+        for name in names:
+            getattr(self, f"register_{name}")(walker)
+            
+        self.log(f"📂 Parcours unique du répertoire home ({len(names)} détecteurs)...")
+        stats = walker.walk(self.home_path)
+        self.size_index = walker.sizes
+        self.walker = walker
+        self.log(f"  {stats['directories']} dossiers, {stats['files']} fichiers parcourus")
+        
+        return [getattr(self, f"finish_{name}")() for name in names]
         
     def analyze_development_projects(self):
         """Analyse les projets de développement"""
-        self.log("🔍 Analyse des projets de développement...")
+        return self.run_detectors('development_projects')[0]
+        
+    def analyze_utilities_and_tools(self):
+        """Analyse les utilitaires et outils"""
+        return self.run_detectors('utilities_and_tools')[0]
+        
+    def analyze_docker_ecosystem(self):
+        """Analyse spécifique de l'écosystème Docker"""
+        return self.run_detectors('docker_ecosystem')[0]
         
-        dev_indicators = {
+    def analyze_ai_ml_ecosystem(self):
+        """Analyse spécifique de l'écosystème AI/ML"""
+        return self.run_detectors('ai_ml_ecosystem')[0]
+        
+    # Détecteur: projets de développement
+    def register_development_projects(self, walker):
+        """Prépare la détection des projets de développement"""
+        self.dev_indicators = {
             'git_repos': [],
             'node_projects': [],
             'python_projects': [],
@@ -38,92 +94,91 @@ class ComprehensiveAnalyzer:
             'web_projects': [],
             'ai_ml_projects': []
         }
+        walker.on_directory(self.visit_development_project)
+        
+    def visit_development_project(self, root_path, dirs, files):
+        """Détecte les types de projets d'un dossier"""
+        dev_indicators = self.dev_indicators
+        
+        project_info = {
+            'path': str(root_path),
+            'relative_path': str(root_path.relative_to(self.home_path)),
+            'type': [],
+            'technologies': [],
+            'size_mb': None,
+            'last_modified': self.get_last_modified(root_path),
+            'file_count': len(files),
+            'total_files': None
+        }
         
-        # Scanner pour projets de dev
-        for root, dirs, files in os.walk(self.home_path):
-            root_path = Path(root)
+        # Git repository
+        if '.git' in dirs:
+            project_info['type'].append('git_repo')
+            dev_indicators['git_repos'].append(project_info.copy())
             
-            # Ignorer les dossiers système et caches
-            if self.should_skip_directory(root_path):
-                dirs.clear()  # Ne pas descendre dans ces dossiers
-                continue
-                
-            # Détecter les types de projets
-            project_info = {
-                'path': str(root_path),
-                'relative_path': str(root_path.relative_to(self.home_path)),
-                'type': [],
-                'technologies': [],
-                'size_mb': self.get_directory_size(root_path),
-                'last_modified': self.get_last_modified(root_path),
-                'file_count': len(files)
-            }
+        # Node.js project
+        if 'package.json' in files:
+            project_info['type'].append('node_project')
+            project_info['technologies'].append('nodejs')
+            dev_indicators['node_projects'].append(project_info.copy())
             
-            # Git repository
-            if '.git' in dirs:
-                project_info['type'].append('git_repo')
-                dev_indicators['git_repos'].append(project_info.copy())
-                
-            # Node.js project
-            if 'package.json' in files:
-                project_info['type'].append('node_project')
-                project_info['technologies'].append('nodejs')
-                dev_indicators['node_projects'].append(project_info.copy())
-                
-                # Analyser package.json
-                try:
-                    with open(root_path / 'package.json', 'r') as f:
-                        package_data = json.load(f)
-                        project_info['package_name'] = package_data.get('name', 'unknown')
-                        project_info['dependencies'] = list(package_data.get('dependencies', {}).keys())
-                except:
-                    pass
-                    
-            # Python project
-            python_indicators = ['requirements.txt', 'setup.py', 'pyproject.toml', 'Pipfile', 'environment.yml']
-            if any(indicator in files for indicator in python_indicators):
-                project_info['type'].append('python_project')
-                project_info['technologies'].append('python')
-                dev_indicators['python_projects'].append(project_info.copy())
-                
-            # Docker project
-            docker_indicators = ['Dockerfile', 'docker-compose.yml', 'docker-compose.yaml', '.dockerignore']
-            if any(indicator in files for indicator in docker_indicators):
-                project_info['type'].append('docker_project')
-                project_info['technologies'].append('docker')
-                dev_indicators['docker_projects'].append(project_info.copy())
+            # Analyser package.json
+            try:
+                with open(root_path / 'package.json', 'r') as f:
+                    package_data = json.load(f)
+                    project_info['package_name'] = package_data.get('name', 'unknown')
+                    project_info['dependencies'] = list(package_data.get('dependencies', {}).keys())
+            except:
+                pass
                 
-            # Web project
-            web_indicators = ['index.html', 'index.htm', 'webpack.config.js', 'gulpfile.js', 'vite.config.js']
-            if any(indicator in files for indicator in web_indicators):
-                project_info['type'].append('web_project')
-                project_info['technologies'].append('web')
-                dev_indicators['web_projects'].append(project_info.copy())
-                
-            # AI/ML project
-            ai_indicators = ['model.py', 'train.py', 'neural', 'tensorflow', 'pytorch', 'sklearn']
-            ai_files = [f for f in files if any(indicator in f.lower() for indicator in ai_indicators)]
-            if ai_files or 'models' in dirs or 'datasets' in dirs:
-                project_info['type'].append('ai_ml_project')
-                project_info['technologies'].append('ai_ml')
-                project_info['ai_files'] = ai_files
-                dev_indicators['ai_ml_projects'].append(project_info.copy())
-                
-            # Sauvegarder si c'est un projet
-            if project_info['type']:
-                self.analysis['development_projects'].append(project_info)
-                
-        # Statistiques
-        for category, projects in dev_indicators.items():
+        # Python project
+        python_indicators = ['requirements.txt', 'setup.py', 'pyproject.toml', 'Pipfile', 'environment.yml']
+        if any(indicator in files for indicator in python_indicators):
+            project_info['type'].append('python_project')
+            project_info['technologies'].append('python')
+            dev_indicators['python_projects'].append(project_info.copy())
+            
+        # Docker project
+        docker_indicators = ['Dockerfile', 'docker-compose.yml', 'docker-compose.yaml', '.dockerignore']
+        if any(indicator in files for indicator in docker_indicators):
+            project_info['type'].append('docker_project')
+            project_info['technologies'].append('docker')
+            dev_indicators['docker_projects'].append(project_info.copy())
+            
+        # Web project
+        web_indicators = ['index.html', 'index.htm', 'webpack.config.js', 'gulpfile.js', 'vite.config.js']
+        if any(indicator in files for indicator in web_indicators):
+            project_info['type'].append('web_project')
+            project_info['technologies'].append('web')
+            dev_indicators['web_projects'].append(project_info.copy())
+            
+        # AI/ML project
+        ai_indicators = ['model.py', 'train.py', 'neural', 'tensorflow', 'pytorch', 'sklearn']
+        ai_files = [f for f in files if any(indicator in f.lower() for indicator in ai_indicators)]
+        if ai_files or 'models' in dirs or 'datasets' in dirs:
+            project_info['type'].append('ai_ml_project')
+            project_info['technologies'].append('ai_ml')
+            project_info['ai_files'] = ai_files
+            dev_indicators['ai_ml_projects'].append(project_info.copy())
+            
+        # Sauvegarder si c'est un projet
+        if project_info['type']:
+            self.analysis['development_projects'].append(project_info)
+            
+    def finish_development_projects(self):
+        """Statistiques des projets de développement"""
+        self.log("🔍 Analyse des projets de développement...")
+        self.fill_directory_stats(self.analysis['development_projects'])
+        for category, projects in self.dev_indicators.items():
+            self.fill_directory_stats(projects)
             self.log(f"  {category}: {len(projects)} projets")
             
-        return dev_indicators
+        return self.dev_indicators
         
-    def analyze_utilities_and_tools(self):
-        """Analyse les utilitaires et outils"""
-        self.log("🔧 Analyse des utilitaires et outils...")
-        
-        tools_found = {
+    # Détecteur: utilitaires et outils
+    def register_utilities_and_tools(self, walker):
+        """Prépare la détection des scripts, configurations et environnements"""
+        self.tools_found = {
             'scripts': [],
             'executables': [],
             'configurations': [],
@@ -131,138 +186,157 @@ class ComprehensiveAnalyzer:
             'package_managers': []
         }
         
-        # Scripts et exécutables
+        # Scripts et configurations: rappels par extension, aucun test pour les autres fichiers
         script_extensions = {'.sh', '.py', '.js', '.pl', '.rb', '.ps1', '.bat'}
         config_extensions = {'.conf', '.config', '.json', '.yaml', '.yml', '.toml', '.ini'}
-        
-        for root, dirs, files in os.walk(self.home_path):
-            root_path = Path(root)
+        walker.on_file(self.visit_script, extensions=script_extensions)
+        walker.on_file(self.visit_configuration, extensions=config_extensions)
+        walker.on_directory(self.visit_tool_directories)
+        
+    def visit_script(self, root_path, name, st):
+        """Script trouvé pendant le parcours (st relevé par le parcours en mode measure)"""
+        if st is None:
+            return  # Lien cassé ou fichier disparu
             
-            if self.should_skip_directory(root_path):
-                continue
-                
-            for file in files:
-                file_path = root_path / file
-                extension = file_path.suffix.lower()
-                
-                # Scripts
-                if extension in script_extensions:
-                    tools_found['scripts'].append({
-                        'path': str(file_path),
-                        'name': file,
-                        'type': extension[1:],  # Sans le point
-                        'size': file_path.stat().st_size,
-                        'executable': os.access(file_path, os.X_OK)
-                    })
-                    
-                # Configurations
-                elif extension in config_extensions:
-                    tools_found['configurations'].append({
-                        'path': str(file_path),
-                        'name': file,
-                        'type': extension[1:],
-                        'size': file_path.stat().st_size
-                    })
-                    
-            # Environnements virtuels
-            venv_indicators = ['venv', '.venv', 'env', '.env', 'virtualenv']
-            for venv_name in venv_indicators:
-                if venv_name in dirs:
-                    venv_path = root_path / venv_name
-                    if (venv_path / 'bin' / 'python').exists() or (venv_path / 'Scripts' / 'python.exe').exists():
-                        tools_found['virtual_environments'].append({
-                            'path': str(venv_path),
-                            'name': venv_name,
-                            'size_mb': self.get_directory_size(venv_path),
-                            'python_version': self.get_python_version(venv_path)
-                        })
-                        
-            # Package managers
-            package_managers = {
-                'node_modules': 'npm',
-                '__pycache__': 'python',
-                '.next': 'nextjs',
-                'build': 'build_output',
-                'dist': 'distribution'
-            }
+        file_path = root_path / name
+        self.tools_found['scripts'].append({
+            'path': str(file_path),
+            'name': name,
+            'type': file_path.suffix.lower()[1:],  # Sans le point
+            'size': st.st_size,
+            'executable': os.access(file_path, os.X_OK)
+        })
+        
+    def visit_configuration(self, root_path, name, st):
+        """Fichier de configuration trouvé pendant le parcours"""
+        if st is None:
+            return
             
-            for pm_dir, pm_type in package_managers.items():
-                if pm_dir in dirs:
-                    pm_path = root_path / pm_dir
-                    tools_found['package_managers'].append({
-                        'path': str(pm_path),
-                        'type': pm_type,
-                        'size_mb': self.get_directory_size(pm_path)
+        file_path = root_path / name
+        self.tools_found['configurations'].append({
+            'path': str(file_path),
+            'name': name,
+            'type': file_path.suffix.lower()[1:],
+            'size': st.st_size
+        })
+        
+    def visit_tool_directories(self, root_path, dirs, files):
+        """Environnements virtuels et dossiers de gestionnaires de paquets"""
+        venv_indicators = ['venv', '.venv', 'env', '.env', 'virtualenv']
+        for venv_name in venv_indicators:
+            if venv_name in dirs:
+                venv_path = root_path / venv_name
+                if (venv_path / 'bin' / 'python').exists() or (venv_path / 'Scripts' / 'python.exe').exists():
+                    self.tools_found['virtual_environments'].append({
+                        'path': str(venv_path),
+                        'name': venv_name,
+                        'size_mb': None,
+                        'python_version': self.get_python_version(venv_path)
                     })
                     
-        # Statistiques
-        for category, items in tools_found.items():
+        package_managers = {
+            'node_modules': 'npm',
+            '__pycache__': 'python',
+            '.next': 'nextjs',
+            'build': 'build_output',
+            'dist': 'distribution'
+        }
+        
+        for pm_dir, pm_type in package_managers.items():
+            if pm_dir in dirs:
+                pm_path = root_path / pm_dir
+                self.tools_found['package_managers'].append({
+                    'path': str(pm_path),
+                    'type': pm_type,
+                    'size_mb': None
+                })
+                
+    def finish_utilities_and_tools(self):
+        """Statistiques des utilitaires et outils"""
+        self.log("🔧 Analyse des utilitaires et outils...")
+        self.fill_directory_stats(self.tools_found['virtual_environments'])
+        self.fill_directory_stats(self.tools_found['package_managers'])
+        for category, items in self.tools_found.items():
             self.log(f"  {category}: {len(items)} éléments")
             
-        self.analysis['utilities_scripts'] = tools_found['scripts']
-        self.analysis['virtual_environments'] = tools_found['virtual_environments']
-        
-        return tools_found
+        self.analysis['utilities_scripts'] = self.tools_found['scripts']
+        self.analysis['virtual_environments'] = self.tools_found['virtual_environments']
         
-    def analyze_docker_ecosystem(self):
-        """Analyse spécifique de l'écosystème Docker"""
-        self.log("🐳 Analyse de l'écosystème Docker...")
+        return self.tools_found
         
-        docker_analysis = {
+    # Détecteur: écosystème Docker
+    def register_docker_ecosystem(self, walker):
+        """Prépare la détection des projets Docker"""
+        self.docker_analysis = {
             'docker_projects': [],
             'docker_compose_projects': [],
             'dockerfiles': [],
             'docker_volumes': [],
             'container_data': []
         }
+        walker.on_directory(self.visit_docker_project)
         
-        for root, dirs, files in os.walk(self.home_path):
-            root_path = Path(root)
+    def visit_docker_project(self, root_path, dirs, files):
+        """Projet Docker d'un dossier"""
+        docker_files = [f for f in files if f.lower().startswith('docker')]
+        if not docker_files:
+            return
             
-            if self.should_skip_directory(root_path):
-                continue
-                
-            # Projets Docker
-            docker_files = [f for f in files if f.lower().startswith('docker')]
-            if docker_files:
-                project_info = {
-                    'path': str(root_path),
-                    'docker_files': docker_files,
-                    'has_dockerfile': 'Dockerfile' in files,
-                    'has_compose': any('docker-compose' in f for f in files),
-                    'has_dockerignore': '.dockerignore' in files,
-                    'size_mb': self.get_directory_size(root_path)
-                }
-                
-                # Analyser le Dockerfile
-                if 'Dockerfile' in files:
-                    dockerfile_info = self.analyze_dockerfile(root_path / 'Dockerfile')
-                    project_info.update(dockerfile_info)
-                    
-                # Analyser docker-compose
-                compose_files = [f for f in files if 'docker-compose' in f and f.endswith(('.yml', '.yaml'))]
-                if compose_files:
-                    compose_info = self.analyze_docker_compose(root_path / compose_files[0])
-                    project_info.update(compose_info)
-                    
-                docker_analysis['docker_projects'].append(project_info)
-                
-        self.analysis['docker_projects'] = docker_analysis['docker_projects']
-        self.log(f"  Projets Docker: {len(docker_analysis['docker_projects'])}")
+        project_info = {
+            'path': str(root_path),
+            'docker_files': docker_files,
+            'has_dockerfile': 'Dockerfile' in files,
+            'has_compose': any('docker-compose' in f for f in files),
+            'has_dockerignore': '.dockerignore' in files,
+            'size_mb': None
+        }
         
-        return docker_analysis
+        # Analyser le Dockerfile
+        if 'Dockerfile' in files:
+            dockerfile_info = self.analyze_dockerfile(root_path / 'Dockerfile')
+            project_info.update(dockerfile_info)
+            
+        # Analyser docker-compose
+        compose_files = [f for f in files if 'docker-compose' in f and f.endswith(('.yml', '.yaml'))]
+        if compose_files:
+            compose_info = self.analyze_docker_compose(root_path / compose_files[0])
+            project_info.update(compose_info)
+            
+        self.docker_analysis['docker_projects'].append(project_info)
         
-    def analyze_ai_ml_ecosystem(self):
-        """Analyse spécifique de l'écosystème AI/ML"""
-        self.log("🤖 Analyse de l'écosystème AI/ML...")
+    def finish_docker_ecosystem(self):
+        """Statistiques de l'écosystème Docker"""
+        self.log("🐳 Analyse de l'écosystème Docker...")
+        self.fill_directory_stats(self.docker_analysis['docker_projects'])
+        self.analysis['docker_projects'] = self.docker_analysis['docker_projects']
+        self.log(f"  Projets Docker: {len(self.docker_analysis['docker_projects'])}")
         
-        ai_tools = {
+        return self.docker_analysis
+        
+    # Détecteur: écosystème AI/ML
+    def register_ai_ml_ecosystem(self, walker):
+        """Prépare la détection des notebooks Jupyter"""
+        self.ai_tools = {
             'model_directories': [],
             'datasets': [],
             'notebooks': [],
             'ai_frameworks': [],
             'large_models': []
         }
+        walker.on_file(self.visit_notebook, extensions={'.ipynb'})
+        
+    def visit_notebook(self, root_path, name, st):
+        """Notebook Jupyter trouvé pendant le parcours"""
+        self.ai_tools['notebooks'].append({
+            'path': str(root_path / name),
+            'name': name,
+            'directory': str(root_path.relative_to(self.home_path))
+        })
+        
+    def finish_ai_ml_ecosystem(self):
+        """Outils AI connus (emplacements fixes) et statistiques"""
+        self.log("🤖 Analyse de l'écosystème AI/ML...")
+        ai_tools = self.ai_tools
         
         # Chercher les outils AI spécifiques détectés
         ai_directories = ['pinokio', 'ollama', 'stable-diffusion', 'comfyui', 'automatic1111']
@@ -279,19 +353,6 @@ class ComprehensiveAnalyzer:
                 }
                 ai_tools['ai_frameworks'].append(ai_info)
                 
-        # Chercher les notebooks Jupyter
-        for root, dirs, files in os.walk(self.home_path):
-            if self.should_skip_directory(Path(root)):
-                continue
-                
-            notebooks = [f for f in files if f.endswith('.ipynb')]
-            if notebooks:
-                ai_tools['notebooks'].extend([{
-                    'path': str(Path(root) / nb),
-                    'name': nb,
-                    'directory': str(Path(root).relative_to(self.home_path))
-                } for nb in notebooks])
-                
         self.analysis['ai_ml_tools'] = ai_tools
         
         # Statistiques
@@ -536,29 +597,40 @@ class ComprehensiveAnalyzer:
         
     # Méthodes utilitaires
     def should_skip_directory(self, path):
-        """Détermine si un dossier doit être ignoré"""
-        skip_patterns = [
-            '.git', '__pycache__', 'node_modules', '.venv', 'venv',
-            'Library/Caches', 'Library/Application Support',
-            '.npm', '.cache', '.local/share', '.config',
-            'Pictures/Photos Library.photoslibrary'
-        ]
-        
-        path_str = str(path)
-        return any(pattern in path_str for pattern in skip_patterns)
+        """Détermine si un dossier doit être ignoré (ses parents ont déjà été élagués)"""
+        return self.ignore_rules.ignored(path)
         
+    def get_directory_stats(self, path):
+        """
+        Retourne (octets, fichiers) d'un sous-arbre
+
+        Agrégés pendant le parcours partagé; les dossiers ignorés qu'il contient
+        (.git, node_modules, venv...) ne sont mesurés qu'ici, et seulement pour
+        les dossiers rapportés.
+        """
+        total_size, total_files = self.size_index.get(str(path), (0, 0))
+        if self.walker is not None:
+            for pruned in self.walker.pruned_within(path):
+                size = self.sizer.size(pruned)
+                total_size += size['logical']
+                total_files += size['files']
+        return total_size, total_files
+        
+    def fill_directory_stats(self, items):
+        """Complète la taille (et le nombre total de fichiers) des dossiers relevés pendant le parcours"""
+        for info in items:
+            total_size, total_files = self.get_directory_stats(info['path'])
+            info['size_mb'] = total_size / (1024 * 1024)
+            if 'total_files' in info:
+                info['total_files'] = total_files
+            
     def get_directory_size(self, path):
         """Calcule la taille d'un dossier en MB"""
-        try:
-            total_size = 0
-            for dirpath, dirnames, filenames in os.walk(path):
-                for f in filenames:
-                    fp = os.path.join(dirpath, f)
-                    if os.path.exists(fp):
-                        total_size += os.path.getsize(fp)
-            return total_size / (1024 * 1024)  # MB
-        except:
-            return 0
+        return self.get_directory_stats(path)[0] / (1024 * 1024)  # MB
+        
+    def get_directory_file_count(self, path):
+        """Nombre total de fichiers d'un dossier et de ses sous-dossiers"""
+        return self.get_directory_stats(path)[1]
             
     def get_last_modified(self, path):
         """Obtient la date de dernière modification"""
@@ -680,11 +752,8 @@ class ComprehensiveAnalyzer:
             self.log(f"❌ Répertoire inexistant: {self.home_path}")
             return
             
-        # Exécuter toutes les analyses
-        self.analyze_development_projects()
-        self.analyze_utilities_and_tools()
-        self.analyze_docker_ecosystem()
-        self.analyze_ai_ml_ecosystem()
+        # Exécuter toutes les analyses: un seul parcours pour tous les détecteurs
+        self.run_detectors(*self.DETECTORS)
         self.propose_optimization_strategy()
         
         # Générer le rapport
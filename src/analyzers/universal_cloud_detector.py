@@ -16,12 +16,15 @@ import glob
 sys.path.append(str(Path(__file__).parent.parent))
 
 from utils.platform_detector import PlatformDetector
+from utils.fs_snapshot import get_snapshot
+from utils.directory_sizer import DirectorySizer
 
 class UniversalCloudDetector:
     def __init__(self, target_path=None):
         self.platform = PlatformDetector()
         self.target_path = Path(target_path) if target_path else self.platform.home_path
         self.detected_services = {}
+        self.sizer = DirectorySizer()
         self.business_tenants = []
         
     def detect_all_services(self):
@@ -78,6 +81,7 @@ class UniversalCloudDetector:
             'name': service_name,
             'paths': [str(p) for p in paths],
             'total_size': 0,
+            'physical_size': 0,
             'file_count': 0,
             'sync_status': 'unknown',
             'last_activity': None,
@@ -91,9 +95,10 @@ class UniversalCloudDetector:
             print(f"  📁 {path}")
             
             # Analyser la taille
-            size = self.get_directory_size(path)
-            service_info['total_size'] += size
-            print(f"     💾 Taille: {self.format_size(size)}")
+            sizes = self.sizer.size(path)
+            service_info['total_size'] += sizes['logical']
+            service_info['physical_size'] += sizes['physical']
+            print(f"     💾 Taille: {self.format_size(sizes['logical'])} (sur disque: {self.format_size(sizes['physical'])})")
             
             # Analyser l'activité
             file_count, last_activity = self.analyze_activity(path)
@@ -126,41 +131,9 @@ class UniversalCloudDetector:
         return service_info
         
     def get_directory_size(self, path):
-        """Calcule la taille d'un répertoire (multi-OS)"""
-        try:
-            if self.platform.is_windows:
-                # Utiliser PowerShell sur Windows pour plus de précision
-                cmd = f'(Get-ChildItem -Path "{path}" -Recurse -Force | Measure-Object -Property Length -Sum).Sum'
-                result = subprocess.run(['powershell', '-Command', cmd], 
-                                      capture_output=True, text=True, timeout=30)
-                if result.returncode == 0 and result.stdout.strip():
-                    return int(result.stdout.strip())
-            else:
-                # Utiliser du sur Unix
-                result = subprocess.run(['du', '-sb', str(path)], 
-                                      capture_output=True, text=True, timeout=30)
-                if result.returncode == 0:
-                    return int(result.stdout.split()[0])
-        except:
-            pass
-            
-        # Fallback manuel
-        total_size = 0
-        try:
-            for root, dirs, files in os.walk(path):
-                for file in files:
-                    try:
-                        file_path = Path(root) / file
-                        total_size += file_path.stat().st_size
-                    except:
-                        continue
-                # Limiter pour éviter les timeouts
-                if total_size > 10 * 1024**3:  # 10GB max
-                    break
-        except:
-            pass
-            
-        return total_size
+        """Calcule la taille d'un répertoire (multi-OS) depuis l'instantané partagé"""
+        # Un seul parcours os.scandir remplace PowerShell, du et le fallback manuel
+        return self.sizer.logical_size(path)
         
     def analyze_activity(self, path):
         """Analyse l'activité dans un dossier"""
@@ -168,20 +141,18 @@ class UniversalCloudDetector:
         last_activity = None
         
         try:
-            for root, dirs, files in os.walk(path):
+            snapshot = get_snapshot(path)
+            for root, dirs, files in snapshot.walk(path):
                 file_count += len(files)
                 
                 # Vérifier les dates de modification récentes
                 for file in files[:50]:  # Échantillon
-                    try:
-                        file_path = Path(root) / file
-                        mtime = datetime.fromtimestamp(file_path.stat().st_mtime)
+                    entry = snapshot.entry(Path(root) / file)
+                    if entry:
+                        mtime = datetime.fromtimestamp(entry.mtime)
                         
                         if not last_activity or mtime > last_activity:
                             last_activity = mtime
-                            
-                    except:
-                        continue
                         
                 # Limiter la profondeur
                 level = len(Path(root).relative_to(path).parts)
@@ -235,7 +206,7 @@ class UniversalCloudDetector:
             
         # Chercher les indicateurs
         try:
-            for root, dirs, files in os.walk(path):
+            for root, dirs, files in get_snapshot(path).walk(path):
                 for file in files:
                     for indicator in service_indicators:
                         if indicator in file.lower():
@@ -256,11 +227,12 @@ class UniversalCloudDetector:
         issues = []
         
         try:
-            # Problèmes communs
+            # Problèmes communs (toutes les passes lisent le même instantané)
+            snapshot = get_snapshot(path)
             
             # 1. Fichiers de conflit
             conflict_count = 0
-            for root, dirs, files in os.walk(path):
+            for root, dirs, files in snapshot.walk(path):
                 for file in files:
                     if any(pattern in file.lower() for pattern in 
                           ['conflict', 'conflicted', 'case conflict', 'sync conflict']):
@@ -275,14 +247,11 @@ class UniversalCloudDetector:
                 
             # 2. Fichiers très volumineux (>1GB)
             large_files = 0
-            for root, dirs, files in os.walk(path):
+            for root, dirs, files in snapshot.walk(path):
                 for file in files[:100]:  # Échantillon
-                    try:
-                        file_path = Path(root) / file
-                        if file_path.stat().st_size > 1024**3:  # 1GB
-                            large_files += 1
-                    except:
-                        continue
+                    entry = snapshot.entry(Path(root) / file)
+                    if entry and entry.size > 1024**3:  # 1GB
+                        large_files += 1
                         
                 level = len(Path(root).relative_to(path).parts)
                 if level > 1:
@@ -295,7 +264,7 @@ class UniversalCloudDetector:
             if 'OneDrive' in service_name:
                 # Fichiers avec caractères problématiques
                 problem_chars = 0
-                for root, dirs, files in os.walk(path):
+                for root, dirs, files in snapshot.walk(path):
                     for file in files:
                         if any(char in file for char in ['<', '>', ':', '"', '|', '?', '*']):
                             problem_chars += 1
@@ -348,8 +317,9 @@ class UniversalCloudDetector:
                 'Company', 'Department', 'Policies'
             ]
             
-            for item in path.iterdir():
-                if item.is_dir():
+            snapshot = get_snapshot(path)
+            for item in snapshot.iterdir(path):
+                if item.is_dir:
                     folder_name = item.name.lower()
                     for business_folder in business_folders:
                         if business_folder.lower() in folder_name:
@@ -357,8 +327,8 @@ class UniversalCloudDetector:
                             
             # Chercher des fichiers Office avec métadonnées entreprise
             office_files = 0
-            for file_path in path.rglob("*.docx"):
-                office_files += 1
+            for root, dirs, files in snapshot.walk(path):
+                office_files += sum(1 for name in files if name.endswith('.docx'))
                 if office_files > 20:  # Beaucoup de documents Office
                     features.append("Nombreux documents Office")
                     break
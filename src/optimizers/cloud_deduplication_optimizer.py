@@ -7,18 +7,29 @@ Résout les problèmes d'imbrication et élimine les doublons inter-cloud
 import os
 import sys
 import shutil
-import hashlib
 from pathlib import Path
 from datetime import datetime
-import subprocess
 import json
 
+# Ajouter le répertoire parent pour les imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.duplicate_finder import DuplicateFinder
+from utils.directory_sizer import DirectorySizer
+from utils.fs_snapshot import clear_snapshots
+from utils.backup_manager import BackupManager
+from utils.path_index import PathIndex
+from utils.ignore_rules import IgnoreRules
+
 class CloudDeduplicationOptimizer:
     def __init__(self, home_path=None):
         self.home_path = Path(home_path) if home_path else Path.home()
-        self.backup_dir = Path.home() / "SmartOptimizer_Backups" / "cloud_deduplication" / datetime.now().strftime('%Y%m%d_%H%M%S')
         self.simulation_mode = True
+        self.finder = DuplicateFinder()
+        self.backups = BackupManager(run_name=f"cloud_deduplication_{datetime.now().strftime('%Y%m%d_%H%M%S')}", finder=self.finder)
+        self.sizer = DirectorySizer()
         self.cloud_services = {}
+        self.cloud_index = PathIndex()  # Racines cloud → service, pour les tests d'inclusion
         self.optimization_actions = []
         self.space_recovered = 0
         
@@ -56,9 +67,6 @@ class CloudDeduplicationOptimizer:
         print("🔄 OPTIMISEUR DE DÉDUPLICATION CLOUD")
         print("=" * 45)
         
-        if not self.simulation_mode:
-            self.backup_dir.mkdir(parents=True, exist_ok=True)
-            
         # 1. Détecter tous les services cloud
         self.detect_cloud_services()
         
@@ -113,6 +121,8 @@ class CloudDeduplicationOptimizer:
                     'best_for': self.cloud_config.get(service_name, {}).get('best_for', []),
                     'file_inventory': {}
                 }
+                for path in paths:
+                    self.cloud_index.add(path, (service_name, path))
                 print(f"  ✅ {service_name}: {len(paths)} chemin(s), {self.format_size(self.cloud_services[service_name]['size'])}")
                 
     def find_service_paths(self, patterns):
@@ -135,22 +145,15 @@ class CloudDeduplicationOptimizer:
         return found_paths
         
     def get_directory_size(self, path):
-        """Obtient la taille d'un répertoire"""
-        try:
-            result = subprocess.run(['du', '-sb', str(path)], 
-                                  capture_output=True, text=True, timeout=30)
-            if result.returncode == 0:
-                return int(result.stdout.split()[0])
-        except:
-            pass
-        return 0
+        """Obtient la taille d'un répertoire (sans du, liens physiques comptés une fois)"""
+        return self.sizer.logical_size(path)
         
     def analyze_cross_cloud_duplicates(self):
         """Analyse les doublons entre services cloud"""
         print("\n🔍 Analyse des doublons inter-cloud...")
         
         # Inventorier tous les fichiers de chaque service
-        all_files = {}
+        inventory = {}
         
         for service_name, info in self.cloud_services.items():
             print(f"  📁 Inventaire {service_name}...")
@@ -163,28 +166,34 @@ class CloudDeduplicationOptimizer:
             info['file_inventory'] = service_files
             
             # Ajouter à l'inventaire global
-            for file_hash, file_info in service_files.items():
-                if file_hash not in all_files:
-                    all_files[file_hash] = []
-                all_files[file_hash].append((service_name, file_info))
+            for path, file_info in service_files.items():
+                inventory[path] = (service_name, file_info)
                 
+        # Contenu identique confirmé: taille → empreinte → hash complet (avec cache)
+        all_files = {}
+        candidates = [(Path(path), file_info['size']) for path, (service, file_info) in inventory.items()]
+        for file_hash, group in self.finder.find_duplicates(candidates).items():
+            all_files[file_hash] = [inventory[str(path)] for path in group['files']]
+        self.finder.print_placeholders()
+            
         # Identifier les vrais doublons
         duplicates_found = 0
         total_duplicate_space = 0
         
         for file_hash, locations in all_files.items():
-            if len(locations) > 1:
+            services = set(loc[0] for loc in locations)
+            if len(services) > 1:
                 # Plusieurs services ont le même fichier
-                services = [loc[0] for loc in locations]
                 file_size = locations[0][1]['size']
                 
-                duplicates_found += 1
-                duplicate_space = file_size * (len(locations) - 1)
-                total_duplicate_space += duplicate_space
-                
                 # Déterminer le meilleur service pour ce fichier
                 best_service = self.choose_best_service_for_file(locations)
                 
+                # Seules les copies hors du meilleur service seront supprimées
+                duplicates_found += 1
+                duplicate_space = file_size * sum(1 for loc in locations if loc[0] != best_service)
+                total_duplicate_space += duplicate_space
+                
                 # Planifier la déduplication
                 self.plan_deduplication(file_hash, locations, best_service)
                 
@@ -195,6 +204,8 @@ class CloudDeduplicationOptimizer:
     def inventory_files(self, cloud_path):
         """Fait l'inventaire des fichiers d'un chemin cloud"""
         files = {}
+        # Fichiers cachés, dossiers système et caches ignorés
+        rules = IgnoreRules(['.*', 'System/', 'Trash/', '__pycache__/'], root=cloud_path)
         
         try:
             for root, dirs, filenames in os.walk(cloud_path):
@@ -204,28 +215,22 @@ class CloudDeduplicationOptimizer:
                     dirs.clear()
                     continue
                     
-                # Ignorer certains dossiers
-                dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ['System', 'Trash', '__pycache__']]
+                rules.prune(root, dirs)
                 
-                for filename in filenames[:500]:  # Limiter pour performance
-                    if filename.startswith('.'):
-                        continue
-                        
+                for filename in rules.keep_files(root, filenames)[:500]:  # Limiter pour performance
                     file_path = Path(root) / filename
                     try:
                         stat = file_path.stat()
                         
-                        # Calculer le hash pour les fichiers moyens
+                        # Inventorier les fichiers moyens (hachés ensuite seulement si nécessaire)
                         if 1024 < stat.st_size < 100 * 1024 * 1024:  # 1KB à 100MB
-                            file_hash = self.calculate_file_hash(file_path)
-                            if file_hash:
-                                files[file_hash] = {
-                                    'path': str(file_path),
-                                    'name': filename,
-                                    'size': stat.st_size,
-                                    'modified': stat.st_mtime,
-                                    'relative_path': str(file_path.relative_to(cloud_path))
-                                }
+                            files[str(file_path)] = {
+                                'path': str(file_path),
+                                'name': filename,
+                                'size': stat.st_size,
+                                'modified': stat.st_mtime,
+                                'relative_path': str(file_path.relative_to(cloud_path))
+                            }
                                 
                     except Exception:
                         continue
@@ -236,25 +241,8 @@ class CloudDeduplicationOptimizer:
         return files
         
     def calculate_file_hash(self, file_path):
-        """Calcule le hash MD5 d'un fichier"""
-        try:
-            hash_md5 = hashlib.md5()
-            with open(file_path, "rb") as f:
-                # Hash rapide : début + fin du fichier
-                chunk = f.read(8192)
-                if chunk:
-                    hash_md5.update(chunk)
-                    
-                # Pour les gros fichiers, ajouter la fin
-                if file_path.stat().st_size > 64 * 1024:
-                    f.seek(-8192, 2)
-                    chunk = f.read(8192)
-                    if chunk:
-                        hash_md5.update(chunk)
-                        
-            return hash_md5.hexdigest()
-        except:
-            return None
+        """Empreinte complète d'un fichier (via le cache partagé)"""
+        return self.finder.full_hash(file_path)
             
     def choose_best_service_for_file(self, locations):
         """Choisit le meilleur service pour garder un fichier"""
@@ -316,36 +304,27 @@ class CloudDeduplicationOptimizer:
         """Résout les problèmes d'imbrication de services cloud"""
         print("\n🔧 Résolution des imbrications...")
         
-        cloud_paths = []
-        for service_name, info in self.cloud_services.items():
-            for path in info['paths']:
-                cloud_paths.append((service_name, path))
-                
-        # Détecter les imbrications
-        for i, (service1, path1) in enumerate(cloud_paths):
-            for j, (service2, path2) in enumerate(cloud_paths):
-                if i != j:
-                    try:
-                        # path2 est-il dans path1 ?
-                        relative = path2.relative_to(path1)
-                        
-                        # C'est une imbrication problématique
-                        action = {
-                            'type': 'resolve_nesting',
-                            'parent_service': service1,
-                            'nested_service': service2,
-                            'nested_path': str(path2),
-                            'new_path': str(self.home_path / f"{service2}_Standalone"),
-                            'description': f"Déplacer {service2} hors de {service1}",
-                            'space_saved': self.get_directory_size(path2)
-                        }
-                        
-                        self.optimization_actions.append(action)
-                        print(f"  🚨 Imbrication détectée: {service2} dans {service1}")
-                        
-                    except ValueError:
+        # Détecter les imbrications: racines contenant chaque racine, en O(profondeur)
+        for service2, info in self.cloud_services.items():
+            for path2 in info['paths']:
+                for service1, path1 in self.cloud_index.containing(path2):
+                    if (service1, path1) == (service2, path2):
                         continue
                         
+                    # C'est une imbrication problématique
+                    action = {
+                        'type': 'resolve_nesting',
+                        'parent_service': service1,
+                        'nested_service': service2,
+                        'nested_path': str(path2),
+                        'new_path': str(self.home_path / f"{service2}_Standalone"),
+                        'description': f"Déplacer {service2} hors de {service1}",
+                        'space_saved': self.get_directory_size(path2)
+                    }
+                    
+                    self.optimization_actions.append(action)
+                    print(f"  🚨 Imbrication détectée: {service2} dans {service1}")
+                        
     def optimize_system_folders(self):
         """Optimise les dossiers système synchronisés"""
         print("\n🗂️  Optimisation des dossiers système...")
@@ -357,16 +336,8 @@ class CloudDeduplicationOptimizer:
             if not folder_path.exists():
                 continue
                 
-            syncing_services = []
-            
-            # Vérifier quels services synchronisent ce dossier
-            for service_name, info in self.cloud_services.items():
-                for cloud_path in info['paths']:
-                    try:
-                        folder_path.relative_to(cloud_path)
-                        syncing_services.append(service_name)
-                    except ValueError:
-                        continue
+            # Services dont une racine contient ce dossier
+            syncing_services = [service_name for service_name, cloud_path in self.cloud_index.containing(folder_path)]
                         
             if len(syncing_services) > 1:
                 # Choisir le meilleur service pour ce dossier
@@ -465,6 +436,9 @@ class CloudDeduplicationOptimizer:
                 print(f"  ❌ Erreur lors de {action['description']}: {e}")
                 continue
                 
+        # Instantanés (et tailles mémorisées) périmés après suppressions et déplacements
+        clear_snapshots()
+        
         print(f"\n✅ {executed_actions} optimisations exécutées")
         print(f"💾 Espace total récupéré: {self.format_size(total_space_saved)}")
         
@@ -473,10 +447,8 @@ class CloudDeduplicationOptimizer:
         for file_to_remove in action['remove_from']:
             file_path = Path(file_to_remove['path'])
             if file_path.exists():
-                # Backup puis suppression
-                backup_path = self.backup_dir / file_path.name
-                shutil.copy2(file_path, backup_path)
-                file_path.unlink()
+                # Backup puis suppression (un rename sur le même périphérique)
+                self.backups.backup_and_remove(file_path)
                 
     def execute_nesting_resolution(self, action):
         """Exécute la résolution d'imbrication"""
@@ -541,7 +513,7 @@ class CloudDeduplicationOptimizer:
             print(f"\n⚠️  MODE SIMULATION ACTIVÉ")
             print(f"   Pour appliquer les optimisations: modifier simulation_mode = False")
         else:
-            print(f"\n📁 Sauvegardes: {self.backup_dir}")
+            print(f"\n📁 Sauvegardes: {self.backups.manifest_path}")
             
         # Recommandations post-optimisation
         print(f"\n💡 RECOMMANDATIONS POST-OPTIMISATION:")
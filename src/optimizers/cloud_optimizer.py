@@ -7,18 +7,31 @@ Optimise iCloud, OneDrive, Google Drive avec stratégies spécifiques
 import os
 import sys
 import shutil
-import hashlib
 from pathlib import Path
 from datetime import datetime, timedelta
 import subprocess
 import json
 
+# Ajouter le répertoire parent pour les imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.duplicate_finder import DuplicateFinder
+from utils.fs_snapshot import get_incremental_snapshot, get_snapshot, clear_snapshots
+from utils.cloud_placeholders import PlaceholderDetector
+from utils.file_linker import FileLinker
+from utils.backup_manager import BackupManager
+from utils.ignore_rules import IgnoreRules
+
 class CloudOptimizer:
     def __init__(self, cloud_path):
         self.cloud_path = Path(cloud_path)
         self.cloud_service = self.detect_cloud_service()
-        self.backup_dir = Path.home() / "SmartOptimizer_Backups" / "cloud_optimization" / datetime.now().strftime('%Y%m%d_%H%M%S')
         self.simulation_mode = True
+        self.duplicate_action = 'delete'  # 'delete' ou 'consolidate' (reflink/lien physique)
+        self.linker = FileLinker()
+        self.finder = DuplicateFinder()
+        self.backups = BackupManager(run_name=f"cloud_optimization_{datetime.now().strftime('%Y%m%d_%H%M%S')}", finder=self.finder)
+        self.placeholder_detector = PlaceholderDetector()
         self.stats = {
             'files_analyzed': 0,
             'duplicates_found': 0,
@@ -55,10 +68,6 @@ class CloudOptimizer:
             print(f"❌ Chemin cloud inexistant: {self.cloud_path}")
             return False
             
-        # Créer le répertoire de backup
-        if not self.simulation_mode:
-            self.backup_dir.mkdir(parents=True, exist_ok=True)
-            
         # 1. Analyse initiale
         self.analyze_cloud_content()
         
@@ -77,25 +86,31 @@ class CloudOptimizer:
         """Analyse le contenu du dossier cloud"""
         print("🔍 Analyse du contenu cloud...")
         
-        duplicates = {}
+        candidates = []
         large_files = []
         old_files = []
         
-        for root, dirs, files in os.walk(self.cloud_path):
-            # Ignorer les dossiers système
-            dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ['System', 'Trash']]
+        # Seuls les dossiers modifiés depuis le dernier passage sont relus
+        snapshot = get_incremental_snapshot(self.cloud_path)
+        print(f"  ♻️  {snapshot.reused} dossiers inchangés réutilisés, {snapshot.listed} relus")
+        
+        # Fichiers cachés et dossiers système ignorés
+        rules = IgnoreRules(['.*', 'System/', 'Trash/'], root=self.cloud_path)
+        
+        for root, dirs, files in snapshot.walk(self.cloud_path):
+            rules.prune(root, dirs)
             
-            for file in files:
-                if file.startswith('.'):
+            for file in rules.keep_files(root, files):
+                file_path = Path(root) / file
+                entry = snapshot.entry(file_path)
+                if entry is None or entry.is_symlink:
                     continue
                     
-                file_path = Path(root) / file
                 self.stats['files_analyzed'] += 1
                 
                 try:
-                    stat = file_path.stat()
-                    size = stat.st_size
-                    mtime = datetime.fromtimestamp(stat.st_mtime)
+                    size = entry.size
+                    mtime = datetime.fromtimestamp(entry.mtime)
                     
                     # Détecter les gros fichiers (>100MB)
                     if size > 100 * 1024 * 1024:
@@ -113,43 +128,36 @@ class CloudOptimizer:
                             'modified': mtime
                         })
                         
-                    # Détecter les doublons potentiels
+                    # Candidats doublons (le contenu n'est lu qu'en cas de collision de taille)
                     if size < 50 * 1024 * 1024:  # Seulement pour fichiers <50MB
-                        file_hash = self.calculate_file_hash(file_path)
-                        if file_hash:
-                            if file_hash not in duplicates:
-                                duplicates[file_hash] = []
-                            duplicates[file_hash].append(file_path)
+                        candidates.append((file_path, size))
                             
                 except Exception as e:
                     continue
                     
+        # Taille → empreinte → contenu, avec le cache d'empreintes partagé; chaque groupe
+        # garde son empreinte stat 'expect' pour la revalidation avant d'agir
+        duplicates = self.finder.find_duplicates(candidates)
+        self.finder.print_placeholders()
+        
         # Traiter les résultats
         self.process_analysis_results(duplicates, large_files, old_files)
         
     def calculate_file_hash(self, file_path):
-        """Calcule le hash MD5 d'un fichier (pour les petits fichiers)"""
-        try:
-            hash_md5 = hashlib.md5()
-            with open(file_path, "rb") as f:
-                chunk = f.read(8192)  # Lire seulement le début pour les gros fichiers
-                if chunk:
-                    hash_md5.update(chunk)
-            return hash_md5.hexdigest()[:16]  # Hash court
-        except:
-            return None
+        """Empreinte complète d'un fichier (via le cache partagé)"""
+        return self.finder.full_hash(file_path)
             
     def process_analysis_results(self, duplicates, large_files, old_files):
         """Traite les résultats de l'analyse"""
         
         # Doublons
-        real_duplicates = {k: v for k, v in duplicates.items() if len(v) > 1}
+        real_duplicates = {k: group for k, group in duplicates.items() if len(group['files']) > 1}
         self.stats['duplicates_found'] = len(real_duplicates)
         
         if real_duplicates:
             print(f"  🔄 {len(real_duplicates)} groupes de doublons trouvés")
-            for file_hash, files in list(real_duplicates.items())[:5]:
-                print(f"     • {len(files)} copies de {files[0].name}")
+            for file_hash, group in list(real_duplicates.items())[:5]:
+                print(f"     • {len(group['files'])} copies de {group['files'][0].name}")
                 
         # Gros fichiers
         self.stats['large_files_found'] = len(large_files)
@@ -229,24 +237,22 @@ class CloudOptimizer:
                                 shutil.move(str(file_path), str(folder_path / file_path.name))
                             except:
                                 continue
+                        clear_snapshots()  # Les analyses suivantes relisent le disque modifié
                                 
     def handle_icloud_placeholders(self):
         """Gère les fichiers .icloud (placeholders)"""
-        icloud_files = list(self.cloud_path.rglob("*.icloud"))
+        icloud_files = []
+        for root, dirs, files in get_snapshot(self.cloud_path).walk(self.cloud_path):
+            icloud_files.extend(Path(root) / name for name in files if name.endswith('.icloud'))
         
         if icloud_files:
-            print(f"  ☁️  {len(icloud_files)} fichiers iCloud non téléchargés")
+            # Taille réelle lue dans le stub, sans rien télécharger
+            remote_size = sum(self.placeholder_detector.remote_size(p) for p in icloud_files)
+            print(f"  ☁️  {len(icloud_files)} fichiers iCloud non téléchargés ({self.format_size(remote_size)} dans le cloud)")
             
-            large_placeholders = []
-            for placeholder in icloud_files:
-                original_name = placeholder.name.replace('.icloud', '')
-                # Estimer la taille depuis le nom si possible
-                large_placeholders.append(placeholder)
-                
-            if large_placeholders:
-                action = f"Identifier {len(large_placeholders)} placeholders à télécharger ou archiver"
-                self.stats['optimization_actions'].append(action)
-                print(f"     📥 {action}")
+            action = f"Identifier {len(icloud_files)} placeholders à télécharger ou archiver"
+            self.stats['optimization_actions'].append(action)
+            print(f"     📥 {action}")
                 
     def optimize_icloud_photos(self):
         """Optimise les photos iCloud"""
@@ -449,7 +455,12 @@ class CloudOptimizer:
             if item.is_dir() and not item.name.startswith('.'):
                 # Vérifier la date de dernière modification
                 try:
-                    latest_mtime = max(f.stat().st_mtime for f in item.rglob("*") if f.is_file())
+                    # mtimes relevés par l'instantané: aucun stat supplémentaire
+                    snapshot = get_snapshot(item)
+                    latest_mtime = max(
+                        snapshot.directories[root]['entries'][name].mtime
+                        for root, dirs, files in snapshot.walk(item) for name in files
+                    )
                     last_modified = datetime.fromtimestamp(latest_mtime)
                     
                     if last_modified < datetime.now() - timedelta(days=180):  # 6 mois
@@ -518,36 +529,67 @@ class CloudOptimizer:
         # 3. Nettoyer les fichiers temporaires
         self.clean_temporary_files()
         
+        if not self.simulation_mode:
+            clear_snapshots()  # Instantanés périmés après suppressions et déplacements
+        
     def handle_duplicates(self):
         """Gère les fichiers dupliqués"""
         if hasattr(self, 'duplicates') and self.duplicates:
             print(f"  🔄 Traitement de {len(self.duplicates)} groupes de doublons...")
             
             total_recoverable = 0
-            for file_hash, files in self.duplicates.items():
-                if len(files) > 1:
-                    # Garder le plus récent, supprimer les autres
-                    files_sorted = sorted(files, key=lambda f: f.stat().st_mtime, reverse=True)
-                    best_file = files_sorted[0]
-                    duplicates_to_remove = files_sorted[1:]
+            failed = 0
+            for fingerprint, group in self.duplicates.items():
+                files = group['files']
+                expect = group['expect']
+                if len(files) < 2:
+                    continue
                     
-                    for dup_file in duplicates_to_remove:
-                        try:
-                            file_size = dup_file.stat().st_size
-                            total_recoverable += file_size
-                            
-                            if not self.simulation_mode:
-                                # Backup puis suppression
-                                backup_path = self.backup_dir / dup_file.name
-                                shutil.copy2(dup_file, backup_path)
-                                dup_file.unlink()
-                                
-                        except:
+                # Garder le plus récent, supprimer les autres (mtime relevé à l'analyse: aucun stat)
+                files_sorted = sorted(files, key=lambda f: expect[str(f)]['mtime_ns'], reverse=True)
+                best_file = files_sorted[0]
+                duplicates_to_remove = files_sorted[1:]
+                
+                # Fichier gardé modifié depuis l'analyse: le groupe entier est ignoré
+                if not self.simulation_mode and not self.finder.revalidate(best_file, expect[str(best_file)], fingerprint):
+                    print(f"     ⏭️  Modifié depuis l'analyse, groupe ignoré: {best_file.name}")
+                    continue
+                    
+                for dup_file in duplicates_to_remove:
+                    file_size = group['size']
+                    total_recoverable += file_size
+                    if self.simulation_mode:
+                        continue
+                        
+                    # Doublon modifié ou disparu depuis l'analyse: stat d'abord, relecture si besoin
+                    if not self.finder.revalidate(dup_file, expect[str(dup_file)], fingerprint):
+                        print(f"     ⏭️  Modifié depuis l'analyse, ignoré: {dup_file.name}")
+                        total_recoverable -= file_size
+                        continue
+                        
+                    try:
+                        if self.duplicate_action == 'consolidate':
+                            # Même contenu vérifié: le doublon devient un lien vers best_file
+                            if not self.linker.consolidate(best_file, dup_file):
+                                total_recoverable -= file_size
                             continue
                             
+                        # Backup puis suppression (un rename sur le même périphérique)
+                        self.backups.backup_and_remove(dup_file)
+                    except OSError as e:
+                        failed += 1
+                        total_recoverable -= file_size
+                        print(f"     ❌ {dup_file.name}: {e}")
+                        
+            if not self.simulation_mode:
+                self.finder.print_revalidation("     ")
+                if failed:
+                    print(f"     ⚠️  {failed} doublons non traités (erreur)")
+                    
             if total_recoverable > 0:
                 self.stats['space_recoverable'] += total_recoverable
-                action = f"Supprimer doublons - Espace récupérable: {self.format_size(total_recoverable)}"
+                verb = "Consolider" if self.duplicate_action == 'consolidate' else "Supprimer"
+                action = f"{verb} doublons - Espace récupérable: {self.format_size(total_recoverable)}"
                 self.stats['optimization_actions'].append(action)
                 print(f"     💾 {action}")
                 
@@ -569,6 +611,9 @@ class CloudOptimizer:
                 archive_folder.mkdir(exist_ok=True)
                 for old_file in self.old_files[:10]:  # Limiter pour la sécurité
                     try:
+                        # L'instantané peut dater d'avant une modification: relire avant de déplacer
+                        if datetime.fromtimestamp(os.stat(old_file['path']).st_mtime) != old_file['modified']:
+                            continue
                         shutil.move(str(old_file['path']), str(archive_folder / old_file['path'].name))
                     except:
                         continue
@@ -623,7 +668,7 @@ class CloudOptimizer:
             print(f"   Pour appliquer les optimisations: modifier simulation_mode = False")
         else:
             print(f"\n✅ Optimisations appliquées")
-            print(f"   Sauvegarde: {self.backup_dir}")
+            print(f"   Sauvegarde: {self.backups.manifest_path}")
             
     def format_size(self, size_bytes):
         """Formate une taille en bytes"""
@@ -634,20 +679,25 @@ class CloudOptimizer:
         return f"{size_bytes:.1f} TB"
 
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python3 cloud_optimizer.py <cloud_directory>")
+    args = [arg for arg in sys.argv[1:] if arg != '--consolidate']
+    if len(args) != 1:
+        print("Usage: python3 cloud_optimizer.py <cloud_directory> [--consolidate]")
         print("Examples:")
         print("  python3 cloud_optimizer.py ~/Library/Mobile\\ Documents/com~apple~CloudDocs")
         print("  python3 cloud_optimizer.py ~/OneDrive")
         print("  python3 cloud_optimizer.py ~/Dropbox")
+        print("  --consolidate: remplacer les doublons par des reflinks/liens physiques au lieu de les supprimer")
+        print("                 (lien physique: le doublon prend le mode, le propriétaire et les dates du fichier gardé)")
         sys.exit(1)
         
-    cloud_path = sys.argv[1]
+    cloud_path = args[0]
     if not os.path.exists(cloud_path):
         print(f"❌ Répertoire cloud inexistant: {cloud_path}")
         sys.exit(1)
         
     optimizer = CloudOptimizer(cloud_path)
+    if '--consolidate' in sys.argv[1:]:
+        optimizer.duplicate_action = 'consolidate'
     
     print("🔒 MODE SIMULATION ACTIVÉ")
     print("   Les optimisations seront simulées sans modifications réelles")
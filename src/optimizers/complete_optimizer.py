@@ -6,13 +6,22 @@ Optimisation intelligente avec analyse EXIF, vidéo et audio
 
 import os
 import sys
-import hashlib
-import shutil
 from pathlib import Path
 from datetime import datetime, timedelta
 import json
 import subprocess
 
+# Ajouter le répertoire parent pour les imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.duplicate_finder import DuplicateFinder
+from utils.parallel_scanner import ParallelScanner
+from utils.ignore_rules import IgnoreRules
+from utils.file_linker import FileLinker
+from utils.backup_manager import BackupManager
+from utils.fs_snapshot import clear_snapshots
+from utils.file_table import FileTable
+
 # Tentative d'import des dépendances optionnelles
 DEPENDENCIES = {
     'pillow': False,
@@ -42,11 +51,14 @@ except ImportError:
 class CompleteOptimizer:
     def __init__(self, target_directory):
         self.target_dir = Path(target_directory)
-        self.backup_dir = Path.home() / "SmartOptimizer_Backups" / datetime.now().strftime('%Y%m%d_%H%M%S')
         self.simulation_mode = True
+        self.duplicate_action = 'delete'  # 'delete' ou 'consolidate' (reflink/lien physique)
+        self.linker = FileLinker()
         self.confidence_threshold = 70
-        self.file_analysis = {}
+        self.files = FileTable()   # Une ligne par fichier analysé (taille, dates, score)
         self.duplicates = {}
+        self.finder = DuplicateFinder()
+        self.backups = BackupManager(run_name=f"complete_{datetime.now().strftime('%Y%m%d_%H%M%S')}", finder=self.finder)
         self.optimization_stats = {
             'analyzed': 0,
             'duplicates_found': 0,
@@ -69,15 +81,12 @@ class CompleteOptimizer:
             status = "✅" if available else "❌"
             print(f"  {status} {dep}")
             
-        # 1. Scanner tous les fichiers
-        all_files = self.scan_all_files()
-        
-        # 2. Analyser chaque fichier
-        for file_path in all_files:
-            self.analyze_file(file_path)
+        # 1-2. Scanner et analyser chaque fichier en flux: les lectures des
+        # doublons potentiels commencent pendant le parcours
+        groups = self.finder.stream_duplicates(self.analyzed_files(self.scan_all_files()))
             
         # 3. Détecter les doublons
-        self.detect_duplicates()
+        self.detect_duplicates(groups)
         
         # 4. Générer les recommandations
         self.generate_recommendations()
@@ -85,28 +94,37 @@ class CompleteOptimizer:
         return True
         
     def scan_all_files(self):
-        """Scanner tous les fichiers du répertoire"""
+        """Scanner tous les fichiers du répertoire (générateur de (Path, stat))"""
         print(f"📁 Scan des fichiers...")
-        files = []
         
-        for root, dirs, filenames in os.walk(self.target_dir):
-            # Ignorer certains dossiers
-            dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ['__pycache__', 'node_modules']]
+        # Fichiers et dossiers cachés, caches et dépendances ignorés
+        rules = IgnoreRules(['.*', '__pycache__/', 'node_modules/'], root=self.target_dir)
             
-            for filename in filenames:
-                if not filename.startswith('.'):
-                    file_path = Path(root) / filename
-                    if file_path.is_file():
-                        files.append(file_path)
-        
-        print(f"  📋 {len(files)} fichiers trouvés")
-        self.optimization_stats['analyzed'] = len(files)
-        return files
-        
-    def analyze_file(self, file_path):
-        """Analyse complète d'un fichier"""
+        # Listages concurrents: utile sur les montages réseau et cloud à forte latence
+        # Un seul stat par fichier, transmis à l'analyse et à la détection des doublons
+        count = 0
+        for file_path, stat in ParallelScanner().files(self.target_dir, prune=rules.prune, keep=rules.keep_files):
+            count += 1
+            yield file_path, stat
+        
+        print(f"  📋 {count} fichiers trouvés")
+        self.optimization_stats['analyzed'] = count
+        
+    def analyzed_files(self, files):
+        """Analyse chaque fichier au passage; seuls les fichiers analysés vont au hachage"""
+        for file_path, stat in files:
+            if self.analyze_file(file_path, stat) is not None:
+                yield file_path, stat
+        
+    def analyze_file(self, file_path, stat=None):
+        """
+        Analyse complète d'un fichier (stat: relevé du parcours, sinon relu)
+        
+        La fiche détaillée (métadonnées comprises) ne sert qu'au score: seule une
+        ligne de self.files est conservée. Retourne la fiche, None en cas d'erreur.
+        """
         try:
-            stat = file_path.stat()
+            stat = stat or file_path.stat()
             
             analysis = {
                 'path': str(file_path),
@@ -114,7 +132,7 @@ class CompleteOptimizer:
                 'modified': stat.st_mtime,
                 'created': stat.st_ctime,
                 'extension': file_path.suffix.lower(),
-                'hash': self.calculate_hash(file_path),
+                'hash': None,  # Renseigné par detect_duplicates pour les seuls doublons
                 'quality_score': 0,
                 'metadata': {},
                 'recommendations': []
@@ -131,21 +149,16 @@ class CompleteOptimizer:
             # Calculer le score de qualité
             analysis['quality_score'] = self.calculate_quality_score(analysis)
             
-            self.file_analysis[str(file_path)] = analysis
+            self.files.add(file_path, stat, score=analysis['quality_score'])
+            return analysis
             
         except Exception as e:
             print(f"  ⚠️  Erreur analyse {file_path.name}: {e}")
+            return None
             
     def calculate_hash(self, file_path):
-        """Calcul du hash MD5 d'un fichier"""
-        try:
-            hash_md5 = hashlib.md5()
-            with open(file_path, "rb") as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hash_md5.update(chunk)
-            return hash_md5.hexdigest()
-        except:
-            return None
+        """Empreinte complète d'un fichier"""
+        return self.finder.full_hash(file_path)
             
     def analyze_image(self, file_path):
         """Analyse spécifique des images"""
@@ -321,22 +334,35 @@ class CompleteOptimizer:
             
         return min(100, max(0, score))
         
-    def detect_duplicates(self):
-        """Détecte les fichiers dupliqués"""
+    def detect_duplicates(self, groups):
+        """
+        Détecte les fichiers dupliqués
+        
+        Args:
+            groups: groupes de DuplicateFinder (taille → empreinte début/fin → hash complet)
+        """
         print(f"🔍 Détection des doublons...")
         
-        hash_groups = {}
+        # Fiches reconstruites depuis la table pour les seuls membres des groupes
+        table = self.files
+        rows = table.rows_of(path for group in groups.values() for path in group['files'])
         
-        # Grouper par hash
-        for path, analysis in self.file_analysis.items():
-            file_hash = analysis.get('hash')
-            if file_hash:
-                if file_hash not in hash_groups:
-                    hash_groups[file_hash] = []
-                hash_groups[file_hash].append(analysis)
-                
         # Identifier les vrais doublons
-        for file_hash, files in hash_groups.items():
+        for file_hash, group in groups.items():
+            files = []
+            for path in group['files']:
+                row = rows.get(str(path))
+                if row is None:
+                    continue
+                files.append({
+                    'path': str(path),
+                    'size': table.size[row],
+                    'modified': table.mtime(row),
+                    'quality_score': table.score[row],
+                    'hash': file_hash,
+                    'expect': group['expect'][str(path)]
+                })
+                
             if len(files) > 1:
                 # Trier par score de qualité
                 files.sort(key=lambda x: x['quality_score'], reverse=True)
@@ -351,6 +377,7 @@ class CompleteOptimizer:
                 }
                 
         print(f"  📊 {len(self.duplicates)} groupes de doublons trouvés")
+        self.finder.print_stats()
         self.optimization_stats['duplicates_found'] = len(self.duplicates)
         
     def generate_recommendations(self):
@@ -380,6 +407,10 @@ class CompleteOptimizer:
                 actions.append({
                     'action': action,
                     'file': dup['path'],
+                    'keep': best['path'],
+                    'fingerprint': file_hash,
+                    'expect': dup['expect'],
+                    'keep_expect': best['expect'],
                     'confidence': confidence,
                     'space_saving': dup['size']
                 })
@@ -426,9 +457,7 @@ class CompleteOptimizer:
         
     def execute_optimizations(self, actions):
         """Exécute les optimisations approuvées"""
-        if not self.simulation_mode:
-            # Créer le répertoire de sauvegarde
-            self.backup_dir.mkdir(parents=True, exist_ok=True)
+        consolidate = self.duplicate_action == 'consolidate'
             
         executed = 0
         space_saved = 0
@@ -438,22 +467,38 @@ class CompleteOptimizer:
                 file_path = Path(action['file'])
                 
                 if not self.simulation_mode:
-                    # Sauvegarder avant suppression
-                    backup_path = self.backup_dir / file_path.name
-                    shutil.copy2(file_path, backup_path)
+                    # Les fichiers ont pu changer depuis l'analyse: stat d'abord, relecture si modifié
+                    if not (self.finder.revalidate(action['keep'], action['keep_expect'], action['fingerprint']) and
+                            self.finder.revalidate(file_path, action['expect'], action['fingerprint'])):
+                        print(f"  ⏭️  Modifié depuis l'analyse, ignoré: {file_path.name}")
+                        continue
                     
-                    # Supprimer l'original
-                    file_path.unlink()
+                    if consolidate:
+                        # Le chemin reste valide: il pointe désormais sur les données du fichier gardé
+                        if not self.linker.consolidate(action['keep'], file_path):
+                            print(f"  ⚠️  Consolidation impossible: {file_path.name}")
+                            continue
+                    else:
+                        # Déplacer dans la sauvegarde (rename si même périphérique)
+                        self.backups.backup_and_remove(file_path)
                     
                 executed += 1
                 space_saved += action['space_saving']
                 
         print(f"\n✅ OPTIMISATION TERMINÉE:")
-        print(f"  🗑️  Fichiers supprimés: {executed}")
+        if consolidate:
+            print(f"  🔗 Fichiers consolidés: {executed}")
+        else:
+            print(f"  🗑️  Fichiers supprimés: {executed}")
         print(f"  💾 Espace libéré: {self.format_size(space_saved)}")
         
         if not self.simulation_mode:
-            print(f"  🔒 Sauvegarde: {self.backup_dir}")
+            clear_snapshots()  # Instantanés partagés périmés après les modifications
+            self.finder.print_revalidation()
+            if consolidate:
+                self.linker.print_stats()
+            else:
+                self.backups.print_stats()
             
     def format_size(self, size_bytes):
         """Formate une taille en bytes"""
@@ -464,17 +509,22 @@ class CompleteOptimizer:
         return f"{size_bytes:.1f} TB"
 
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python3 complete_optimizer.py <directory>")
+    args = [arg for arg in sys.argv[1:] if arg != '--consolidate']
+    if len(args) != 1:
+        print("Usage: python3 complete_optimizer.py <directory> [--consolidate]")
         print("Example: python3 complete_optimizer.py ~/Pictures")
+        print("  --consolidate: remplacer les doublons par des reflinks/liens physiques au lieu de les supprimer")
+        print("                 (lien physique: le doublon prend le mode, le propriétaire et les dates du fichier gardé)")
         sys.exit(1)
         
-    target = sys.argv[1]
+    target = args[0]
     if not os.path.exists(target):
         print(f"❌ Directory not found: {target}")
         sys.exit(1)
         
     optimizer = CompleteOptimizer(target)
+    if '--consolidate' in sys.argv[1:]:
+        optimizer.duplicate_action = 'consolidate'
     
     print("🔒 MODE SIMULATION ACTIVÉ (aucune suppression)")
     print("   Pour exécuter réellement: modifier simulation_mode = False")
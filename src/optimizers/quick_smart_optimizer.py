@@ -5,14 +5,24 @@ Analyse intelligente: logique, contenu, date, taille pour garder le meilleur
 """
 
 import os
-import hashlib
 from pathlib import Path
 from datetime import datetime
 from collections import defaultdict
+from array import array
 import json
 import sys
+import shlex
 import mimetypes
 
+# Ajouter le répertoire parent pour les imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.duplicate_finder import DuplicateFinder
+from utils.parallel_scanner import ParallelScanner
+from utils.ignore_rules import IgnoreRules
+from utils.action_executor import write_plan
+from utils.file_table import FileTable
+
 class QuickSmartOptimizer:
     def __init__(self, target_path):
         self.target_path = Path(target_path)
@@ -23,43 +33,49 @@ class QuickSmartOptimizer:
             'space_saved': 0,
             'groups_found': 0
         }
+        self.finder = DuplicateFinder()
+        # Index de regroupement, seule mémoire proportionnelle au nombre de fichiers
+        self.files = FileTable()                                  # Une ligne par fichier, colonnes typées
+        self.by_clean_name = defaultdict(lambda: array('I'))     # (nom normalisé, type) → lignes
+        self.by_type_size = defaultdict(lambda: array('I'))      # (type, tranche de taille) → lignes
+        self.bulk_names = defaultdict(set)                        # (type, tranche de taille) → noms normalisés
+        self.type_counts = defaultdict(int)
+        self.duplicates_seen = 0
+        self.progress_every = 10000
         
     def log(self, message):
         print(f"[{datetime.now().strftime('%H:%M:%S')}] {message}")
         
-    def quick_analyze(self, filepath):
-        """Analyse rapide et efficace"""
-        try:
-            stat = filepath.stat()
-            
-            # Info de base
-            info = {
-                'path': str(filepath),
-                'name': filepath.name,
-                'stem': filepath.stem,
-                'extension': filepath.suffix.lower(),
-                'size': stat.st_size,
-                'modified': stat.st_mtime,
-                'created': stat.st_ctime,
-                'quality_score': 0
-            }
-            
-            # Type de fichier
-            info['file_type'] = self.detect_type(filepath)
-            
-            # Hash pour petits fichiers seulement
-            if stat.st_size < 10 * 1024 * 1024:  # < 10MB
-                info['hash'] = self.quick_hash(filepath)
-            
-            # Score intelligent
-            info['quality_score'] = self.smart_score(info)
-            
-            self.stats['files_analyzed'] += 1
-            return info
-            
-        except Exception as e:
-            self.log(f"❌ Erreur {filepath}: {e}")
-            return None
+    def describe(self, filepath, size, modified, created, score=None):
+        """Fiche complète d'un fichier (score recalculé s'il n'est pas fourni)"""
+        filepath = Path(filepath)
+        
+        # Info de base
+        info = {
+            'path': str(filepath),
+            'name': filepath.name,
+            'stem': filepath.stem,
+            'extension': filepath.suffix.lower(),
+            'size': size,
+            'modified': modified,
+            'created': created,
+            'quality_score': 0
+        }
+        
+        # Type de fichier
+        info['file_type'] = self.detect_type(filepath)
+        
+        # Score intelligent
+        info['quality_score'] = self.smart_score(info) if score is None else score
+        return info
+        
+    def record(self, row):
+        """Fiche d'une ligne de la table, pour le rapport et le script"""
+        table = self.files
+        info = self.describe(table.path(row), table.size[row], table.mtime(row), table.ctime[row],
+                             score=table.score[row])
+        info['expect'] = table.stat_fingerprint(row)  # Relevé du parcours, revérifié avant d'agir
+        return info
             
     def detect_type(self, filepath):
         """Détection rapide du type"""
@@ -76,19 +92,6 @@ class QuickSmartOptimizer:
         else:
             return 'other'
             
-    def quick_hash(self, filepath):
-        """Hash rapide des premiers et derniers Ko"""
-        try:
-            with open(filepath, 'rb') as f:
-                # Lire début et fin pour hash rapide
-                start = f.read(1024)
-                f.seek(-min(1024, filepath.stat().st_size), 2)
-                end = f.read(1024)
-                
-            return hashlib.md5(start + end).hexdigest()[:12]
-        except:
-            return None
-            
     def smart_score(self, info):
         """Score intelligent basé sur logique métier"""
         score = 0
@@ -187,74 +190,93 @@ class QuickSmartOptimizer:
         
         return min(100, max(0, score))
         
-    def find_optimization_groups(self, files):
-        """Groupement intelligent pour optimisation"""
-        groups = []
-        
-        # 1. DOUBLONS EXACTS (même hash)
-        by_hash = defaultdict(list)
-        for file_info in files:
-            if file_info.get('hash'):
-                by_hash[file_info['hash']].append(file_info)
+    def analyzed(self, files):
+        """
+        Étape d'analyse du flux: indexe chaque fichier pour le regroupement
+
+        Produit les mêmes (chemin, stat) pour l'étape de hachage. La fiche de
+        chaque fichier est réduite à une ligne de la table (type et score
+        compris); seules les clés de regroupement sont conservées en plus.
+        """
+        for filepath, stat in files:
+            if stat.st_size <= 0:
+                continue
+                
+            info = self.describe(filepath, stat.st_size, stat.st_mtime, stat.st_ctime)
+            file_type = info['file_type']
+            clean_name = self.normalize_filename(info['stem'])
+            bracket = (file_type, self.get_size_bracket(stat.st_size))
+            
+            row = self.files.add(filepath, stat, kind=file_type, score=info['quality_score'])
+            if len(clean_name) > 3:  # Ignorer noms trop courts
+                self.by_clean_name[(clean_name, file_type)].append(row)
+            self.by_type_size[bracket].append(row)
+            self.bulk_names[bracket].add(clean_name)
+            self.type_counts[file_type] += 1
+            self.stats['files_analyzed'] += 1
+            
+            if self.stats['files_analyzed'] % self.progress_every == 0:
+                self.log(f"  📄 {self.stats['files_analyzed']:,} fichiers, "
+                         f"{self.duplicates_seen:,} doublons confirmés")
+            yield filepath, stat
+            
+    def duplicate_found(self, path, original):
+        """Rappel du hachage: un doublon est confirmé pendant le parcours"""
+        self.duplicates_seen += 1
+        if self.duplicates_seen <= 10:
+            self.log(f"  🔁 {Path(path).name} = {Path(original).name}")
+            
+    def optimization_groups(self, exact_groups):
+        """Groupement intelligent pour optimisation (générateur de groupes de lignes)"""
+        grouped = bytearray(len(self.files))   # 1 si la ligne est déjà dans un groupe
+        
+        # 1. DOUBLONS EXACTS (taille → empreinte → contenu complet vérifié)
+        rows_by_path = self.files.rows_of(path for group in exact_groups.values() for path in group['files'])
+        for file_hash, group in exact_groups.items():
+            hash_rows = [rows_by_path[str(path)] for path in group['files'] if str(path) in rows_by_path]
                 
-        for hash_files in by_hash.values():
-            if len(hash_files) > 1:
-                groups.append({
+            if len(hash_rows) > 1:
+                for row in hash_rows:
+                    grouped[row] = 1
+                yield {
                     'type': 'exact_duplicate',
                     'reason': 'Contenu identique',
-                    'files': hash_files,
+                    'rows': hash_rows,
+                    'hash': str(file_hash),  # Sérialisé tel quel dans report.json
                     'confidence': 100
-                })
+                }
         
-        # 2. NOMS SIMILAIRES + MÊME TYPE
-        by_clean_name = defaultdict(list)
-        for file_info in files:
-            clean_name = self.normalize_filename(file_info['stem'])
-            if len(clean_name) > 3:  # Ignorer noms trop courts
-                key = (clean_name, file_info['file_type'])
-                by_clean_name[key].append(file_info)
-                
-        for (clean_name, ftype), name_files in by_clean_name.items():
-            if len(name_files) > 1:
-                # Exclure déjà traités dans doublons exacts
-                non_exact = [f for f in name_files 
-                           if not any(f in g['files'] for g in groups 
-                                    if g['type'] == 'exact_duplicate')]
+        # 2. NOMS SIMILAIRES + MÊME TYPE (hors doublons exacts)
+        for (clean_name, ftype), rows in self.by_clean_name.items():
+            if len(rows) > 1:
+                non_exact = [row for row in rows if not grouped[row]]
                 
                 if len(non_exact) > 1:
-                    groups.append({
+                    for row in non_exact:
+                        grouped[row] = 1
+                    yield {
                         'type': 'name_similar',
                         'reason': f'Nom similaire "{clean_name}" ({ftype})',
-                        'files': non_exact,
+                        'rows': non_exact,
                         'confidence': 85
-                    })
+                    }
         
         # 3. LOTS DE MÊME TYPE + TAILLE SIMILAIRE
-        by_type_size = defaultdict(list)
-        for file_info in files:
-            size_bracket = self.get_size_bracket(file_info['size'])
-            key = (file_info['file_type'], size_bracket)
-            by_type_size[key].append(file_info)
-            
-        for (ftype, size_bracket), type_files in by_type_size.items():
-            if len(type_files) > 4:  # Au moins 5 fichiers
+        for (ftype, size_bracket), rows in self.by_type_size.items():
+            if len(rows) > 4:  # Au moins 5 fichiers
                 # Vérifier si beaucoup de noms similaires
-                clean_names = [self.normalize_filename(f['stem']) for f in type_files]
-                unique_names = set(clean_names)
+                unique_names = self.bulk_names[(ftype, size_bracket)]
                 
-                if len(unique_names) <= len(type_files) * 0.6:  # 60% de noms différents max
-                    non_processed = [f for f in type_files
-                                   if not any(f in g['files'] for g in groups)]
+                if len(unique_names) <= len(rows) * 0.6:  # 60% de noms différents max
+                    non_processed = [row for row in rows if not grouped[row]]
                     
                     if len(non_processed) > 3:
-                        groups.append({
+                        yield {
                             'type': 'bulk_similar',
                             'reason': f'Lot {ftype} taille {size_bracket}',
-                            'files': non_processed,
+                            'rows': non_processed,
                             'confidence': 65
-                        })
-        
-        return groups
+                        }
         
     def normalize_filename(self, filename):
         """Normalise le nom pour détecter les similarités"""
@@ -296,34 +318,37 @@ class QuickSmartOptimizer:
         else:
             return 'huge'
             
-    def select_best_from_group(self, files):
-        """Sélectionne le meilleur fichier intelligemment"""
-        if len(files) <= 1:
-            return files[0] if files else None, []
+    def select_best_from_group(self, rows):
+        """Sélectionne le meilleur fichier intelligemment (lignes de la table)"""
+        if len(rows) <= 1:
+            return rows[0] if rows else None, []
             
-        # Tri multi-critères intelligent
-        def sort_key(f):
+        table = self.files
+        
+        # Tri multi-critères intelligent, directement sur les colonnes
+        def sort_key(row):
             return (
-                f['quality_score'],           # Score principal
-                f['size'],                    # Taille (plus gros = potentiellement meilleur)
-                f['modified'],                # Plus récent
-                len(f['name'])                # Nom plus descriptif
+                table.score[row],             # Score principal
+                table.size[row],              # Taille (plus gros = potentiellement meilleur)
+                table.mtime_ns[row],          # Plus récent
+                len(table.name(row))          # Nom plus descriptif
             )
             
-        sorted_files = sorted(files, key=sort_key, reverse=True)
+        sorted_rows = sorted(rows, key=sort_key, reverse=True)
         
         # Protection: ne pas supprimer fichier très récent même si score plus bas
-        best = sorted_files[0]
-        candidates = sorted_files[1:]
+        best = sorted_rows[0]
+        candidates = sorted_rows[1:]
+        now = datetime.now().timestamp()
         
         final_to_remove = []
         for candidate in candidates:
             # Protection fichier de moins de 24h
-            hours_old = (datetime.now().timestamp() - candidate['modified']) / 3600
-            score_diff = best['quality_score'] - candidate['quality_score']
+            hours_old = (now - table.mtime(candidate)) / 3600
+            score_diff = table.score[best] - table.score[candidate]
             
             if hours_old < 24 and score_diff < 15:
-                self.log(f"⚠️  Protection fichier récent: {candidate['name']}")
+                self.log(f"⚠️  Protection fichier récent: {table.name(candidate)}")
                 continue
                 
             final_to_remove.append(candidate)
@@ -338,117 +363,162 @@ class QuickSmartOptimizer:
             self.log(f"❌ Répertoire inexistant: {self.target_path}")
             return
             
-        # Scanner rapidement
-        all_files = []
+        # Flux: parcours → analyse → hachage, chaque étape consomme la précédente à mesure
         self.log("📊 Analyse des fichiers...")
         
-        for filepath in self.target_path.rglob('*'):
-            if (filepath.is_file() and 
-                not filepath.name.startswith('.') and
-                filepath.stat().st_size > 0):
-                
-                file_info = self.quick_analyze(filepath)
-                if file_info:
-                    all_files.append(file_info)
-                    
-        self.log(f"📈 {len(all_files)} fichiers analysés")
+        # Fichiers et dossiers cachés (.git, .venv...) jamais proposés
+        rules = IgnoreRules(['.*'], root=self.target_path)
         
-        # Grouper par type pour optimisation ciblée
-        files_by_type = defaultdict(list)
-        for file_info in all_files:
-            files_by_type[file_info['file_type']].append(file_info)
+        # Un seul stat par fichier, relevé pendant le listage; file du parcours bornée,
+        # lectures en cours bornées: un hachage en retard ralentit le parcours
+        scanned = ParallelScanner().files(self.target_path, prune=rules.prune, keep=rules.keep_files)
+        exact_groups = self.finder.stream_duplicates(self.analyzed(scanned), on_duplicate=self.duplicate_found)
+                    
+        self.log(f"📈 {self.stats['files_analyzed']} fichiers analysés")
+        self.finder.print_stats()
             
         # Statistiques par type
-        for ftype, files in files_by_type.items():
-            self.log(f"  {ftype}: {len(files)} fichiers")
+        for ftype, count in self.type_counts.items():
+            self.log(f"  {ftype}: {count} fichiers")
             
         # Trouver les groupes d'optimisation
         self.log("🔍 Recherche des optimisations...")
-        all_groups = self.find_optimization_groups(all_files)
         
-        optimization_plan = []
-        for group in all_groups:
-            best, to_remove = self.select_best_from_group(group['files'])
+        # Générer les résultats (groupes → plan → fichiers, sans liste intermédiaire)
+        self.save_optimization_plan(self.optimization_plan(self.optimization_groups(exact_groups)))
+        
+    def optimization_plan(self, groups):
+        """Étape de planification: choix du meilleur fichier de chaque groupe"""
+        for group in groups:
+            best, to_remove = self.select_best_from_group(group['rows'])
             if to_remove:
-                space_saved = sum(f['size'] for f in to_remove)
+                space_saved = sum(self.files.size[row] for row in to_remove)
                 self.stats['space_saved'] += space_saved
                 self.stats['duplicates_found'] += len(to_remove)
                 self.stats['groups_found'] += 1
                 
-                optimization_plan.append({
+                # Fiches complètes seulement pour les fichiers retenus dans le plan
+                best_info = self.record(best)
+                remove = [self.record(row) for row in to_remove]
+                if 'hash' in group:
+                    for file_info in [best_info] + remove:
+                        file_info['hash'] = group['hash']
+                
+                yield {
                     'type': group['type'],
                     'reason': group['reason'],
                     'confidence': group['confidence'],
-                    'best': best,
-                    'remove': to_remove,
+                    'best': best_info,
+                    'remove': remove,
                     'space_saved': space_saved
-                })
-        
-        # Générer les résultats
-        self.save_optimization_plan(optimization_plan)
+                }
+        
+    def write_script_group(self, f, number, item, commented):
+        """Écrit un groupe dans le script de nettoyage"""
+        prefix = "# " if commented else ""
+        title_line = f"Groupe {number}: {item['reason']} (Confiance: {item['confidence']}%)"
+        keep_line = f"  ✅ GARDER: {item['best']['name']} (Score: {item['best']['quality_score']})"
+        f.write(f"echo {shlex.quote(title_line)}\n")
+        f.write(f"echo {shlex.quote(keep_line)}\n")
+        f.write(f"echo \"  💾 Économie: {item['space_saved']:,} bytes\"\n")
+        
+        for file_info in item['remove']:
+            rel_path = Path(file_info['path']).relative_to(self.target_path)
+            source = shlex.quote(str(file_info['path']))
+            backup = shlex.quote(str(rel_path))
+            remove_line = f"    ❌ Supprimer: {file_info['name']} (Score: {file_info['quality_score']})"
+            f.write(f"echo {shlex.quote(remove_line)}\n")
+            f.write(f"{prefix}mkdir -p \"$BACKUP_DIR/$(dirname {backup})\"\n")
+            f.write(f"{prefix}cp {source} \"$BACKUP_DIR\"/{backup}\n")
+            f.write(f"{prefix}rm {source}\n")
+        f.write("echo\n")
         
     def save_optimization_plan(self, plan):
-        """Sauvegarde le plan d'optimisation"""
+        """
+        Sauvegarde le plan d'optimisation
+
+        plan est consommé une seule fois: chaque groupe est écrit dans le script,
+        le rapport et le plan exécutable dès qu'il arrive, puis oublié. Les groupes
+        arrivent par confiance décroissante (exacts, noms, lots), l'ordre des
+        sections du script.
+        """
         self.output_path.mkdir(exist_ok=True)
         
-        # Script de nettoyage
+        sections = [
+            ("HAUTE CONFIANCE (90%+)", False),
+            ("CONFIANCE MOYENNE (70-89%)", True),
+            ("FAIBLE CONFIANCE (<70%)", True)
+        ]
+        counts = [0, 0, 0]   # Groupes par section
+        
+        # Script de nettoyage (export pour relecture, le plan exécutable est la voie recommandée)
         script_path = self.output_path / "smart_cleanup.sh"
-        with open(script_path, 'w') as f:
-            f.write("#!/bin/bash\n")
-            f.write("# Smart Cleanup - Généré automatiquement\n")
-            f.write("# LOGIQUE: Contenu + Date + Qualité + Taille\n\n")
+        with open(script_path, 'w') as script, open(self.output_path / "report.json", 'w') as report:
+            script.write("#!/bin/bash\n")
+            script.write("# Smart Cleanup - Généré automatiquement\n")
+            script.write("# LOGIQUE: Contenu + Date + Qualité + Taille\n\n")
             
-            f.write(f"BACKUP_DIR='{self.output_path}/backup'\n")
-            f.write("mkdir -p \"$BACKUP_DIR\"\n\n")
+            script.write(f"BACKUP_DIR={shlex.quote(str(self.output_path / 'backup'))}\n")
+            script.write("mkdir -p \"$BACKUP_DIR\"\n\n")
             
-            # Grouper par confiance
-            high_conf = [p for p in plan if p['confidence'] >= 90]
-            med_conf = [p for p in plan if 70 <= p['confidence'] < 90]
-            low_conf = [p for p in plan if p['confidence'] < 70]
+            # Rapport JSON écrit au fil de l'eau, statistiques et résumé à la fin
+            head = json.dumps({
+                'timestamp': datetime.now().isoformat(),
+                'target_directory': str(self.target_path)
+            }, indent=2)
+            report.write(head[:-2] + ',\n  "optimization_plan": [')
             
-            sections = [
-                ("HAUTE CONFIANCE (90%+)", high_conf, False),
-                ("CONFIANCE MOYENNE (70-89%)", med_conf, True),
-                ("FAIBLE CONFIANCE (<70%)", low_conf, True)
-            ]
+            current = -1   # Section ouverte dans le script
             
-            for title, section_plan, commented in sections:
-                f.write(f"echo \"=== {title} ===\"\n")
-                prefix = "# " if commented else ""
-                
-                for i, item in enumerate(section_plan, 1):
-                    f.write(f"echo \"Groupe {i}: {item['reason']} (Confiance: {item['confidence']}%)\"\n")
-                    f.write(f"echo \"  ✅ GARDER: {item['best']['name']} (Score: {item['best']['quality_score']})\"\n")
-                    f.write(f"echo \"  💾 Économie: {item['space_saved']:,} bytes\"\n")
+            def open_section(section):
+                nonlocal current
+                while current < section:   # Sections vides comprises, comme avant
+                    if current >= 0:
+                        script.write("\n")
+                    current += 1
+                    script.write(f"echo \"=== {sections[current][0]} ===\"\n")
+            
+            def actions():
+                # Plan exécutable: seules les suppressions à haute confiance, comme dans le script
+                for item in plan:
+                    section = 0 if item['confidence'] >= 90 else 1 if item['confidence'] >= 70 else 2
+                    open_section(section)
+                    counts[section] += 1
+                    self.write_script_group(script, counts[section], item, sections[current][1])
+                    
+                    report.write((",\n" if sum(counts) > 1 else "\n") + json.dumps(item, indent=2, default=str))
                     
-                    for file_info in item['remove']:
-                        rel_path = Path(file_info['path']).relative_to(self.target_path)
-                        f.write(f"echo \"    ❌ Supprimer: {file_info['name']} (Score: {file_info['quality_score']})\"\n")
-                        f.write(f"{prefix}mkdir -p \"$BACKUP_DIR/$(dirname '{rel_path}')\"\n")
-                        f.write(f"{prefix}cp \"{file_info['path']}\" \"$BACKUP_DIR/{rel_path}\"\n")
-                        f.write(f"{prefix}rm \"{file_info['path']}\"\n")
-                    f.write("echo\n")
-                f.write("\n")
+                    # Uniquement les groupes au contenu vérifié: l'exécuteur revérifie la
+                    # copie conservée et l'empreinte complète avant chaque suppression
+                    if section == 0 and 'hash' in item['best']:
+                        keeper = item['best']
+                        for file_info in item['remove']:
+                            yield {'op': 'delete', 'path': file_info['path'], 'expect': file_info['expect'],
+                                   'keep': keeper['path'], 'keep_expect': keeper['expect'],
+                                   'digest': file_info['hash']}
+            
+            plan_path = write_plan(
+                self.output_path / "plan.json",
+                actions(),
+                description=f"Quick Smart Optimizer: {self.target_path}"
+            )
+            
+            open_section(len(sections) - 1)
+            script.write("\n")
+            
+            tail = json.dumps({
+                'statistics': self.stats,
+                'summary': {
+                    'high_confidence_groups': counts[0],
+                    'medium_confidence_groups': counts[1],
+                    'low_confidence_groups': counts[2],
+                    'total_space_gb': self.stats['space_saved'] / (1024**3)
+                }
+            }, indent=2, default=str)
+            report.write("\n  ]," + tail[1:])
                 
         os.chmod(script_path, 0o755)
         
-        # Rapport JSON
-        report_data = {
-            'timestamp': datetime.now().isoformat(),
-            'target_directory': str(self.target_path),
-            'statistics': self.stats,
-            'optimization_plan': plan,
-            'summary': {
-                'high_confidence_groups': len([p for p in plan if p['confidence'] >= 90]),
-                'medium_confidence_groups': len([p for p in plan if 70 <= p['confidence'] < 90]),
-                'low_confidence_groups': len([p for p in plan if p['confidence'] < 70]),
-                'total_space_gb': self.stats['space_saved'] / (1024**3)
-            }
-        }
-        
-        with open(self.output_path / "report.json", 'w') as f:
-            json.dump(report_data, f, indent=2, default=str)
-            
         # Résumé lisible
         with open(self.output_path / "summary.txt", 'w') as f:
             f.write("QUICK SMART OPTIMIZER - RÉSUMÉ\n")
@@ -460,9 +530,9 @@ class QuickSmartOptimizer:
             f.write(f"Espace récupérable: {self.stats['space_saved']/(1024**3):.2f} GB\n\n")
             
             f.write("RÉPARTITION PAR CONFIANCE:\n")
-            f.write(f"  Haute (90%+): {len([p for p in plan if p['confidence'] >= 90])} groupes\n")
-            f.write(f"  Moyenne (70-89%): {len([p for p in plan if 70 <= p['confidence'] < 90])} groupes\n")
-            f.write(f"  Faible (<70%): {len([p for p in plan if p['confidence'] < 70])} groupes\n\n")
+            f.write(f"  Haute (90%+): {counts[0]} groupes\n")
+            f.write(f"  Moyenne (70-89%): {counts[1]} groupes\n")
+            f.write(f"  Faible (<70%): {counts[2]} groupes\n\n")
             
             f.write("CRITÈRES D'OPTIMISATION:\n")
             f.write("✓ Fraîcheur des fichiers (35%)\n")
@@ -476,7 +546,8 @@ class QuickSmartOptimizer:
         self.log(f"📊 {self.stats['files_analyzed']:,} fichiers → {self.stats['groups_found']} groupes optimisés")
         self.log(f"💾 {self.stats['space_saved']/(1024**3):.2f} GB récupérables")
         self.log(f"📁 Résultats: {self.output_path}")
-        self.log(f"🚀 Script: {script_path}")
+        self.log(f"🚀 Plan: {plan_path}")
+        self.log(f"📜 Export shell: {script_path}")
         
         print(f"\n{'='*60}")
         print("🎯 OPTIMISATION INTELLIGENTE TERMINÉE!")
@@ -486,7 +557,10 @@ class QuickSmartOptimizer:
         print(f"   • {self.stats['duplicates_found']} fichiers redondants")
         print(f"   • {self.stats['space_saved']/(1024**3):.2f} GB récupérables")
         print(f"📁 Résultats: {self.output_path}")
-        print("⚠️  Vérifiez smart_cleanup.sh avant exécution!")
+        print("⚠️  Vérifiez le plan avant exécution!")
+        print(f"   Aperçu:    python3 src/utils/action_executor.py {shlex.quote(str(plan_path))} --dry-run")
+        print(f"   Exécution: python3 src/utils/action_executor.py {shlex.quote(str(plan_path))}")
+        print(f"   Annulation: python3 src/utils/action_executor.py {shlex.quote(str(plan_path))} --rollback")
         print("="*60)
 
 def main():
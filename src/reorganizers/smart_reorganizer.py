@@ -11,13 +11,27 @@ from datetime import datetime
 from collections import defaultdict
 import json
 import sys
+import shlex
 import mimetypes
 import re
 
+# Ajouter le répertoire parent pour les imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.parallel_scanner import ParallelScanner
+from utils.action_executor import write_plan
+from utils.path_index import PathIndex
+from utils.ignore_rules import IgnoreRules
+
 class SmartReorganizer:
     def __init__(self, target_path):
         self.target_path = Path(target_path)
         self.proposed_structure = self.define_smart_structure()
+        # Structures projet connues: leurs fichiers sont déjà organisés
+        self.organized_rules = IgnoreRules([
+            '.git/', 'node_modules/', '__pycache__/', '.venv/', 'venv/',
+            'src/', 'lib/', 'build/', 'dist/', 'output/'
+        ], root=self.target_path)
         self.analysis_results = {
             'orphan_files': [],
             'safe_moves': [],
@@ -130,8 +144,8 @@ class SmartReorganizer:
         existing_structure = set()
         protected_paths = set()
         
-        # Scanner la structure existante
-        for root, dirs, files in os.walk(self.target_path):
+        # Scanner la structure existante (listages en parallèle)
+        for root, dirs, files in ParallelScanner().scan(self.target_path):
             rel_path = Path(root).relative_to(self.target_path)
             existing_structure.add(str(rel_path))
             
@@ -141,6 +155,8 @@ class SmartReorganizer:
                 
         self.existing_structure = existing_structure
         self.protected_paths = protected_paths
+        # La racine est la destination de toute réorganisation: elle n'est jamais une zone protégée
+        self.protected_index = PathIndex((path, path) for path in protected_paths if path != '.')
         
         self.log(f"📊 {len(existing_structure)} dossiers existants")
         self.log(f"🔒 {len(protected_paths)} dossiers protégés")
@@ -161,30 +177,33 @@ class SmartReorganizer:
         for dir_name in shallow_dirs:
             dir_path = self.target_path / dir_name
             if dir_path.exists():
-                for item in dir_path.rglob('*'):
-                    if (item.is_file() and 
-                        not item.name.startswith('.') and
-                        not self.is_in_organized_structure(item)):
-                        orphans.append(item)
+                # Structures organisées élaguées: on n'y descend jamais
+                for root, dirs, files in ParallelScanner().scan(dir_path, prune=self.prune_organized):
+                    for name in files:
+                        item = Path(root) / name
+                        if (not name.startswith('.') and
+                            item.is_file() and
+                            not self.is_in_organized_structure(item)):
+                            orphans.append(item)
                         
         self.analysis_results['orphan_files'] = orphans
         self.analysis_results['stats']['orphans_found'] = len(orphans)
         
         self.log(f"📄 {len(orphans)} fichiers isolés détectés")
         
+    def prune_organized(self, root, dirs, files):
+        """Élagage du parcours: structures projet et dossiers trop profonds"""
+        # Les fichiers des sous-dossiers du 3e niveau ont plus de 3 composants: déjà organisés
+        if len(Path(root).relative_to(self.target_path).parts) >= 2:
+            dirs.clear()
+        else:
+            self.organized_rules.prune(root, dirs)
+            
     def is_in_organized_structure(self, filepath):
         """Vérifie si le fichier est déjà dans une structure organisée"""
-        path_parts = filepath.parts
-        
         # Ignorer les fichiers dans des structures projet connues
-        organized_indicators = [
-            '.git', 'node_modules', '__pycache__', '.venv', 'venv',
-            'src', 'lib', 'build', 'dist', 'output'
-        ]
-        
-        for part in path_parts:
-            if part in organized_indicators:
-                return True
+        if self.organized_rules.ignored_within(filepath, is_dir=False):
+            return True
                 
         # Ignorer les fichiers dans des dossiers profonds (probablement organisés)
         relative_to_target = filepath.relative_to(self.target_path)
@@ -432,14 +451,14 @@ class SmartReorganizer:
                 conflict_info['suggested_resolution'] = 'rename_source'
                 
         # 2. Chemin dans une zone protégée
+        # Comparaison par composants: « Photos » ne protège pas « Photos2 »
         dest_relative = destination_path.relative_to(self.target_path)
-        for protected in self.protected_paths:
-            if str(dest_relative).startswith(protected):
-                if not conflict_info['has_conflict']:  # Ne pas écraser un conflit plus important
-                    conflict_info['has_conflict'] = True
-                    conflict_info['type'] = 'protected_path'
-                    conflict_info['description'] = f"Zone protégée: {protected}"
-                    conflict_info['suggested_resolution'] = 'find_alternative'
+        protected = self.protected_index.containing(dest_relative)
+        if protected and not conflict_info['has_conflict']:  # Ne pas écraser un conflit plus important
+            conflict_info['has_conflict'] = True
+            conflict_info['type'] = 'protected_path'
+            conflict_info['description'] = f"Zone protégée: {protected[0]}"
+            conflict_info['suggested_resolution'] = 'find_alternative'
                     
         return conflict_info
         
@@ -448,7 +467,15 @@ class SmartReorganizer:
         output_dir = self.target_path / f"REORGANIZATION_PLAN_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         output_dir.mkdir(exist_ok=True)
         
-        # Script de réorganisation
+        # Plan exécutable: uniquement les déplacements sûrs
+        plan_path = write_plan(
+            output_dir / "plan.json",
+            [{'op': 'move', 'path': move['source'], 'destination': move['destination']}
+             for move in self.analysis_results['safe_moves']],
+            description=f"Smart Reorganizer: {self.target_path}"
+        )
+        
+        # Script de réorganisation (export pour relecture)
         script_path = output_dir / "reorganize.sh"
         with open(script_path, 'w') as f:
             f.write("#!/bin/bash\n")
@@ -456,16 +483,17 @@ class SmartReorganizer:
             f.write("# Réorganisation intelligente sans casser l'existant\n\n")
             
             f.write("set -e\n")
-            f.write(f"BACKUP_DIR='{output_dir}/backup'\n")
+            f.write(f"BACKUP_DIR={shlex.quote(str(output_dir / 'backup'))}\n")
             f.write("mkdir -p \"$BACKUP_DIR\"\n\n")
             
             # Section des déplacements sûrs
             f.write("echo \"=== DÉPLACEMENTS SÛRS ===\"\n")
             for move in self.analysis_results['safe_moves']:
                 dest_dir = Path(move['destination']).parent
-                f.write(f"echo \"Déplacement: {Path(move['source']).name} → {move['destination_dir']}\"\n")
-                f.write(f"mkdir -p \"{dest_dir}\"\n")
-                f.write(f"mv \"{move['source']}\" \"{move['destination']}\"\n\n")
+                message = f"Déplacement: {Path(move['source']).name} → {move['destination_dir']}"
+                f.write(f"echo {shlex.quote(message)}\n")
+                f.write(f"mkdir -p {shlex.quote(str(dest_dir))}\n")
+                f.write(f"mv -n {shlex.quote(move['source'])} {shlex.quote(move['destination'])}\n\n")
                 
             # Section des conflits avec résolutions
             if self.analysis_results['conflicts']:
@@ -481,11 +509,11 @@ class SmartReorganizer:
                         extension = Path(conflict['source']).suffix
                         new_name = f"{base_name}_moved_{datetime.now().strftime('%Y%m%d')}{extension}"
                         dest_dir = Path(conflict['destination']).parent
-                        f.write(f"# mkdir -p \"{dest_dir}\"\n")
-                        f.write(f"# mv \"{conflict['source']}\" \"{dest_dir}/{new_name}\"\n")
+                        f.write(f"# mkdir -p {shlex.quote(str(dest_dir))}\n")
+                        f.write(f"# mv {shlex.quote(conflict['source'])} {shlex.quote(str(dest_dir / new_name))}\n")
                     elif conflict['conflict']['suggested_resolution'] == 'replace_with_source':
-                        f.write(f"# cp \"{conflict['destination']}\" \"$BACKUP_DIR/\"\n")
-                        f.write(f"# mv \"{conflict['source']}\" \"{conflict['destination']}\"\n")
+                        f.write(f"# cp {shlex.quote(conflict['destination'])} \"$BACKUP_DIR/\"\n")
+                        f.write(f"# mv {shlex.quote(conflict['source'])} {shlex.quote(conflict['destination'])}\n")
                     
                     f.write("echo\n")
                     
@@ -544,9 +572,11 @@ class SmartReorganizer:
             f.write("✓ Zones protégées respectées\n\n")
             
             f.write("EXÉCUTION:\n")
-            f.write(f"1. Vérifiez le plan: {script_path}\n")
+            f.write(f"1. Vérifiez le plan: python3 src/utils/action_executor.py {shlex.quote(str(plan_path))} --dry-run\n")
             f.write("2. Résolvez les conflits manuellement\n")
-            f.write("3. Exécutez: bash reorganize.sh\n")
+            f.write(f"3. Exécutez: python3 src/utils/action_executor.py {shlex.quote(str(plan_path))}\n")
+            f.write("   (reprise automatique après interruption, --rollback pour annuler)\n")
+            f.write(f"   Export shell équivalent: {script_path}\n")
             
         self.log(f"📋 Plan généré: {output_dir}")
         return output_dir
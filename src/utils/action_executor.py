@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Action Executor - Application transactionnelle d'un plan d'actions
+Journal d'écriture anticipée, reprise après interruption et annulation, sans script shell
+"""
+
+import os
+import sys
+import json
+import time
+import errno
+import shutil
+from pathlib import Path
+
+# Ajouter le répertoire parent pour les imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.backup_manager import BackupManager
+from utils.duplicate_finder import DuplicateFinder
+from utils.fingerprint import Fingerprint, stat_fingerprint
+
+PLAN_VERSION = 1
+
+def write_plan(plan_path, actions, description=None):
+    """
+    Écrit un plan exécutable
+
+    Args:
+        plan_path: fichier JSON à créer
+        actions: itérable de dicts {'op': 'delete'|'move', 'path': ..., 'destination': ...};
+            l'empreinte stat 'expect' est relevée maintenant si elle n'est pas fournie.
+            Une suppression porte aussi 'keep' (la copie conservée) et 'digest'
+            (str(Fingerprint) complète du contenu commun), revérifiés avant d'agir.
+            Les actions sont écrites au fil de l'eau: un générateur n'est jamais matérialisé
+    """
+    header = {
+        'version': PLAN_VERSION,
+        'created': time.time(),
+        'description': description
+    }
+    plan_path = Path(plan_path)
+    temp = plan_path.with_name(plan_path.name + '.tmp')
+    with open(temp, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(header, ensure_ascii=False)[:-1] + ', "actions": [')
+        count = 0
+        for action in actions:
+            entry = dict(action)
+            entry['id'] = count
+            entry['path'] = str(entry['path'])
+            for key in ('destination', 'keep', 'digest'):
+                if entry.get(key) is not None:
+                    entry[key] = str(entry[key])
+            if 'expect' not in entry:
+                try:
+                    entry['expect'] = stat_fingerprint(entry['path'])
+                except OSError:
+                    continue  # Déjà disparu: rien à planifier
+            f.write((',\n ' if count else '\n ') + json.dumps(entry, ensure_ascii=False))
+            count += 1
+        f.write('\n]}\n')
+    os.replace(temp, plan_path)
+    return plan_path
+
+class ActionExecutor:
+    """
+    Exécute un plan par lots en journalisant chaque étape
+
+    Pour chaque lot, les intentions ('begin') sont écrites et synchronisées sur
+    disque avant d'agir, puis les résultats ('done'/'skipped'/'failed'). Après un
+    arrêt brutal, une action commencée mais non conclue est réconciliée avec
+    l'état réel du disque et le manifeste de sauvegarde. Une action annulée
+    ('rolled_back') n'est rejouée que sur demande explicite.
+    """
+
+    def __init__(self, plan_path, journal_path=None, batch_size=500, backups=None):
+        self.plan_path = Path(plan_path)
+        self.journal_path = Path(journal_path) if journal_path else self.plan_path.with_suffix('.journal')
+        self.batch_size = batch_size
+        self.backups = backups or BackupManager(run_name=f"plan_{self.plan_path.parent.name}_{self.plan_path.stem}")
+        self.stats = {'done': 0, 'skipped': 0, 'failed': 0, 'already': 0}
+
+    def load_plan(self):
+        """Actions du plan"""
+        with open(self.plan_path, 'r', encoding='utf-8') as f:
+            plan = json.load(f)
+        if plan.get('version') != PLAN_VERSION:
+            raise ValueError(f"Version de plan non supportée: {plan.get('version')}")
+        return plan['actions']
+
+    def journal_records(self):
+        """Enregistrements du journal dans l'ordre d'écriture"""
+        records = []
+        if not self.journal_path.exists():
+            return records
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue  # Dernière ligne tronquée par l'interruption
+        return records
+
+    def load_journal(self):
+        """Dernier état journalisé de chaque action {id: enregistrement}"""
+        return {record['id']: record for record in self.journal_records()}
+
+    def append(self, journal, records):
+        """Écrit des enregistrements et les rend durables"""
+        for record in records:
+            journal.write(json.dumps(record, ensure_ascii=False) + "\n")
+        journal.flush()
+        os.fsync(journal.fileno())
+
+    def run(self, dry_run=False, reapply=False):
+        """
+        Applique le plan (reprend là où un passage précédent s'est arrêté)
+
+        Args:
+            dry_run: afficher les actions restantes sans rien modifier
+            reapply: rejouer aussi les actions annulées par rollback()
+        """
+        actions = self.load_plan()
+        states = self.load_journal()
+
+        pending = []
+        for action in actions:
+            state = states.get(action['id'], {}).get('state')
+            if state in ('done', 'skipped', 'failed') or (state == 'rolled_back' and not reapply):
+                self.stats['already'] += 1
+            elif state == 'begin':
+                # Interrompu en plein lot: l'action a pu avoir lieu ou non
+                pending.append((action, self.reconcile(action, states[action['id']])))
+            else:
+                pending.append((action, None))
+
+        if dry_run:
+            for action, outcome in pending:
+                print(f"  {action['op']}: {action['path']}" +
+                      (f" → {action['destination']}" if action.get('destination') else ""))
+            return self.stats
+
+        self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.journal_path, 'a', encoding='utf-8') as journal:
+            for start in range(0, len(pending), self.batch_size):
+                batch = pending[start:start + self.batch_size]
+
+                # Intentions d'abord: le journal précède toujours le disque
+                self.append(journal, [
+                    self.begin_record(action)
+                    for action, outcome in batch if outcome is None
+                ])
+
+                results = []
+                for action, outcome in batch:
+                    if outcome is None:
+                        outcome = self.apply(action)
+                    self.stats[outcome['state']] += 1
+                    results.append(dict(outcome, id=action['id'], time=time.time()))
+                self.append(journal, results)
+
+        return self.stats
+
+    def begin_record(self, action):
+        """Intention journalisée avant d'agir (avec l'exécution de sauvegarde pour une suppression)"""
+        record = {'id': action['id'], 'state': 'begin', 'time': time.time()}
+        if action['op'] == 'delete':
+            record['backup_run'] = self.backups.run_name
+        return record
+
+    def backups_of(self, run_name):
+        """Magasin de sauvegarde d'une exécution donnée (même répertoire que le courant)"""
+        if run_name in (None, self.backups.run_name):
+            return self.backups
+        return BackupManager(store_dir=self.backups.store_dir, run_name=run_name, finder=self.backups.finder)
+
+    def reconcile(self, action, record):
+        """Détermine l'issue d'une action interrompue d'après l'état du disque"""
+        source = Path(action['path'])
+        if action['op'] == 'move':
+            destination = Path(action['destination'])
+            if not source.exists() and destination.exists():
+                return {'state': 'done'}
+        elif action['op'] == 'delete':
+            if not source.exists():
+                # Absent: supprimé par nous seulement si la sauvegarde est au manifeste
+                backups = self.backups_of(record.get('backup_run'))
+                found = backups.lookup(source)
+                if found is None:
+                    return {'state': 'failed', 'reason': 'absent sans sauvegarde au manifeste'}
+                return {'state': 'done', 'backup': str(found[0]), 'backup_run': backups.run_name}
+        return None  # Rien n'a eu lieu: on rejoue l'action
+
+    def unchanged(self, action):
+        """Le fichier est-il toujours celui qui a été analysé ?"""
+        return self.matches(action['path'], action.get('expect'))
+
+    def matches(self, path, expected):
+        """Le stat actuel de path correspond-il à l'empreinte stat relevée ?"""
+        if not expected:
+            return True
+        try:
+            current = stat_fingerprint(path)
+        except OSError:
+            return False
+        return all(current[key] == value for key, value in expected.items() if key in current)
+
+    def verify_delete(self, action):
+        """
+        Revérifie une suppression juste avant d'agir
+
+        La copie conservée doit toujours exister, être un autre inode, avoir le
+        stat relevé au plan ('keep_expect') et le contenu 'digest'; le fichier à
+        supprimer doit avoir ce même contenu (relu si son stat a changé).
+
+        Returns:
+            (empreinte vérifiée, None) ou (None, raison du refus)
+        """
+        if not action.get('keep') or not action.get('digest'):
+            return None, 'suppression sans copie conservée ni empreinte'
+
+        expected = Fingerprint.parse(action['digest'])
+        path, keep = Path(action['path']), Path(action['keep'])
+        try:
+            st_path = os.stat(path)
+        except OSError:
+            return None, 'absent depuis l\'analyse'
+        try:
+            st_keep = os.stat(keep)
+        except OSError:
+            return None, 'copie conservée absente'
+
+        if (st_keep.st_dev, st_keep.st_ino) == (st_path.st_dev, st_path.st_ino):
+            return None, 'la copie conservée est le même fichier'
+        if not self.matches(keep, action.get('keep_expect')):
+            return None, 'copie conservée modifiée depuis l\'analyse'
+
+        finder = self.backups.finder
+        if finder is None:
+            finder = self.backups.finder = DuplicateFinder()
+        if finder.full_hash(keep, st=st_keep) != expected:
+            return None, 'contenu de la copie conservée différent'
+        if finder.full_hash(path, st=st_path) != expected:
+            return None, 'contenu différent de la copie conservée'
+        return expected, None
+
+    def apply(self, action):
+        """Exécute une action, retourne l'enregistrement de résultat"""
+        # Une suppression relit toujours le contenu: un stat différent (fichier
+        # restauré par rollback, par exemple) n'y suffit pas à refuser
+        if action['op'] != 'delete' and not self.unchanged(action):
+            return {'state': 'skipped', 'reason': 'modifié ou absent depuis l\'analyse'}
+
+        try:
+            if action['op'] == 'delete':
+                fingerprint, reason = self.verify_delete(action)
+                if fingerprint is None:
+                    return {'state': 'skipped', 'reason': reason}
+                target = self.backups.backup_and_remove(action['path'], fingerprint)
+                return {'state': 'done', 'backup': str(target), 'backup_run': self.backups.run_name}
+
+            if action['op'] == 'move':
+                self.move(Path(action['path']), Path(action['destination']))
+                return {'state': 'done'}
+
+            return {'state': 'failed', 'reason': f"opération inconnue: {action['op']}"}
+        except OSError as e:
+            return {'state': 'failed', 'reason': str(e)}
+
+    def move(self, source, destination):
+        """Déplacement sans jamais écraser la destination"""
+        if destination.exists():
+            raise FileExistsError(errno.EEXIST, "destination existante", str(destination))
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.rename(source, destination)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            shutil.move(str(source), str(destination))
+
+    def rollback(self):
+        """Annule les actions effectuées, dans l'ordre inverse de leur exécution"""
+        actions = {action['id']: action for action in self.load_plan()}
+        records = self.journal_records()
+        states = {record['id']: record for record in records}
+        undone = 0
+        seen = set()
+        batch = []
+
+        with open(self.journal_path, 'a', encoding='utf-8') as journal:
+            # Ordre inverse d'écriture au journal (une reprise n'exécute pas par id croissant)
+            for record in reversed(records):
+                action_id = record['id']
+                action = actions.get(action_id)
+                if action_id in seen or states[action_id].get('state') != 'done' or action is None:
+                    continue
+                seen.add(action_id)
+                record = states[action_id]
+
+                try:
+                    self.undo(action, record)
+                except OSError as e:
+                    print(f"  ❌ Annulation impossible: {action['path']} ({e})")
+                    continue
+
+                batch.append({'id': action_id, 'state': 'rolled_back', 'time': time.time()})
+                undone += 1
+                if len(batch) >= self.batch_size:
+                    self.append(journal, batch)
+                    batch = []
+
+            self.append(journal, batch)
+
+        return undone
+
+    def undo(self, action, record):
+        """Annule une action (sans effet si elle est déjà annulée sur le disque)"""
+        source = Path(action['path'])
+        if action['op'] == 'move':
+            destination = Path(action['destination'])
+            if source.exists() and not destination.exists():
+                return  # Déjà remis en place avant une interruption
+            self.move(destination, source)
+        elif action['op'] == 'delete':
+            if source.exists():
+                return
+            backups = self.backups_of(record.get('backup_run'))
+            if not backups.restore(only=[source]):
+                raise OSError(f"sauvegarde introuvable pour {source}")
+
+    def print_stats(self, indent="  "):
+        """Résumé de l'exécution"""
+        print(f"{indent}✅ {self.stats['done']} actions effectuées, ⏭️  {self.stats['skipped']} ignorées "
+              f"(fichier modifié), ❌ {self.stats['failed']} en échec, {self.stats['already']} déjà traitées")
+        print(f"{indent}📒 Journal: {self.journal_path}")
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Exécution transactionnelle d\'un plan SmartOptimizer')
+    parser.add_argument('plan', help='Fichier plan.json généré par un optimiseur')
+    parser.add_argument('--dry-run', action='store_true', help='Afficher les actions restantes sans rien modifier')
+    parser.add_argument('--rollback', action='store_true', help='Annuler les actions déjà effectuées')
+    parser.add_argument('--reapply', action='store_true', help='Rejouer aussi les actions annulées')
+    args = parser.parse_args()
+
+    executor = ActionExecutor(args.plan)
+    if args.rollback:
+        print(f"↩️  {executor.rollback()} actions annulées")
+        return 0
+
+    executor.run(dry_run=args.dry_run, reapply=args.reapply)
+    if not args.dry_run:
+        executor.print_stats()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Backup Manager - Magasin de sauvegardes adressé par contenu
+Un objet par empreinte complète, un manifeste chemin → objet par exécution
+"""
+
+import os
+import sys
+import json
+import time
+import errno
+import shutil
+from pathlib import Path
+from datetime import datetime
+
+# Ajouter le répertoire parent pour les imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.file_linker import FileLinker
+from utils.duplicate_finder import DuplicateFinder
+from utils.fingerprint import Fingerprint
+
+DEFAULT_STORE = Path.home() / "SmartOptimizer_Backups"
+
+class BackupManager:
+    """
+    Sauvegardes dédupliquées entre exécutions
+
+    Un contenu déjà présent dans objects/ (taille et empreinte vérifiées) n'est
+    jamais recopié: sauvegarder un fichier revient alors à l'inscrire au
+    manifeste de l'exécution et à le supprimer. Sinon, sur le même périphérique,
+    l'inode est simplement déplacé dans le magasin s'il n'a qu'un seul lien;
+    inode partagé ou autre périphérique: reflink ou copie en flux.
+    """
+
+    def __init__(self, store_dir=None, run_name=None, finder=None):
+        self.store_dir = Path(store_dir) if store_dir else DEFAULT_STORE
+        self.run_name = run_name or datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.objects_dir = self.store_dir / 'objects'
+        self.manifest_path = self.store_dir / 'manifests' / f"{self.run_name}.jsonl"
+        self.finder = finder
+        self.linker = FileLinker()
+        self.stats = {'renamed': 0, 'reflinked': 0, 'copied': 0, 'reused': 0, 'bytes_copied': 0, 'bytes_reused': 0}
+
+    def digest(self, path):
+        """Empreinte complète (via le cache partagé quand elle est déjà connue)"""
+        if self.finder is None:
+            self.finder = DuplicateFinder()
+        fingerprint = self.finder.full_hash(Path(path))
+        if fingerprint is None:
+            raise OSError(f"Empreinte impossible: {path}")
+        return fingerprint
+
+    def object_path(self, fingerprint):
+        """objects/<algo>/<2 premiers hex>/<hex>"""
+        hex_digest = fingerprint.hex()
+        return self.objects_dir / fingerprint.algo / hex_digest[:2] / hex_digest
+
+    def record(self, path, fingerprint, st):
+        """
+        Ajoute une ligne au manifeste, synchronisée sur disque
+
+        Appelé seulement une fois l'objet durable: une entrée du manifeste
+        désigne toujours un objet qui existe.
+        """
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {
+            'path': str(Path(path).absolute()),
+            'object': str(fingerprint),
+            'size': st.st_size,
+            'mtime_ns': st.st_mtime_ns,
+            'mode': st.st_mode & 0o7777,
+            'saved': time.time()
+        }
+        with open(self.manifest_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def valid_object(self, target, fingerprint, size):
+        """L'objet présent sous target a-t-il bien la taille et l'empreinte attendues ?"""
+        try:
+            st = os.stat(target)
+        except OSError:
+            return False
+        if st.st_size != size:
+            return False
+        if self.finder is None:
+            self.finder = DuplicateFinder()
+        return self.finder.full_hash(target, st=st) == fingerprint
+
+    def sync(self, target):
+        """fsync de l'objet puis de son dossier: l'objet et son nom survivent à une coupure"""
+        fd = os.open(target, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        if os.name == 'posix':  # Windows n'ouvre pas les dossiers
+            fd = os.open(target.parent, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def temp_path(self, target):
+        """Fichier temporaire à côté de l'objet, renommé en place une fois complet"""
+        return target.with_name(target.name + '.tmp')
+
+    def backup_and_remove(self, path, fingerprint=None):
+        """
+        Sauvegarde path dans le magasin puis le supprime (remplace « copy2 puis unlink »)
+
+        L'ordre garantit qu'un arrêt brutal ne perd jamais le contenu: objet
+        écrit et synchronisé, puis ligne du manifeste, puis suppression de
+        l'original.
+
+        Args:
+            path: fichier à sauvegarder
+            fingerprint: empreinte complète que l'appelant vient de vérifier
+
+        Returns:
+            chemin de l'objet qui contient désormais le contenu
+        """
+        path = Path(path)
+        st = os.stat(path)
+        fingerprint = fingerprint or self.digest(path)
+        target = self.object_path(fingerprint)
+
+        if self.valid_object(target, fingerprint, st.st_size):
+            # Contenu déjà sauvegardé (par cette exécution ou une précédente)
+            self.record(path, fingerprint, st)
+            path.unlink()
+            self.stats['reused'] += 1
+            self.stats['bytes_reused'] += st.st_size
+            return target
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if st.st_nlink == 1 and self.link_into_store(path, target):
+            # Même périphérique et inode non partagé: aucune donnée copiée
+            self.record(path, fingerprint, st)
+            path.unlink()
+            self.stats['renamed'] += 1
+            return target
+
+        # Inode partagé par d'autres liens physiques (qui pourraient encore le
+        # modifier) ou autre périphérique: l'objet est une copie indépendante
+        self.store_copy(path, target)
+        self.record(path, fingerprint, st)
+        path.unlink()
+        return target
+
+    def link_into_store(self, path, target):
+        """
+        Donne à l'inode de path un second nom dans le magasin (équivaut au
+        renommage une fois l'original supprimé, mais l'original reste en place
+        jusqu'à l'inscription au manifeste)
+
+        Returns:
+            False si le lien est impossible (autre périphérique, système sans liens)
+        """
+        temp = self.temp_path(target)
+        try:
+            if temp.exists():
+                temp.unlink()
+            os.link(path, temp)
+        except OSError:
+            return False
+        os.replace(temp, target)  # Remplace un éventuel objet corrompu
+        self.sync(target)
+        return True
+
+    def store_copy(self, path, target):
+        """Objet indépendant de path: reflink si possible, sinon copie en flux"""
+        temp = self.temp_path(target)
+        try:
+            if temp.exists():
+                temp.unlink()
+            self.linker.reflink(path, temp)
+            shutil.copystat(path, temp)
+        except OSError:
+            self.stream_copy(path, target)
+            return
+        os.replace(temp, target)
+        self.sync(target)
+        self.stats['reflinked'] += 1
+
+    def backup(self, path):
+        """Sauvegarde path en le laissant en place (reflink si possible, sinon copie)"""
+        path = Path(path)
+        st = os.stat(path)
+        fingerprint = self.digest(path)
+        target = self.object_path(fingerprint)
+
+        if self.valid_object(target, fingerprint, st.st_size):
+            self.record(path, fingerprint, st)
+            self.stats['reused'] += 1
+            self.stats['bytes_reused'] += st.st_size
+            return target
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        self.store_copy(path, target)
+        self.record(path, fingerprint, st)
+        return target
+
+    def stream_copy(self, source, target):
+        """Copie dans le noyau (sendfile sous Linux, fcopyfile sous macOS) et métadonnées"""
+        # Écrire à côté puis renommer: jamais d'objet tronqué sous son nom définitif
+        temp = self.temp_path(target)
+        shutil.copyfile(source, temp)
+        shutil.copystat(source, temp)
+        os.replace(temp, target)
+        self.sync(target)
+        self.stats['copied'] += 1
+        self.stats['bytes_copied'] += os.stat(target).st_size
+
+    def manifests(self):
+        """Manifestes présents dans le magasin"""
+        manifests_dir = self.store_dir / 'manifests'
+        if not manifests_dir.exists():
+            return []
+        return sorted(manifests_dir.glob('*.jsonl'))
+
+    def read_manifest(self, manifest_path):
+        """Entrées d'un manifeste (les lignes illisibles sont ignorées)"""
+        entries = []
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except OSError:
+            pass
+        return entries
+
+    def lookup(self, path):
+        """
+        Objet sauvegardé pour path par l'exécution courante, s'il est présent
+
+        Returns:
+            (chemin de l'objet, entrée du manifeste) ou None
+        """
+        path = str(Path(path).absolute())
+        for entry in reversed(self.read_manifest(self.manifest_path)):
+            if entry.get('path') != path:
+                continue
+            target = self.object_path(Fingerprint.parse(entry['object']))
+            try:
+                if os.stat(target).st_size == entry['size']:
+                    return target, entry
+            except OSError:
+                pass
+            return None
+        return None
+
+    def restore(self, run_name=None, only=None):
+        """
+        Restaure les fichiers d'une exécution (la courante par défaut)
+
+        Args:
+            run_name: nom de l'exécution à restaurer
+            only: chemins à restaurer (tous si None)
+
+        Returns:
+            nombre de fichiers restaurés
+        """
+        manifest_path = self.store_dir / 'manifests' / f"{run_name or self.run_name}.jsonl"
+        only = {str(Path(p).absolute()) for p in only} if only else None
+        restored = 0
+
+        for entry in self.read_manifest(manifest_path):
+            if only is not None and entry['path'] not in only:
+                continue
+
+            destination = Path(entry['path'])
+            if destination.exists():
+                continue
+
+            source = self.object_path(Fingerprint.parse(entry['object']))
+            if not source.exists():
+                print(f"  ❌ Objet manquant pour {destination}")
+                continue
+
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                self.linker.reflink(source, destination)
+            except OSError:
+                shutil.copyfile(source, destination)
+            os.chmod(destination, entry['mode'])
+            os.utime(destination, ns=(entry['mtime_ns'], entry['mtime_ns']))
+            restored += 1
+
+        return restored
+
+    def collect_garbage(self, max_age_days=30):
+        """
+        Supprime les manifestes de plus de max_age_days, puis les objets qu'aucun
+        manifeste restant ne référence
+
+        Returns:
+            (manifestes supprimés, objets supprimés, octets libérés)
+        """
+        limit = time.time() - max_age_days * 86400
+        removed_manifests = 0
+        referenced = set()
+
+        for manifest_path in self.manifests():
+            if manifest_path.stat().st_mtime < limit:
+                manifest_path.unlink()
+                removed_manifests += 1
+                continue
+            for entry in self.read_manifest(manifest_path):
+                fingerprint = Fingerprint.parse(entry['object'])
+                referenced.add((fingerprint.algo, fingerprint.hex()))
+
+        removed_objects = 0
+        freed = 0
+        if self.objects_dir.exists():
+            for object_path in self.objects_dir.glob('*/*/*'):
+                key = (object_path.parent.parent.name, object_path.name)
+                # Un .tmp orphelin vient d'une copie interrompue
+                if key in referenced and not object_path.name.endswith('.tmp'):
+                    continue
+                try:
+                    size = object_path.stat().st_size
+                    object_path.unlink()
+                except OSError:
+                    continue
+                removed_objects += 1
+                freed += size
+
+        return removed_manifests, removed_objects, freed
+
+    def print_stats(self, indent="  "):
+        """Résumé des sauvegardes"""
+        print(f"{indent}🔒 Sauvegarde: {self.manifest_path}")
+        print(f"{indent}   {self.stats['renamed']} déplacés, {self.stats['reflinked']} reflinks, "
+              f"{self.stats['copied']} copiés ({self.format_size(self.stats['bytes_copied'])} écrits), "
+              f"{self.stats['reused']} déjà sauvegardés ({self.format_size(self.stats['bytes_reused'])} non dupliqués)")
+
+    def format_size(self, size_bytes):
+        """Formate une taille en bytes"""
+        for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
+            if size_bytes < 1024:
+                return f"{size_bytes:.1f} {unit}"
+            size_bytes /= 1024
+        return f"{size_bytes:.1f} PB"
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Magasin de sauvegardes SmartOptimizer')
+    parser.add_argument('--list', action='store_true', help='Lister les exécutions sauvegardées')
+    parser.add_argument('--restore', metavar='RUN', help='Restaurer les fichiers d\'une exécution')
+    parser.add_argument('--gc', metavar='JOURS', type=int, help='Supprimer les sauvegardes plus anciennes')
+    args = parser.parse_args()
+
+    store = BackupManager()
+    if args.restore:
+        print(f"♻️  {store.restore(args.restore)} fichiers restaurés")
+    elif args.gc is not None:
+        manifests, objects, freed = store.collect_garbage(args.gc)
+        print(f"🗑️  {manifests} exécutions et {objects} objets supprimés ({store.format_size(freed)} libérés)")
+    else:
+        for manifest_path in store.manifests():
+            print(f"📄 {manifest_path.stem}: {len(store.read_manifest(manifest_path))} fichiers")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,6 +11,11 @@ from pathlib import Path
 from datetime import datetime, timedelta
 import sys
 
+# Ajouter le répertoire parent pour les imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.fs_snapshot import get_snapshot
+
 class CloudSyncChecker:
     def __init__(self):
         self.cloud_paths = {
@@ -97,7 +102,7 @@ class CloudSyncChecker:
         indicators = sync_indicators.get(service_name, [])
         
         try:
-            for root, dirs, files in os.walk(path):
+            for root, dirs, files in get_snapshot(path).walk(path):
                 # Limiter la profondeur pour éviter la lenteur
                 level = len(Path(root).relative_to(path).parts)
                 if level > 3:
@@ -128,7 +133,8 @@ class CloudSyncChecker:
         recent_files = []
         
         try:
-            for root, dirs, files in os.walk(path):
+            snapshot = get_snapshot(path)
+            for root, dirs, files in snapshot.walk(path):
                 level = len(Path(root).relative_to(path).parts)
                 if level > 2:  # Limiter la profondeur
                     dirs.clear()
@@ -136,16 +142,17 @@ class CloudSyncChecker:
                     
                 for file in files[:50]:  # Limiter le nombre de fichiers vérifiés
                     file_path = Path(root) / file
-                    try:
-                        mtime = datetime.fromtimestamp(file_path.stat().st_mtime)
-                        if mtime > recent_threshold:
-                            recent_files.append((str(file_path), mtime))
-                            
-                        if len(recent_files) > 10:  # Arrêter si trop de fichiers récents
-                            break
-                    except:
+                    entry = snapshot.entry(file_path)
+                    if entry is None:
                         continue
                         
+                    mtime = datetime.fromtimestamp(entry.mtime)
+                    if mtime > recent_threshold:
+                        recent_files.append((str(file_path), mtime))
+                        
+                    if len(recent_files) > 10:  # Arrêter si trop de fichiers récents
+                        break
+                        
                 if len(recent_files) > 10:
                     break
                     
@@ -172,7 +179,7 @@ class CloudSyncChecker:
         conflicts = []
         
         try:
-            for root, dirs, files in os.walk(path):
+            for root, dirs, files in get_snapshot(path).walk(path):
                 level = len(Path(root).relative_to(path).parts)
                 if level > 2:
                     dirs.clear()
@@ -204,20 +211,17 @@ class CloudSyncChecker:
         try:
             # Vérifier quelques fichiers récents
             latest = None
-            for root, dirs, files in os.walk(path):
+            snapshot = get_snapshot(path)
+            for root, dirs, files in snapshot.walk(path):
                 level = len(Path(root).relative_to(path).parts)
                 if level > 1:
                     dirs.clear()
                     continue
                     
                 for file in files[:20]:  # Limiter
-                    try:
-                        file_path = Path(root) / file
-                        mtime = file_path.stat().st_mtime
-                        if latest is None or mtime > latest:
-                            latest = mtime
-                    except:
-                        continue
+                    entry = snapshot.entry(Path(root) / file)
+                    if entry and (latest is None or entry.mtime > latest):
+                        latest = entry.mtime
                         
             if latest:
                 return datetime.fromtimestamp(latest)
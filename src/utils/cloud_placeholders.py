@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Cloud Placeholders - Détection des fichiers cloud non téléchargés
+iCloud, OneDrive Files-On-Demand, Dropbox Smart Sync: ne jamais lire un placeholder
+"""
+
+import os
+import stat
+import plistlib
+from pathlib import Path
+
+# Attributs Windows des fichiers « à la demande » (lecture = téléchargement)
+FILE_ATTRIBUTE_OFFLINE = 0x1000
+FILE_ATTRIBUTE_RECALL_ON_OPEN = 0x40000
+FILE_ATTRIBUTE_RECALL_ON_DATA_ACCESS = 0x400000
+
+# macOS: fichier « dataless » (contenu évincé vers le cloud)
+SF_DATALESS = getattr(stat, 'SF_DATALESS', 0x40000000)
+
+# En dessous, st_blocks == 0 peut simplement signifier des données stockées dans l'inode
+INLINE_DATA_LIMIT = 4096
+
+class PlaceholderDetector:
+    # Attributs étendus posés par les clients de synchronisation (user.com.dropbox... sous Linux)
+    SYNC_XATTRS = ['com.apple.metadata', 'com.dropbox', 'com.apple.fileprovider', 'com.microsoft.onedrive']
+
+    def is_placeholder(self, path, st=None):
+        """Indique si lire le contenu de path déclencherait un téléchargement"""
+        path = Path(path)
+
+        # Stub iCloud: .Nom.ext.icloud remplace le fichier évincé
+        if path.name.endswith('.icloud'):
+            return True
+
+        if st is None:
+            try:
+                st = os.stat(path)
+            except OSError:
+                return False
+
+        attributes = getattr(st, 'st_file_attributes', 0)
+        if attributes & (FILE_ATTRIBUTE_OFFLINE | FILE_ATTRIBUTE_RECALL_ON_OPEN | FILE_ATTRIBUTE_RECALL_ON_DATA_ACCESS):
+            return True
+
+        # macOS: le drapeau suffit, sans lire les attributs étendus
+        if getattr(st, 'st_flags', 0) & SF_DATALESS:
+            return True
+
+        # Taille annoncée mais aucun bloc alloué localement
+        blocks = getattr(st, 'st_blocks', None)
+        if blocks == 0 and st.st_size > INLINE_DATA_LIMIT:
+            return True
+
+        # Fichier géré par un client de synchronisation et pas entièrement présent:
+        # attributs étendus lus seulement pour ces fichiers creux, rares
+        if blocks is not None and blocks * 512 < st.st_size and self.sync_attributes(path):
+            return True
+
+        return False
+
+    def remote_size(self, path, st=None):
+        """Taille du fichier dans le cloud (lue dans le stub iCloud si besoin)"""
+        path = Path(path)
+
+        if path.name.endswith('.icloud'):
+            # Le stub est un petit plist local: le lire ne télécharge rien
+            try:
+                with open(path, 'rb') as f:
+                    info = plistlib.load(f)
+                return int(info.get('NSURLFileSizeKey', 0))
+            except Exception:
+                return 0
+
+        if st is None:
+            try:
+                st = os.stat(path)
+            except OSError:
+                return 0
+        return st.st_size
+
+    def original_name(self, path):
+        """Nom du fichier représenté par un stub iCloud (.Nom.ext.icloud → Nom.ext)"""
+        name = Path(path).name
+        if name.endswith('.icloud'):
+            name = name[:-len('.icloud')]
+            if name.startswith('.'):
+                name = name[1:]
+        return name
+
+    def sync_attributes(self, path):
+        """
+        Attributs étendus de synchronisation présents sur path
+
+        os.listxattr n'existe pas sous macOS: aucun attribut n'y est lu, les
+        fichiers évincés y sont reconnus par st_flags (SF_DATALESS).
+        """
+        if not hasattr(os, 'listxattr'):
+            return []
+        try:
+            names = os.listxattr(str(path), follow_symlinks=False)
+        except OSError:
+            return []
+
+        return [name for name in names if any(marker in name for marker in self.SYNC_XATTRS)]
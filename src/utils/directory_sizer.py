@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Directory Sizer - Calcul de taille des répertoires sans sous-processus
+Agrégation ascendante sur l'instantané partagé, liens physiques comptés une seule fois
+"""
+
+import os
+import sys
+import weakref
+from pathlib import Path
+
+# Ajouter le répertoire parent pour les imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.fs_snapshot import get_snapshot
+
+class DirectorySizer:
+    def __init__(self, verbose=True):
+        self.verbose = verbose
+        # Résultats par instantané: un clear_snapshots() invalide aussi les tailles
+        self.memo = weakref.WeakKeyDictionary()
+        self.warned = set()
+
+    def size(self, path):
+        """
+        Taille d'un répertoire (mémorisée pour lui et tous ses sous-répertoires)
+
+        Returns:
+            dict {'logical': octets st_size, 'physical': octets alloués,
+                  'files': nombre de fichiers, 'errors': entrées illisibles}
+        """
+        path = Path(path)
+        key = str(path)
+
+        if not path.is_dir() or path.is_symlink():
+            result = self.file_size(path)
+        else:
+            snapshot = get_snapshot(path)
+            sizes = self.memo.setdefault(snapshot, {})
+
+            if key not in sizes:
+                self.aggregate(snapshot, key, sizes)
+
+            logical, physical, files, errors, linked = sizes[key]
+            result = {
+                'logical': logical + sum(item[0] for item in linked.values()),
+                'physical': physical + sum(item[1] for item in linked.values()),
+                'files': files,
+                'errors': errors
+            }
+
+        # Taille partielle signalée plutôt que remplacée silencieusement par 0
+        if result['errors'] and self.verbose and key not in self.warned:
+            self.warned.add(key)
+            print(f"   ⚠️  Taille partielle pour {path}: {result['errors']} entrées illisibles")
+
+        return result
+
+    def logical_size(self, path):
+        """Somme des tailles apparentes (équivalent de du -sb)"""
+        return self.size(path)['logical']
+
+    def physical_size(self, path):
+        """Espace réellement alloué sur le disque (équivalent de du -s)"""
+        return self.size(path)['physical']
+
+    def aggregate(self, snapshot, top, sizes):
+        """Calcule en une passe ascendante la taille de top et de ses sous-répertoires"""
+        order = []
+        for root, dirs, files in snapshot.walk(top):
+            order.append(root)
+            # Les sous-arbres déjà mesurés ne sont pas reparcourus
+            dirs[:] = [d for d in dirs if os.path.join(root, d) not in sizes]
+
+        # Ordre préfixe inversé: chaque enfant est traité avant son parent
+        for root in reversed(order):
+            record = snapshot.directories[root]
+            entries = record['entries']
+            logical = physical = files = 0
+            errors = record['errors']
+            linked = {}
+
+            for name in record['files']:
+                item = entries[name]
+                allocated = self.allocated(item)
+                files += 1
+
+                if item.nlink > 1:
+                    # Même inode vu via plusieurs noms: une seule fois par sous-arbre
+                    linked[(item.dev, item.ino)] = (item.size, allocated)
+                else:
+                    logical += item.size
+                    physical += allocated
+
+            for name in record['dirs']:
+                child = sizes.get(os.path.join(root, name))
+                if child is None:
+                    continue  # Lien symbolique vers un dossier: non suivi, comme du
+                logical += child[0]
+                physical += child[1]
+                files += child[2]
+                errors += child[3]
+                linked.update(child[4])
+
+            sizes[root] = (logical, physical, files, errors, linked)
+
+    def allocated(self, item):
+        """Octets alloués (st_blocks indisponible sous Windows: taille apparente)"""
+        if item.blocks is None:
+            return item.size
+        return item.blocks * 512
+
+    def file_size(self, path):
+        """Taille d'un simple fichier ou lien"""
+        try:
+            st = os.lstat(path)
+            blocks = getattr(st, 'st_blocks', None)
+            return {
+                'logical': st.st_size,
+                'physical': blocks * 512 if blocks is not None else st.st_size,
+                'files': 1,
+                'errors': 0
+            }
+        except OSError:
+            return {'logical': 0, 'physical': 0, 'files': 0, 'errors': 1}
@@ -0,0 +1,640 @@
+#!/usr/bin/env python3
+"""
+Duplicate Finder - Détection de doublons en plusieurs étapes
+Taille → empreinte début/fin → vérification complète, partagé par tous les outils
+"""
+
+import os
+import sys
+import mmap
+import time
+import queue
+import threading
+from pathlib import Path
+from collections import defaultdict
+
+# Ajouter le répertoire parent pour les imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.hash_cache import HashCache
+from utils.cloud_placeholders import PlaceholderDetector
+from utils.hash_service import HashService
+from utils.fingerprint import Fingerprint, coverage, new_hasher, stat_fingerprint
+
+class DuplicateFinder:
+    def __init__(self, block_size=16 * 1024, chunk_size=1024 * 1024, min_size=1, cache=None, use_cache=True,
+                 hasher=None, algo=None, compare_max=3, compare_buffer=4 * 1024 * 1024):
+        self.block_size = block_size      # Octets lus au début et à la fin
+        self.chunk_size = chunk_size      # Taille des lectures pour la vérification
+        self.compare_max = compare_max    # Groupes jusqu'à cette taille: comparaison directe
+        self.compare_buffer = compare_buffer
+        self.min_size = min_size          # Les fichiers vides ne sont pas des doublons utiles
+        self.cache = cache
+        self.hasher = hasher or HashService(chunk_size=chunk_size, algo=algo)
+        self.algo = self.hasher.algo
+        self.placeholder_detector = PlaceholderDetector()
+        self.lock = threading.Lock()      # Les lectures se font sur les threads du service
+        
+        if self.cache is None and use_cache:
+            try:
+                self.cache = HashCache()
+            except Exception:
+                self.cache = None  # Cache indisponible: on calcule simplement tout
+                
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Remet à zéro les statistiques par étape"""
+        self.stats = {
+            'files': 0,
+            'bytes': 0,
+            'errors': 0,
+            'compared_groups': 0,
+            'hardlinks': {'files': 0, 'bytes': 0},   # Liens physiques déjà consolidés
+            'revalidation': {'unchanged': 0, 'rehashed': 0, 'changed': 0},
+            'placeholders': {},   # chemin → taille distante des fichiers non téléchargés
+            'stages': {
+                'size': {'files_eliminated': 0, 'bytes_eliminated': 0, 'bytes_read': 0},
+                'fingerprint': {'files_eliminated': 0, 'bytes_eliminated': 0, 'bytes_read': 0},
+                'full': {'files_eliminated': 0, 'bytes_eliminated': 0, 'bytes_read': 0}
+            }
+        }
+
+    def find_duplicates(self, files):
+        """
+        Regroupe les fichiers au contenu strictement identique
+
+        Args:
+            files: chemins, ou tuples (chemin, taille) ou (chemin, os.stat_result) quand
+                   le parcours a déjà relevé ces informations (aucun nouveau stat)
+
+        Returns:
+            dict {Fingerprint: {'size': taille, 'files': [chemins], 'links': [chemins],
+            'expect': {chemin: empreinte stat}}} des groupes de doublons; un seul chemin
+            par inode figure dans 'files', les autres liens physiques du même inode sont
+            dans 'links' (aucun espace à gagner). 'expect' sert à revalidate() avant d'agir
+        """
+        # Étape 1: regrouper par taille (aucune lecture de contenu)
+        by_size = defaultdict(list)
+        known = {}   # chemin → stat fourni par le parcours
+        for item in files:
+            if isinstance(item, tuple):
+                path, size = item
+                if isinstance(size, os.stat_result):
+                    known[Path(path)] = size
+                    size = size.st_size
+            else:
+                path = item
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    self.stats['errors'] += 1
+                    continue
+                known[Path(path)] = st
+                size = st.st_size
+
+            self.stats['files'] += 1
+            self.stats['bytes'] += size
+            if size >= self.min_size:
+                by_size[size].append(Path(path))
+
+        # Étape 2: empreinte début/fin seulement pour les tailles en collision
+        candidates = []
+        links = {}   # chemin retenu → autres liens physiques du même inode
+        for size, paths in by_size.items():
+            if len(paths) < 2:
+                self.eliminate('size', paths, size)
+                continue
+
+            unique = self.collapse_hardlinks(paths, size, links, known)
+            if len(unique) < 2:
+                self.eliminate('size', [path for path, st in unique], size)
+            else:
+                candidates.extend((path, size, st) for path, st in unique)
+
+        sizes = {path: size for path, size, st in candidates}
+        fingerprints = self.hasher.run(
+            [(path, st) for path, size, st in candidates],
+            lambda path, st: self.fingerprint(path, sizes[path], st)
+        )
+
+        by_fingerprint = defaultdict(list)
+        for path, size, st in candidates:
+            fingerprint = fingerprints.get(path)
+            if fingerprint is None:
+                self.count_failure(path)
+                continue
+            by_fingerprint[(size, fingerprint)].append(path)
+
+        groups = {}
+        to_verify = []
+        for (size, fingerprint), same_fingerprint in by_fingerprint.items():
+            if len(same_fingerprint) < 2:
+                self.eliminate('fingerprint', same_fingerprint, size)
+            elif size <= 2 * self.block_size:
+                # L'empreinte couvre déjà tout le contenu
+                groups[fingerprint] = {'size': size, 'files': same_fingerprint}
+            else:
+                to_verify.append((same_fingerprint, size))
+
+        # Étape 3: vérification complète des seules collisions d'empreinte
+        # Petits groupes: comparaison côte à côte, arrêtée au premier bloc différent
+        stats_by_path = {path: st for path, size, st in candidates}
+        to_hash = []
+        for paths, size in to_verify:
+            if len(paths) <= self.compare_max and not self.all_cached(paths):
+                groups.update(self.compare_group(paths, size, stats_by_path))
+            else:
+                to_hash.append((paths, size))
+
+        digests = self.hasher.run(
+            [path for paths, size in to_hash for path in paths],
+            lambda path, st: self.full_hash(path, st=st)
+        )
+        for paths, size in to_hash:
+            groups.update(self.verify_group(paths, size, digests))
+
+        for group in groups.values():
+            group['links'] = [alias for path in group['files'] for alias in links.get(path, [])]
+            group['expect'] = {str(path): stat_fingerprint(path, stats_by_path[path]) for path in group['files']}
+
+        if self.cache:
+            self.cache.commit()
+
+        return groups
+
+    def stream_duplicates(self, items, on_duplicate=None, max_pending=256):
+        """
+        Variante en flux de find_duplicates: les lectures commencent pendant le parcours
+
+        Chaque fichier est classé dès son arrivée. Une taille en collision lance
+        aussitôt l'empreinte début/fin, une empreinte en collision la
+        vérification complète. Au-delà de max_pending lectures en cours, items
+        n'est plus consommé: le parcours amont attend (contre-pression). Seul le
+        premier fichier de chaque taille est retenu tant qu'il est seul; la
+        comparaison directe des petits groupes n'est pas utilisée ici.
+
+        Args:
+            items: itérable de (chemin, os.stat_result)
+            on_duplicate: rappel (chemin, chemin identique) dès qu'un doublon est confirmé
+
+        Returns:
+            groupes au format de find_duplicates
+        """
+        lonely = {}                          # taille → (chemin, stat) encore seul de sa taille
+        inodes = {}                          # taille en collision → {(st_dev, st_ino): chemin}
+        links = {}                           # chemin retenu → autres liens physiques
+        candidates = {}                      # chemin → stat des fichiers lus
+        by_fingerprint = defaultdict(list)   # (taille, empreinte début/fin) → chemins
+        by_digest = defaultdict(list)        # (taille, empreinte complète) → chemins
+        pending = {}                         # Future → (étape, chemin, taille)
+        done = queue.Queue()
+
+        def launch(stage, path, size, st):
+            candidates[path] = st
+            if stage == 'fingerprint':
+                future = self.hasher.submit(path, st, lambda p, s: self.fingerprint(p, size, s))
+            else:
+                future = self.hasher.submit(path, st, lambda p, s: self.full_hash(p, st=s))
+            pending[future] = (stage, path, size)
+            future.add_done_callback(done.put)
+
+        def confirm(key, path):
+            identical = by_digest[key]
+            identical.append(path)
+            if on_duplicate and len(identical) > 1:
+                on_duplicate(path, identical[0])
+
+        def settle(block):
+            # Les résultats sont traités dans ce thread: aucun verrou sur les index
+            while pending:
+                try:
+                    future = done.get(block=block)
+                except queue.Empty:
+                    return
+                block = False
+                stage, path, size = pending.pop(future)
+                result = future.result()
+                if result is None:
+                    self.count_failure(path)
+                elif stage == 'full':
+                    confirm((size, result), path)
+                elif size <= 2 * self.block_size:
+                    confirm((size, result), path)   # L'empreinte couvre déjà tout le contenu
+                else:
+                    same = by_fingerprint[(size, result)]
+                    same.append(path)
+                    if len(same) == 2:
+                        launch('full', same[0], size, candidates[same[0]])
+                    if len(same) >= 2:
+                        launch('full', path, size, candidates[path])
+
+        try:
+            for path, st in items:
+                path = Path(path)
+                size = st.st_size
+                self.stats['files'] += 1
+                self.stats['bytes'] += size
+                if size < self.min_size:
+                    continue
+
+                key = (st.st_dev, st.st_ino)
+                seen = inodes.get(size)
+                if seen is None:
+                    first = lonely.get(size)
+                    if first is None:
+                        lonely[size] = (path, st)
+                        continue
+                    first_key = (first[1].st_dev, first[1].st_ino)
+                    if not (st.st_ino and key == first_key):
+                        # Deuxième contenu possible de cette taille: les lectures commencent
+                        del lonely[size]
+                        seen = inodes[size] = {first_key: first[0]}
+                        launch('fingerprint', first[0], size, first[1])
+                    else:
+                        seen = {first_key: first[0]}
+
+                if st.st_ino and key in seen:
+                    links.setdefault(seen[key], []).append(path)
+                    self.stats['hardlinks']['files'] += 1
+                    self.stats['hardlinks']['bytes'] += size
+                    continue
+                seen[key] = path
+                launch('fingerprint', path, size, st)
+
+                settle(block=len(pending) >= max_pending)
+
+            while pending:
+                settle(block=True)
+        finally:
+            for future in pending:
+                future.cancel()
+            self.hasher.shutdown()
+
+        # Comptes par étape, comme find_duplicates
+        for size, (path, st) in lonely.items():
+            self.eliminate('size', [path], size)
+        for (size, fingerprint), same in by_fingerprint.items():
+            if len(same) < 2:
+                self.eliminate('fingerprint', same, size)
+
+        groups = {}
+        for (size, digest), identical in by_digest.items():
+            if len(identical) < 2:
+                self.eliminate('fingerprint' if size <= 2 * self.block_size else 'full', identical, size)
+                continue
+            groups[digest] = {
+                'size': size,
+                'files': identical,
+                'links': [alias for path in identical for alias in links.get(path, [])],
+                'expect': {str(path): stat_fingerprint(path, candidates[path]) for path in identical}
+            }
+
+        if self.cache:
+            self.cache.commit()
+
+        return groups
+
+    def collapse_hardlinks(self, paths, size, links, known=None):
+        """
+        Ne garde qu'un chemin par (st_dev, st_ino): des liens physiques partagent
+        déjà leurs données, les « supprimer » ne libérerait rien
+
+        Args:
+            known: stats déjà relevés par chemin (les autres sont relus)
+
+        Returns:
+            liste de (chemin, stat) à comparer; les alias sont ajoutés à links
+        """
+        unique = []
+        by_inode = {}
+        for path in paths:
+            st = known.get(path) if known else None
+            if st is None:
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    self.stats['errors'] += 1
+                    continue
+
+            # Taille fournie par un instantané, fichier réécrit depuis: hors du groupe
+            if st.st_size != size:
+                continue
+
+            key = (st.st_dev, st.st_ino)
+            if st.st_ino and key in by_inode:
+                links.setdefault(by_inode[key], []).append(path)
+                self.stats['hardlinks']['files'] += 1
+                self.stats['hardlinks']['bytes'] += size
+                continue
+
+            by_inode[key] = path
+            unique.append((path, st))
+
+        return unique
+
+    def verify_group(self, paths, size, digests=None):
+        """Confirme un groupe candidat par hash complet"""
+        by_digest = defaultdict(list)
+        for path in paths:
+            digest = digests.get(path) if digests is not None else self.full_hash(path)
+            if digest is None:
+                self.count_failure(path)
+                continue
+            by_digest[digest].append(path)
+
+        verified = {}
+        for digest, identical in by_digest.items():
+            if len(identical) < 2:
+                self.eliminate('full', identical, size)
+            else:
+                verified[digest] = {'size': size, 'files': identical}
+
+        return verified
+
+    def all_cached(self, paths):
+        """Vrai si l'empreinte complète de chaque fichier est déjà en cache"""
+        if not self.cache:
+            return False
+
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                return False
+            if not self.cache.lookup(st, self.algo, 'full'):
+                return False
+        return True
+
+    def compare_group(self, paths, size, stats):
+        """
+        Compare les fichiers d'un petit groupe bloc par bloc, sans hash préalable
+
+        Les fichiers sont lus en parallèle dans des tampons alignés sur la page;
+        un fichier qui diverge est écarté aussitôt, sans lire la suite. Les
+        classes restantes sont hachées au passage (un seul fichier par classe)
+        pour produire la même empreinte 'full' que la vérification par hash.
+
+        Args:
+            stats: chemin → os.stat_result déjà relevé par l'appelant
+        """
+        self.stats['compared_groups'] += 1
+        opened = []
+        for path in paths:
+            st = stats[path]
+            try:
+                if self.placeholder_detector.is_placeholder(path, st):
+                    self.stats['placeholders'][str(path)] = self.placeholder_detector.remote_size(path, st)
+                    self.count_failure(path)
+                    continue
+                f = open(path, 'rb', buffering=0)
+            except OSError:
+                self.count_failure(path)
+                continue
+
+            # mmap anonyme: tampon aligné sur la page, favorable aux lectures directes
+            buf = mmap.mmap(-1, self.compare_buffer)
+            opened.append({'path': path, 'st': st, 'file': f, 'buffer': buf,
+                           'view': memoryview(buf), 'read': 0})
+
+        started = time.time()
+        # Chaque classe: fichiers identiques jusqu'ici, et le hash de leur contenu commun
+        classes = [{'members': opened, 'hash': new_hasher(self.algo)}] if len(opened) > 1 else []
+        finished = []
+        if len(opened) == 1:
+            self.eliminate('full', opened, size)
+
+        try:
+            while classes:
+                next_classes = []
+                for cls in classes:
+                    blocks = []
+                    for member in cls['members']:
+                        try:
+                            n = self.read_block(member['file'], member['view'])
+                        except OSError:
+                            self.count_failure(member['path'])
+                            continue
+                        member['read'] += n
+                        blocks.append((member, member['view'][:n]))
+
+                    # Répartir selon le contenu du bloc lu
+                    split = []
+                    for member, block in blocks:
+                        for sub in split:
+                            if sub['block'] == block:
+                                sub['members'].append(member)
+                                break
+                        else:
+                            split.append({'block': block, 'members': [member]})
+
+                    for sub in split:
+                        if len(sub['members']) < 2:
+                            self.eliminate('full', sub['members'], size)
+                            continue
+
+                        hash_obj = cls['hash'].copy() if len(split) > 1 else cls['hash']
+                        hash_obj.update(sub['block'])
+                        if len(sub['block']) == 0:
+                            finished.append({'members': sub['members'], 'hash': hash_obj})
+                        else:
+                            next_classes.append({'members': sub['members'], 'hash': hash_obj})
+
+                    for member, block in blocks:
+                        block.release()
+                classes = next_classes
+        finally:
+            elapsed = time.time() - started
+            for member in opened:
+                member['view'].release()
+                member['buffer'].close()
+                member['file'].close()
+                self.count_read('full', member['read'])
+                self.hasher.account(member['st'].st_dev, member['read'], elapsed)
+
+        verified = {}
+        for cls in finished:
+            fingerprint = Fingerprint(self.algo, 'full', cls['hash'].digest())
+            verified[fingerprint] = {'size': size, 'files': [member['path'] for member in cls['members']]}
+            if self.cache:
+                for member in cls['members']:
+                    self.cache.store(member['st'], self.algo, 'full', fingerprint.digest)
+
+        return verified
+
+    def read_block(self, f, view):
+        """
+        Remplit view sauf en fin de fichier
+
+        Un readinto peut rendre moins que demandé (FUSE, SMB, montages cloud):
+        comparer des blocs tronqués séparerait des fichiers identiques.
+        """
+        total = 0
+        while total < len(view):
+            with view[total:] as rest:
+                n = f.readinto(rest)
+            if not n:
+                break
+            total += n
+        return total
+
+    def revalidate(self, path, expect, fingerprint):
+        """
+        Vérifie juste avant d'agir que path a toujours le contenu analysé
+
+        Un stat inchangé (taille, mtime_ns, inode) suffit: aucune lecture. Seuls les
+        fichiers modifiés depuis l'analyse sont relus et comparés à l'empreinte.
+        """
+        checks = self.stats['revalidation']
+        try:
+            st = os.stat(path)
+        except OSError:
+            checks['changed'] += 1
+            return False
+
+        if expect and stat_fingerprint(path, st) == expect:
+            checks['unchanged'] += 1
+            return True
+
+        current = self.full_hash(Path(path), st=st)
+        if current is not None and current == fingerprint:
+            checks['rehashed'] += 1
+            return True
+
+        checks['changed'] += 1
+        return False
+
+    def count_failure(self, path):
+        """Un placeholder ignoré n'est pas une erreur de lecture"""
+        if str(path) not in self.stats['placeholders']:
+            self.stats['errors'] += 1
+
+    def eliminate(self, stage, paths, size):
+        """Comptabilise les fichiers écartés à une étape"""
+        self.stats['stages'][stage]['files_eliminated'] += len(paths)
+        self.stats['stages'][stage]['bytes_eliminated'] += size * len(paths)
+
+    def fingerprint(self, path, size, st=None):
+        """Empreinte des premiers et derniers blocs (contenu complet si petit fichier)"""
+        if size <= 2 * self.block_size:
+            return self.full_hash(path, stage='fingerprint', st=st)
+
+        return self.cached_digest(path, coverage('headtail', self.block_size), self.read_head_tail, st)
+
+    def full_hash(self, path, stage='full', st=None):
+        """Empreinte complète d'un fichier"""
+        return self.cached_digest(path, 'full', lambda p, s: self.read_full(p, stage, s), st)
+
+    def cached_digest(self, path, coverage_label, compute, st=None):
+        """Consulte le cache (validé par taille, mtime et ctime) avant de lire le contenu, puis y mémorise le résultat"""
+        if st is None:
+            try:
+                st = os.stat(path)
+            except OSError:
+                return None
+
+        if self.cache:
+            digest = self.cache.lookup(st, self.algo, coverage_label)
+            if digest:
+                return Fingerprint(self.algo, coverage_label, digest)
+
+        # Lire un fichier cloud non téléchargé le ferait rapatrier: on l'écarte
+        if self.placeholder_detector.is_placeholder(path, st):
+            remote_size = self.placeholder_detector.remote_size(path, st)
+            with self.lock:
+                self.stats['placeholders'][str(path)] = remote_size
+            return None
+
+        fingerprint = compute(path, st)
+        if fingerprint and self.cache:
+            self.cache.store(st, fingerprint.algo, fingerprint.coverage, fingerprint.digest)
+        return fingerprint
+
+    def read_head_tail(self, path, st=None):
+        """Lit et hache le premier et le dernier bloc"""
+        try:
+            fingerprint, read = self.hasher.hash_head_tail(path, self.block_size, st)
+        except OSError:
+            return None
+
+        self.count_read('fingerprint', read)
+        return fingerprint
+
+    def read_full(self, path, stage='full', st=None):
+        """Lit et hache tout le contenu"""
+        try:
+            fingerprint, read = self.hasher.hash_full(path, st)
+        except OSError:
+            return None
+
+        self.count_read(stage, read)
+        return fingerprint
+
+    def count_read(self, stage, nbytes):
+        """Comptabilise les octets lus (appelé depuis les threads de hachage)"""
+        with self.lock:
+            self.stats['stages'][stage]['bytes_read'] += nbytes
+
+    def print_revalidation(self, indent="  "):
+        """Résumé des vérifications faites avant les actions"""
+        checks = self.stats['revalidation']
+        if any(checks.values()):
+            print(f"{indent}🔁 Revalidation: {checks['unchanged']} inchangés, {checks['rehashed']} relus et confirmés, "
+                  f"{checks['changed']} modifiés (ignorés)")
+
+    def placeholder_summary(self):
+        """Nombre et taille distante des placeholders écartés"""
+        placeholders = self.stats['placeholders']
+        return len(placeholders), sum(placeholders.values())
+
+    def print_placeholders(self, indent="  "):
+        """Signale les fichiers cloud non téléchargés exclus de la comparaison"""
+        count, remote_bytes = self.placeholder_summary()
+        if count:
+            print(f"{indent}☁️  {count} fichiers non téléchargés exclus ({self.format_size(remote_bytes)} dans le cloud)")
+
+    def bytes_read(self):
+        """Total des octets lus sur l'ensemble des étapes"""
+        return sum(stage['bytes_read'] for stage in self.stats['stages'].values())
+
+    def print_stats(self, indent="  "):
+        """Affiche ce que chaque étape a éliminé"""
+        labels = {
+            'size': "📏 Taille",
+            'fingerprint': "🔎 Empreinte début/fin",
+            'full': "🔐 Vérification complète"
+        }
+
+        print(f"{indent}📊 Pipeline de détection ({self.stats['files']} fichiers, {self.format_size(self.stats['bytes'])}):")
+        for stage, label in labels.items():
+            info = self.stats['stages'][stage]
+            print(f"{indent}   {label}: {info['files_eliminated']} écartés "
+                  f"({self.format_size(info['bytes_eliminated'])}), lus {self.format_size(info['bytes_read'])}")
+
+        ratio = (self.bytes_read() / self.stats['bytes'] * 100) if self.stats['bytes'] else 0
+        print(f"{indent}   📖 Octets lus: {self.format_size(self.bytes_read())} ({ratio:.1f}% du volume)")
+
+        if self.stats['hardlinks']['files']:
+            print(f"{indent}   🔗 Liens physiques existants: {self.stats['hardlinks']['files']} "
+                  f"({self.format_size(self.stats['hardlinks']['bytes'])} déjà partagés, non comptés)")
+
+        if self.stats['compared_groups']:
+            print(f"{indent}   ⚖️  Comparaison directe: {self.stats['compared_groups']} petits groupes")
+
+        if self.cache and (self.cache.hits or self.cache.misses):
+            print(f"{indent}   💾 Cache: {self.cache.hits} empreintes réutilisées, {self.cache.misses} calculées")
+
+        self.hasher.print_stats(indent + "   ")
+
+        self.print_placeholders(indent + "   ")
+
+        if self.stats['errors']:
+            print(f"{indent}   ⚠️  {self.stats['errors']} fichiers illisibles ignorés")
+
+    def format_size(self, size_bytes):
+        """Formate une taille en bytes"""
+        for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
+            if size_bytes < 1024:
+                return f"{size_bytes:.1f} {unit}"
+            size_bytes /= 1024
+        return f"{size_bytes:.1f} PB"
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+File Linker - Consolidation des doublons sans suppression
+Remplace un doublon par un reflink (btrfs, XFS, APFS) ou un lien physique: chaque chemin reste valide
+"""
+
+import os
+import sys
+import shutil
+import ctypes
+import ctypes.util
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # Windows
+
+# ioctl Linux FICLONE: _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+class FileLinker:
+    """
+    Consolidation d'un doublon sur le fichier conservé
+
+    reflink: le doublon devient un clone copy-on-write, fichier distinct qui
+    garde son mode, son propriétaire et ses dates; modifier l'un ne touche pas
+    l'autre.
+
+    hardlink (repli quand le reflink est impossible): le doublon devient un
+    second nom de l'inode conservé. Il en prend le mode, le propriétaire et
+    les dates (les siens sont perdus) et toute écriture par l'un des chemins
+    se voit par l'autre. Passer methods=('reflink',) pour l'exclure.
+    """
+    # Méthodes essayées dans l'ordre: le reflink garde des copies indépendantes en écriture
+    METHODS = ('reflink', 'hardlink')
+
+    def __init__(self, methods=None):
+        self.methods = tuple(methods or self.METHODS)
+        self.clonefile = self.load_clonefile()
+        self.stats = {'reflink': 0, 'hardlink': 0, 'already_linked': 0, 'failed': 0, 'bytes': 0}
+
+    def load_clonefile(self):
+        """clonefile(2) de macOS (APFS), via ctypes"""
+        if sys.platform != 'darwin':
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+            clonefile = libc.clonefile
+            clonefile.argtypes = [ctypes.c_char_p, ctypes.c_char_p, ctypes.c_int]
+            clonefile.restype = ctypes.c_int
+            return clonefile
+        except (OSError, AttributeError):
+            return None
+
+    def same_file(self, st_a, st_b):
+        """Deux chemins désignent déjà le même inode (lien physique existant)"""
+        return st_a.st_ino != 0 and (st_a.st_dev, st_a.st_ino) == (st_b.st_dev, st_b.st_ino)
+
+    def reflink(self, source, target):
+        """Crée target comme clone copy-on-write de source (aucune donnée copiée)"""
+        if self.clonefile is not None:
+            if self.clonefile(os.fsencode(source), os.fsencode(target), 0) != 0:
+                err = ctypes.get_errno()
+                raise OSError(err, os.strerror(err), str(target))
+            return
+
+        if fcntl is None:
+            raise OSError("reflink non disponible sur cette plateforme")
+
+        with open(source, 'rb') as src:
+            # Même mode que la source: un clone n'est jamais moins lisible que l'original
+            mode = os.fstat(src.fileno()).st_mode & 0o777
+            fd = os.open(target, os.O_WRONLY | os.O_CREAT | os.O_EXCL, mode)
+            try:
+                fcntl.ioctl(fd, FICLONE, src.fileno())
+            except OSError:
+                os.close(fd)
+                os.unlink(target)
+                raise
+            os.close(fd)
+
+    def hardlink(self, source, target):
+        """Crée target comme lien physique vers source"""
+        os.link(source, target)
+
+    def consolidate(self, keep, duplicate):
+        """
+        Remplace duplicate par un reflink ou un lien physique vers keep
+
+        Le nouveau fichier est créé à côté du doublon puis substitué atomiquement
+        par os.replace: en cas d'échec, le doublon reste intact. Un reflink
+        reprend les métadonnées du doublon; un lien physique ne le peut pas
+        (voir la classe): le doublon a ensuite celles de keep.
+
+        Returns:
+            méthode utilisée ('reflink', 'hardlink', 'already_linked') ou None
+        """
+        keep = Path(keep)
+        duplicate = Path(duplicate)
+        try:
+            st_keep = os.stat(keep)
+            st_dup = os.stat(duplicate)
+        except OSError:
+            self.stats['failed'] += 1
+            return None
+
+        if self.same_file(st_keep, st_dup):
+            self.stats['already_linked'] += 1
+            return 'already_linked'
+
+        # Un lien ne traverse pas les systèmes de fichiers
+        if st_keep.st_dev != st_dup.st_dev:
+            self.stats['failed'] += 1
+            return None
+
+        temp = duplicate.with_name(f".{duplicate.name}.smartoptimizer-link")
+        for method in self.methods:
+            try:
+                if temp.exists():
+                    temp.unlink()
+                getattr(self, method)(keep, temp)
+            except OSError:
+                continue
+
+            try:
+                if method == 'reflink':
+                    # Le clone est un fichier distinct: il garde les métadonnées du doublon
+                    shutil.copystat(duplicate, temp)
+                os.replace(temp, duplicate)
+            except OSError:
+                try:
+                    temp.unlink()
+                except OSError:
+                    pass
+                continue
+
+            self.stats[method] += 1
+            self.stats['bytes'] += st_dup.st_size
+            return method
+
+        self.stats['failed'] += 1
+        return None
+
+    def print_stats(self, indent="  "):
+        """Résumé des consolidations"""
+        print(f"{indent}🔗 Consolidation: {self.stats['reflink']} reflinks, {self.stats['hardlink']} liens physiques, "
+              f"{self.stats['already_linked']} déjà liés, {self.stats['failed']} impossibles")
+        print(f"{indent}💾 Espace récupéré: {self.format_size(self.stats['bytes'])}")
+
+    def format_size(self, size_bytes):
+        """Formate une taille en bytes"""
+        for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
+            if size_bytes < 1024:
+                return f"{size_bytes:.1f} {unit}"
+            size_bytes /= 1024
+        return f"{size_bytes:.1f} PB"
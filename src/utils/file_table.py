@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+File Table - Inventaire de fichiers en colonnes typées
+Un tableau array par attribut et un numéro de ligne par fichier, plutôt qu'un dict par fichier
+"""
+
+import os
+from array import array
+
+class FileTable:
+    """
+    Table de fichiers compacte
+
+    Chaque attribut numérique est une colonne array (8 octets par fichier pour
+    une taille, 1 pour un score) au lieu d'une entrée de dict. Le chemin est
+    découpé en dossier parent, stocké une seule fois par dossier, et nom, mis
+    bout à bout avec les autres noms dans un seul tampon d'octets: le chemin
+    complet, le radical et l'extension sont recalculés à la demande. Les
+    regroupements manipulent des numéros de ligne.
+    """
+
+    def __init__(self):
+        self.dirs = []            # numéro → chemin du dossier
+        self.dir_ids = {}         # chemin du dossier → numéro
+        self.kinds = []           # code → type de fichier ('image', ...)
+        self.kind_ids = {}
+        self.parent = array('I')  # dossier de chaque fichier
+        self.name_data = bytearray()   # Noms encodés (os.fsencode) mis bout à bout
+        self.name_end = array('Q')     # Fin du nom de chaque fichier dans name_data
+        self.size = array('q')
+        self.mtime_ns = array('q')
+        self.ctime = array('d')
+        self.ino = array('Q')
+        self.kind = array('B')
+        self.score = array('b')
+        self.dir_rows = None      # numéro de dossier → lignes, construit à la première recherche
+
+    def add(self, path, st, kind='', score=0):
+        """Ajoute un fichier à partir de son stat, retourne son numéro de ligne"""
+        directory, name = os.path.split(str(path))
+        dir_id = self.dir_ids.get(directory)
+        if dir_id is None:
+            dir_id = self.dir_ids[directory] = len(self.dirs)
+            self.dirs.append(directory)
+
+        kind_id = self.kind_ids.get(kind)
+        if kind_id is None:
+            kind_id = self.kind_ids[kind] = len(self.kinds)
+            self.kinds.append(kind)
+
+        self.parent.append(dir_id)
+        self.name_data += os.fsencode(name)
+        self.name_end.append(len(self.name_data))
+        self.size.append(st.st_size)
+        self.mtime_ns.append(st.st_mtime_ns)
+        self.ctime.append(st.st_ctime)
+        self.ino.append(st.st_ino & 0xFFFFFFFFFFFFFFFF)  # ReFS: inodes sur 128 bits
+        self.kind.append(kind_id)
+        self.score.append(score)
+        self.dir_rows = None
+        return len(self.name_end) - 1
+
+    def __len__(self):
+        return len(self.name_end)
+
+    def name(self, row):
+        """Nom du fichier d'une ligne"""
+        start = self.name_end[row - 1] if row else 0
+        return os.fsdecode(bytes(self.name_data[start:self.name_end[row]]))
+
+    def path(self, row):
+        """Chemin complet d'une ligne"""
+        return os.path.join(self.dirs[self.parent[row]], self.name(row))
+
+    def mtime(self, row):
+        """mtime en secondes, comme st_mtime"""
+        return self.mtime_ns[row] / 1e9
+
+    def kind_of(self, row):
+        """Type de fichier d'une ligne"""
+        return self.kinds[self.kind[row]]
+
+    def stat_fingerprint(self, row):
+        """Empreinte stat relevée au parcours (même forme que fingerprint.stat_fingerprint)"""
+        return {'size': self.size[row], 'mtime_ns': self.mtime_ns[row], 'ino': self.ino[row]}
+
+    def rows_by_dir(self):
+        """Lignes de chaque dossier, indexées une fois (4 octets par fichier) puis réutilisées"""
+        if self.dir_rows is None:
+            self.dir_rows = [array('I') for _ in self.dirs]
+            for row, dir_id in enumerate(self.parent):
+                self.dir_rows[dir_id].append(row)
+        return self.dir_rows
+
+    def rows_of(self, paths):
+        """
+        Numéros de ligne des chemins demandés: {chemin: ligne}
+
+        Seules les lignes des dossiers concernés sont examinées, via l'index
+        par dossier; pas d'index permanent par chemin.
+        """
+        wanted = {}   # numéro de dossier → noms demandés
+        for path in paths:
+            directory, name = os.path.split(str(path))
+            dir_id = self.dir_ids.get(directory)
+            if dir_id is not None:
+                wanted.setdefault(dir_id, set()).add(name)
+
+        found = {}
+        if not wanted:
+            return found
+
+        dir_rows = self.rows_by_dir()
+        for dir_id, names in wanted.items():
+            for row in dir_rows[dir_id]:
+                name = self.name(row)
+                if name in names:
+                    found[os.path.join(self.dirs[dir_id], name)] = row
+        return found
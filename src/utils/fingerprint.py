@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Fingerprint - Format d'empreinte commun à tous les outils
+Algorithme interchangeable (BLAKE2b par défaut, xxHash/BLAKE3 si installés), condensé brut
+"""
+
+import os
+import hashlib
+from collections import namedtuple
+
+# Tentative d'import des dépendances optionnelles
+DEPENDENCIES = {
+    'xxhash': False,
+    'blake3': False
+}
+
+try:
+    import xxhash
+    DEPENDENCIES['xxhash'] = True
+except ImportError:
+    pass
+
+try:
+    import blake3
+    DEPENDENCIES['blake3'] = True
+except ImportError:
+    pass
+
+# Nom → constructeur d'un objet hash (update/digest)
+ALGORITHMS = {
+    'blake2b': lambda: hashlib.blake2b(digest_size=16),
+    'md5': hashlib.md5    # Uniquement pour relire d'anciennes empreintes
+}
+
+if DEPENDENCIES['xxhash']:
+    ALGORITHMS['xxh3_128'] = xxhash.xxh3_128
+
+if DEPENDENCIES['blake3']:
+    ALGORITHMS['blake3'] = blake3.blake3
+
+DEFAULT_ALGO = 'blake2b'
+
+# Portées reconnues: 'full', 'prefix:<octets>', 'suffix:<octets>', 'headtail:<octets>'
+COVERAGES = ('full', 'prefix', 'suffix', 'headtail')
+
+def available_algorithms():
+    """Algorithmes utilisables sur cette installation"""
+    return sorted(ALGORITHMS)
+
+def fastest_algorithm():
+    """Algorithme le plus rapide disponible (xxHash > BLAKE3 > BLAKE2b)"""
+    for algo in ('xxh3_128', 'blake3', DEFAULT_ALGO):
+        if algo in ALGORITHMS:
+            return algo
+    return DEFAULT_ALGO
+
+def new_hasher(algo=None):
+    """Objet hash pour l'algorithme demandé"""
+    algo = algo or DEFAULT_ALGO
+    if algo not in ALGORITHMS:
+        raise ValueError(f"Algorithme d'empreinte inconnu ou non installé: {algo}")
+    return ALGORITHMS[algo]()
+
+def coverage(kind, length=None):
+    """Étiquette de portée: 'full' ou '<kind>:<octets>'"""
+    if kind not in COVERAGES:
+        raise ValueError(f"Portée d'empreinte inconnue: {kind}")
+    return kind if kind == 'full' else f"{kind}:{length}"
+
+def stat_fingerprint(path, st=None):
+    """Empreinte stat d'un fichier: suffit à détecter une modification depuis l'analyse"""
+    if st is None:
+        st = os.stat(path)
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'ino': st.st_ino}
+
+class Fingerprint(namedtuple('Fingerprint', ['algo', 'coverage', 'digest'])):
+    """Empreinte d'un contenu: algorithme, portée lue et condensé brut (bytes)"""
+    __slots__ = ()
+
+    def hex(self):
+        """Condensé en hexadécimal"""
+        return self.digest.hex()
+
+    def short(self, length=12):
+        """Version abrégée pour l'affichage uniquement"""
+        return self.digest.hex()[:length]
+
+    def __str__(self):
+        return f"{self.algo}:{self.coverage}:{self.digest.hex()}"
+
+    @classmethod
+    def parse(cls, text):
+        """Relit une empreinte écrite avec str()"""
+        algo, rest = text.split(':', 1)
+        coverage_label, hex_digest = rest.rsplit(':', 1)
+        return cls(algo, coverage_label, bytes.fromhex(hex_digest))
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Filesystem Snapshot - Instantané partagé d'une arborescence
+Un seul parcours os.scandir par racine, interrogé ensuite par tous les analyseurs
+"""
+
+import os
+import sys
+import gzip
+import json
+import time
+import hashlib
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Ajouter le répertoire parent pour les imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.platform_detector import PlatformDetector
+
+class SnapshotEntry:
+    """Métadonnées d'une entrée relevées pendant le parcours"""
+    __slots__ = ('name', 'size', 'blocks', 'mtime', 'ino', 'dev', 'nlink', 'is_dir', 'is_symlink')
+
+    def __init__(self, name, size, blocks, mtime, ino, dev, nlink, is_dir, is_symlink):
+        self.name = name
+        self.size = size
+        self.blocks = blocks
+        self.mtime = mtime
+        self.ino = ino
+        self.dev = dev
+        self.nlink = nlink
+        self.is_dir = is_dir
+        self.is_symlink = is_symlink
+
+    def to_list(self):
+        """Forme compacte pour la persistance"""
+        return [self.size, self.blocks, self.mtime, self.ino, self.dev,
+                self.nlink, self.is_dir, self.is_symlink]
+
+class FilesystemSnapshot:
+    # Incrémenter quand le format persisté change
+    FORMAT_VERSION = 2
+
+    def __init__(self, root, workers=None, previous=None):
+        self.root = Path(root)
+        # Listage d'I/O: plus de threads que de coeurs pour recouvrir la latence
+        self.workers = workers or min(16, (os.cpu_count() or 1) * 2)
+        # Répertoires du parcours précédent, réutilisables si leur mtime n'a pas bougé
+        self.previous = previous or {}
+        self.directories = {}
+        self.visited = {}   # (st_dev, st_ino) → premier chemin de chaque répertoire parcouru
+        self.loops = []     # (chemin, chemin déjà parcouru): même répertoire atteint deux fois
+        self.errors = 0
+        self.listed = 0
+        self.reused = 0
+        self.build()
+
+    def build(self):
+        """Parcourt la racine une seule fois (listages en parallèle) et mémorise chaque répertoire"""
+        try:
+            st = os.stat(self.root)
+            self.visited[(st.st_dev, st.st_ino)] = str(self.root)
+        except OSError:
+            pass
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pending = {pool.submit(self.list_directory, str(self.root))}
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    current, record, subdirs, reused = future.result()
+                    self.directories[current] = record
+                    self.errors += record['errors']
+                    if reused:
+                        self.reused += 1
+                    else:
+                        self.listed += 1
+
+                    for subdir in subdirs:
+                        if self.first_visit(subdir, record['entries'][os.path.basename(subdir)]):
+                            pending.add(pool.submit(self.list_directory, subdir))
+
+    def first_visit(self, path, item):
+        """
+        Enregistre un répertoire par (st_dev, st_ino); faux s'il a déjà été atteint
+
+        Montages liés, jonctions Windows ou dossiers liés physiquement (Time Machine)
+        peuvent faire réapparaître un répertoire sous un autre chemin: sans ce
+        contrôle, le parcours compterait deux fois ou ne terminerait pas.
+        """
+        if not item.ino:
+            return True  # Pas d'inode fiable sur ce système de fichiers
+
+        key = (item.dev, item.ino)
+        first = self.visited.get(key)
+        if first is not None:
+            self.loops.append((path, first))
+            return False
+        self.visited[key] = path
+        return True
+
+    def list_directory(self, current):
+        """Liste un répertoire (exécuté dans un thread du pool)"""
+        try:
+            mtime_ns = os.stat(current).st_mtime_ns
+        except OSError:
+            mtime_ns = None
+
+        # Aucun ajout, suppression ni renommage depuis le dernier parcours: pas de relisting.
+        # Les entrées reprises peuvent être périmées pour un fichier réécrit sur place:
+        # les consommateurs relisent le stat de ce sur quoi ils agissent
+        old = self.previous.get(current)
+        if old is not None and mtime_ns is not None and old['mtime_ns'] == mtime_ns and not old['errors']:
+            subdirs = [os.path.join(current, name) for name in old['dirs']
+                       if not old['entries'][name].is_symlink]
+            return current, old, subdirs, True
+
+        record = {'dirs': [], 'files': [], 'entries': {}, 'links': {}, 'errors': 0, 'unreadable': False,
+                  'mtime_ns': mtime_ns}
+        subdirs = []
+
+        try:
+            with os.scandir(current) as iterator:
+                for entry in iterator:
+                    item = self.make_entry(entry)
+                    if item is None:
+                        record['errors'] += 1
+                        continue
+
+                    record['entries'][entry.name] = item
+                    if item.is_dir:
+                        record['dirs'].append(entry.name)
+                        # Comme os.walk: les liens vers des dossiers ne sont pas suivis,
+                        # mais leur cible est relevée (arête du graphe de synchronisation)
+                        if item.is_symlink:
+                            record['links'][entry.name] = os.path.realpath(entry.path)
+                        else:
+                            subdirs.append(entry.path)
+                    else:
+                        record['files'].append(entry.name)
+        except OSError:
+            record['errors'] += 1
+            record['unreadable'] = True
+
+        return current, record, subdirs, False
+
+    def make_entry(self, entry):
+        """Construit l'entrée à partir du DirEntry (un seul lstat)"""
+        try:
+            st = entry.stat(follow_symlinks=False)
+            return SnapshotEntry(
+                entry.name, st.st_size, getattr(st, 'st_blocks', None), st.st_mtime,
+                st.st_ino, st.st_dev, st.st_nlink, entry.is_dir(), entry.is_symlink()
+            )
+        except OSError:
+            return None
+
+    def contains(self, path):
+        """Indique si le répertoire fait partie de l'instantané"""
+        return str(Path(path)) in self.directories
+
+    def walk(self, top=None):
+        """Équivalent de os.walk servi depuis la mémoire (élagage via dirs[:] supporté)"""
+        pending = [str(Path(top)) if top is not None else str(self.root)]
+
+        while pending:
+            current = pending.pop()
+            record = self.directories.get(current)
+            if record is None:
+                continue
+
+            dirs = list(record['dirs'])
+            yield current, dirs, list(record['files'])
+
+            for name in reversed(dirs):
+                pending.append(os.path.join(current, name))
+
+    def entry(self, path):
+        """Retourne les métadonnées d'un fichier ou dossier, None si inconnu"""
+        path = Path(path)
+        record = self.directories.get(str(path.parent))
+        if record is None:
+            return None
+        return record['entries'].get(path.name)
+
+    def iterdir(self, path=None):
+        """Liste les entrées directes d'un répertoire"""
+        record = self.directories.get(str(Path(path)) if path is not None else str(self.root))
+        if record is None:
+            return []
+        return list(record['entries'].values())
+
+    def symlinks(self, top=None):
+        """Liens vers des dossiers sous top: tuples (chemin du lien, cible résolue)"""
+        for root, dirs, files in self.walk(top):
+            for name, target in self.directories[root].get('links', {}).items():
+                yield os.path.join(root, name), target
+
+    def file_count(self, top=None, limit=None):
+        """Nombre de fichiers sous top, éventuellement plafonné"""
+        count = 0
+        for root, dirs, files in self.walk(top):
+            count += len(files)
+            if limit and count > limit:
+                break
+        return count
+
+    def save(self, path):
+        """Persiste l'instantané (JSON compressé, écriture atomique)"""
+        directories = {}
+        for current, record in self.directories.items():
+            directories[current] = {
+                'mtime_ns': record.get('mtime_ns'),
+                'dirs': record['dirs'],
+                'files': record['files'],
+                'links': record.get('links', {}),
+                'errors': record['errors'],
+                'unreadable': record['unreadable'],
+                'entries': {name: item.to_list() for name, item in record['entries'].items()}
+            }
+
+        state = {
+            'version': self.FORMAT_VERSION,
+            'root': str(self.root),
+            'created': time.time(),
+            'directories': directories
+        }
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(path.name + '.tmp')
+        with gzip.open(temp_path, 'wt', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(temp_path, path)
+
+def load_directories(path, root, max_age_days=None):
+    """Relit les répertoires d'un instantané persisté, None s'il est absent ou inutilisable"""
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if state.get('version') != FilesystemSnapshot.FORMAT_VERSION or state.get('root') != str(Path(root)):
+        return None
+
+    # Les fichiers modifiés sur place ne changent pas le mtime du dossier: rescan complet périodique
+    if max_age_days is not None and time.time() - state.get('created', 0) > max_age_days * 86400:
+        return None
+
+    directories = {}
+    for current, record in state['directories'].items():
+        record['entries'] = {
+            name: SnapshotEntry(name, *values) for name, values in record['entries'].items()
+        }
+        directories[current] = record
+    return directories
+
+def snapshot_state_path(root):
+    """Emplacement de l'instantané persisté d'une racine"""
+    key = hashlib.sha1(str(Path(root)).encode('utf-8')).hexdigest()[:16]
+    return PlatformDetector().get_config_directory() / 'SmartOptimizer' / 'snapshots' / f"{key}.json.gz"
+
+# Instantanés partagés entre analyseurs pour la durée du processus
+_snapshots = {}
+
+def get_snapshot(path):
+    """Retourne l'instantané couvrant path, en le construisant au besoin"""
+    path = Path(path)
+
+    for snapshot in _snapshots.values():
+        if snapshot.contains(path):
+            return snapshot
+
+    snapshot = FilesystemSnapshot(path)
+    register(snapshot)
+    return snapshot
+
+def get_incremental_snapshot(path, max_age_days=7):
+    """
+    Instantané qui ne relit que les répertoires modifiés depuis le parcours précédent
+
+    Le parcours précédent est persisté sous le répertoire de configuration; un
+    répertoire dont le mtime n'a pas changé est repris tel quel sans être listé
+    ni relu. Un fichier réécrit sur place garde ainsi sa taille et son mtime
+    anciens dans l'instantané: ce qui sert à agir (candidats doublons, fichiers
+    à déplacer) est relu à ce moment-là, le cache d'empreintes est validé par
+    le ctime et les actions revalidées.
+    """
+    path = Path(path)
+    state_path = snapshot_state_path(path)
+
+    snapshot = FilesystemSnapshot(path, previous=load_directories(state_path, path, max_age_days))
+    try:
+        snapshot.save(state_path)
+    except OSError:
+        pass  # Pas de persistance possible: le prochain parcours sera simplement complet
+
+    register(snapshot)
+    return snapshot
+
+def register(snapshot):
+    """Ajoute un instantané au registre partagé"""
+    # Les instantanés inclus dans le nouveau deviennent inutiles
+    for key in [k for k, s in _snapshots.items() if snapshot.contains(s.root)]:
+        del _snapshots[key]
+
+    _snapshots[str(snapshot.root)] = snapshot
+
+def clear_snapshots():
+    """Oublie les instantanés (à appeler après des modifications du disque)"""
+    _snapshots.clear()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Hash Cache - Cache persistant des empreintes de fichiers
+SQLite sous le répertoire de configuration, clé (st_dev, st_ino, taille, mtime_ns, ctime_ns)
+"""
+
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Ajouter le répertoire parent pour les imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.platform_detector import PlatformDetector
+
+class HashCache:
+    # Incrémenter pour invalider toutes les entrées après un changement de format
+    SCHEMA_VERSION = 3
+
+    def __init__(self, db_path=None):
+        if db_path is None:
+            db_path = PlatformDetector().get_config_directory() / 'SmartOptimizer' / 'hash_cache.db'
+
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.pending = 0
+
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.create_schema()
+
+    def create_schema(self):
+        """Crée les tables, en repartant de zéro si la version a changé"""
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+
+        if row is None or int(row[0]) != self.SCHEMA_VERSION:
+            self.conn.execute("DROP TABLE IF EXISTS digests")
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('schema_version', ?)",
+                (str(self.SCHEMA_VERSION),)
+            )
+
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS digests (
+                dev INTEGER NOT NULL,
+                ino INTEGER NOT NULL,
+                algo TEXT NOT NULL,
+                coverage TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                ctime_ns INTEGER NOT NULL,
+                digest BLOB NOT NULL,
+                checked REAL NOT NULL,
+                PRIMARY KEY (dev, ino, algo, coverage)
+            )
+        """)
+        self.conn.commit()
+
+    def usable(self, st):
+        """Certains systèmes de fichiers ne fournissent pas d'inode stable"""
+        return st is not None and st.st_ino != 0
+
+    def lookup(self, st, algo, coverage):
+        """
+        Retourne l'empreinte mémorisée si le fichier n'a pas changé depuis
+
+        Le mtime peut être remis à une valeur antérieure (os.utime, touch -d,
+        outils de synchronisation); le ctime, lui, change à chaque écriture ou
+        modification des métadonnées et ne se règle pas: il fait aussi partie
+        de la clé, pour que l'empreinte qui autorise une suppression ne soit
+        jamais celle d'un contenu antérieur.
+        """
+        if not self.usable(st):
+            return None
+
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT digest FROM digests WHERE dev = ? AND ino = ? AND algo = ? AND coverage = ? "
+                "AND size = ? AND mtime_ns = ? AND ctime_ns = ?",
+                (st.st_dev, st.st_ino, algo, coverage, st.st_size, st.st_mtime_ns, st.st_ctime_ns)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return bytes(row[0])
+
+    def store(self, st, algo, coverage, digest):
+        """Mémorise une empreinte (remplace l'entrée périmée de la même identité)"""
+        if not self.usable(st):
+            return
+
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO digests (dev, ino, algo, coverage, size, mtime_ns, ctime_ns, digest, checked) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (st.st_dev, st.st_ino, algo, coverage, st.st_size, st.st_mtime_ns, st.st_ctime_ns,
+                 sqlite3.Binary(digest), time.time())
+            )
+            self.pending += 1
+
+            # Valider par lots pour limiter les écritures
+            if self.pending >= 1000:
+                self.conn.commit()
+                self.pending = 0
+
+    def commit(self):
+        """Valide les écritures en attente"""
+        with self.lock:
+            self.conn.commit()
+            self.pending = 0
+
+    def purge(self, max_age_days=90):
+        """Supprime les entrées qui n'ont plus été écrites depuis max_age_days"""
+        limit = time.time() - max_age_days * 86400
+        with self.lock:
+            cursor = self.conn.execute("DELETE FROM digests WHERE checked < ?", (limit,))
+            self.conn.commit()
+            return cursor.rowcount
+
+    def close(self):
+        """Valide et ferme la base"""
+        self.commit()
+        self.conn.close()
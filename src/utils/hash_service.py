@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Hash Service - Calcul d'empreintes en parallèle par périphérique
+Un pool de threads par st_dev: plusieurs flux sur SSD/NVMe, un seul par disque rotatif
+"""
+
+import os
+import mmap
+import time
+import sys
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Ajouter le répertoire parent pour les imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.fingerprint import Fingerprint, DEFAULT_ALGO, new_hasher, coverage
+
+class HashService:
+    # Lectures simultanées par type de support (hashlib libère le GIL sur les gros tampons)
+    DEFAULT_CONCURRENCY = {
+        'nvme': 8,
+        'ssd': 4,
+        'hdd': 1,       # Un seul flux: les lectures concurrentes font osciller la tête
+        'unknown': 4    # Réseau, FUSE, macOS, Windows: latence à recouvrir
+    }
+
+    # Au-delà, un fichier sur disque local est haché via mmap plutôt que par lectures
+    MMAP_THRESHOLD = 64 * 1024 * 1024
+
+    def __init__(self, chunk_size=1024 * 1024, concurrency=None, per_device=None,
+                 use_mmap=True, mmap_threshold=None, drop_cache=True, algo=None):
+        self.chunk_size = chunk_size
+        self.algo = algo or DEFAULT_ALGO
+        new_hasher(self.algo)                 # Échoue tout de suite si l'algorithme manque
+        self.concurrency = dict(self.DEFAULT_CONCURRENCY)
+        self.concurrency.update(concurrency or {})
+        self.per_device = per_device or {}   # st_dev → nombre de flux imposé
+        self.use_mmap = use_mmap and hasattr(mmap, 'mmap')
+        self.mmap_threshold = mmap_threshold or self.MMAP_THRESHOLD
+        self.drop_cache = drop_cache          # Ne pas évincer le cache de pages des autres processus
+        self.lock = threading.Lock()
+        self.local = threading.local()        # Un tampon réutilisé par thread de lecture
+        self.devices = {}
+        self.pools = {}                       # st_dev → pool persistant de submit()
+
+    def device_kind(self, dev):
+        """Type de support d'un st_dev d'après /sys/dev/block (Linux)"""
+        try:
+            base = Path(f"/sys/dev/block/{os.major(dev)}:{os.minor(dev)}")
+            if not base.exists():
+                return 'unknown'
+            real = base.resolve()
+        except (AttributeError, OSError, ValueError):
+            return 'unknown'
+
+        # Une partition n'a pas de queue/: on remonte au disque parent
+        for candidate in (real, real.parent):
+            rotational = candidate / 'queue' / 'rotational'
+            if rotational.exists():
+                try:
+                    if rotational.read_text().strip() == '1':
+                        return 'hdd'
+                except OSError:
+                    return 'unknown'
+                return 'nvme' if candidate.name.startswith('nvme') else 'ssd'
+
+        return 'unknown'
+
+    def device(self, dev):
+        """Profil et compteurs d'un périphérique (créés à la première utilisation)"""
+        with self.lock:
+            info = self.devices.get(dev)
+            if info is None:
+                kind = self.device_kind(dev)
+                info = {
+                    'kind': kind,
+                    'workers': self.per_device.get(dev, self.concurrency.get(kind, 1)),
+                    'files': 0,
+                    'bytes': 0,
+                    'seconds': 0.0
+                }
+                self.devices[dev] = info
+            return info
+
+    def account(self, dev, nbytes, seconds=0.0):
+        """Comptabilise une lecture faite pour un périphérique"""
+        info = self.device(dev)
+        with self.lock:
+            info['files'] += 1
+            info['bytes'] += nbytes
+            info['seconds'] += seconds
+
+    def run(self, items, func):
+        """
+        Exécute func(chemin, stat) sur chaque élément, en parallèle par périphérique
+
+        Args:
+            items: chemins, ou tuples (chemin, stat) quand le stat est déjà connu
+            func: calcul à effectuer (lecture + hash)
+
+        Returns:
+            dict {chemin: résultat}
+        """
+        by_device = {}
+        for item in items:
+            path, st = item if isinstance(item, tuple) else (item, None)
+            if st is None:
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+            by_device.setdefault(st.st_dev, []).append((path, st))
+
+        results = {}
+        pools = []
+        futures = {}
+        try:
+            # Un pool par périphérique: un disque lent ne bride pas les autres
+            for dev, jobs in by_device.items():
+                pool = ThreadPoolExecutor(max_workers=max(1, self.device(dev)['workers']))
+                pools.append(pool)
+                for path, st in jobs:
+                    futures[pool.submit(func, path, st)] = path
+
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+        finally:
+            for pool in pools:
+                pool.shutdown(wait=True)
+
+        return results
+
+    def submit(self, path, st, func):
+        """
+        Planifie func(chemin, stat) sur le pool du périphérique, retourne un Future
+
+        Pour les traitements en flux qui découvrent leurs fichiers au fil de l'eau;
+        les pools restent ouverts jusqu'à shutdown().
+        """
+        with self.lock:
+            pool = self.pools.get(st.st_dev)
+        if pool is None:
+            workers = max(1, self.device(st.st_dev)['workers'])
+            with self.lock:
+                pool = self.pools.setdefault(st.st_dev, ThreadPoolExecutor(max_workers=workers))
+        return pool.submit(func, path, st)
+
+    def shutdown(self):
+        """Ferme les pools de submit() après la fin des calculs en cours"""
+        with self.lock:
+            pools, self.pools = list(self.pools.values()), {}
+        for pool in pools:
+            pool.shutdown(wait=True)
+
+    def buffer(self):
+        """Tampon préalloué du thread courant (aucune allocation par bloc lu)"""
+        buf = getattr(self.local, 'buffer', None)
+        if buf is None or len(buf) != self.chunk_size:
+            buf = bytearray(self.chunk_size)
+            self.local.buffer = buf
+            self.local.view = memoryview(buf)
+        return self.local.view
+
+    def advise(self, fd, advice):
+        """posix_fadvise quand la plateforme le fournit (Linux), sinon rien"""
+        if not hasattr(os, 'posix_fadvise'):
+            return
+        try:
+            os.posix_fadvise(fd, 0, 0, advice)
+        except OSError:
+            pass
+
+    def can_mmap(self, size, st):
+        """mmap seulement pour les gros fichiers sur disque local identifié"""
+        if not self.use_mmap or st is None or size < self.mmap_threshold:
+            return False
+        return self.device(st.st_dev)['kind'] != 'unknown'
+
+    def hash_full(self, path, st=None):
+        """Empreinte de tout le contenu, retourne (Fingerprint, octets lus)"""
+        started = time.time()
+        hash_obj = new_hasher(self.algo)
+        read = 0
+        with open(path, 'rb', buffering=0) as f:
+            fd = f.fileno()
+            if self.drop_cache:
+                self.advise(fd, getattr(os, 'POSIX_FADV_SEQUENTIAL', 0))
+
+            size = st.st_size if st is not None else os.fstat(fd).st_size
+            if self.can_mmap(size, st):
+                read = self.hash_mmap(fd, hash_obj)
+            else:
+                view = self.buffer()
+                while True:
+                    n = f.readinto(view)
+                    if not n:
+                        break
+                    hash_obj.update(view[:n])
+                    read += n
+
+            # Les pages lues ne serviront plus: les rendre au cache des autres
+            if self.drop_cache:
+                self.advise(fd, getattr(os, 'POSIX_FADV_DONTNEED', 0))
+
+        if st is not None:
+            self.account(st.st_dev, read, time.time() - started)
+        return Fingerprint(self.algo, 'full', hash_obj.digest()), read
+
+    def hash_mmap(self, fd, hash_obj):
+        """Hache un fichier projeté en mémoire, par tranches de chunk_size"""
+        read = 0
+        with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                for offset in range(0, len(mapped), self.chunk_size):
+                    block = view[offset:offset + self.chunk_size]
+                    hash_obj.update(block)
+                    read += len(block)
+                    block.release()
+            finally:
+                view.release()
+        return read
+
+    def hash_head_tail(self, path, block_size, st=None):
+        """Empreinte du premier et du dernier bloc, retourne (Fingerprint, octets lus)"""
+        started = time.time()
+        hash_obj = new_hasher(self.algo)
+        buf = bytearray(block_size)
+        view = memoryview(buf)
+        with open(path, 'rb', buffering=0) as f:
+            head = f.readinto(view)
+            hash_obj.update(view[:head])
+            f.seek(-block_size, os.SEEK_END)
+            tail = f.readinto(view)
+            hash_obj.update(view[:tail])
+
+            if self.drop_cache:
+                self.advise(f.fileno(), getattr(os, 'POSIX_FADV_DONTNEED', 0))
+
+        read = head + tail
+        if st is not None:
+            self.account(st.st_dev, read, time.time() - started)
+        return Fingerprint(self.algo, coverage('headtail', block_size), hash_obj.digest()), read
+
+    def throughput(self, dev):
+        """Débit moyen d'un flux de lecture sur le périphérique, en MB/s"""
+        info = self.devices.get(dev)
+        if not info or info['seconds'] <= 0:
+            return 0.0
+        return info['bytes'] / info['seconds'] / (1024 * 1024)
+
+    def print_stats(self, indent="  "):
+        """Affiche le volume lu et le débit par périphérique"""
+        for dev, info in self.devices.items():
+            if not info['files']:
+                continue
+            try:
+                label = f"{os.major(dev)}:{os.minor(dev)}"
+            except (AttributeError, ValueError):
+                label = str(dev)
+            print(f"{indent}💽 {info['kind']} ({label}): {info['files']} lectures, "
+                  f"{self.format_size(info['bytes'])} à {self.throughput(dev):.1f} MB/s "
+                  f"par flux ({info['workers']} flux)")
+
+    def format_size(self, size_bytes):
+        """Formate une taille en bytes"""
+        for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
+            if size_bytes < 1024:
+                return f"{size_bytes:.1f} {unit}"
+            size_bytes /= 1024
+        return f"{size_bytes:.1f} PB"
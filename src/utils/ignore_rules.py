@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Ignore Rules - Règles d'exclusion façon .gitignore, compilées une seule fois
+Partagées par tous les parcours pour l'élagage; extensibles par l'utilisateur
+"""
+
+import os
+import re
+import sys
+from pathlib import Path
+
+# Ajouter le répertoire parent pour les imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.platform_detector import PlatformDetector
+
+GLOB_CHARS = set('*?[')
+
+def user_rules_path():
+    """Fichier de règles de l'utilisateur (syntaxe .gitignore), ajouté à chaque jeu de règles"""
+    return PlatformDetector().get_config_directory() / 'SmartOptimizer' / 'ignore'
+
+def load_user_patterns(path=None):
+    """Motifs du fichier utilisateur, liste vide s'il n'existe pas"""
+    try:
+        with open(path or user_rules_path(), 'r', encoding='utf-8') as f:
+            return f.read().splitlines()
+    except OSError:
+        return []
+
+def translate(pattern):
+    """Motif glob → expression régulière ('*' et '?' ne traversent pas '/', '**' si)"""
+    out = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith('**/', i):
+            out.append('(?:[^/]*/)*')
+            i += 3
+        elif pattern.startswith('**', i):
+            out.append('.*')
+            i += 2
+        elif pattern[i] == '*':
+            out.append('[^/]*')
+            i += 1
+        elif pattern[i] == '?':
+            out.append('[^/]')
+            i += 1
+        elif pattern[i] == '[' and pattern.find(']', i + 1) != -1:
+            end = pattern.find(']', i + 1)
+            body = pattern[i + 1:end].replace('\\', '\\\\')
+            if body.startswith('!'):
+                body = '^' + body[1:]
+            out.append(f"[{body}]")
+            i = end + 1
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return ''.join(out)
+
+class RuleBucket:
+    """Règles de même nature (exclusion ou réintégration, dossiers seuls ou tout)"""
+
+    def __init__(self):
+        self.names = set()     # Noms exacts: test en O(1)
+        self.name_globs = []   # Motifs sans '/': comparés au seul nom
+        self.path_globs = []   # Motifs avec '/': ancrés à la racine du parcours
+        self.name_regex = None
+        self.path_regex = None
+
+    def compile(self):
+        if self.name_globs:
+            self.name_regex = re.compile('(?:' + '|'.join(self.name_globs) + r')\Z')
+        if self.path_globs:
+            self.path_regex = re.compile('(?:' + '|'.join(self.path_globs) + r')\Z')
+
+    def match_name(self, name):
+        return name in self.names or (self.name_regex is not None and self.name_regex.match(name) is not None)
+
+    def match_path(self, relative):
+        return self.path_regex is not None and self.path_regex.match(relative) is not None
+
+class IgnoreRules:
+    """
+    Jeu de règles compilé
+
+    Syntaxe .gitignore: un motif par ligne, '#' pour un commentaire, '/' final
+    pour ne viser que les dossiers, '!' pour réintégrer. Un motif sans '/' vise
+    un nom à n'importe quelle profondeur; un motif contenant '/' est ancré à la
+    racine du parcours, composant par composant ('Library/Caches' ne vise pas
+    'Library/CachesOld'). Contrairement à git, une réintégration l'emporte
+    quel que soit l'ordre des lignes.
+    """
+
+    def __init__(self, patterns=(), root=None, user_config=True):
+        """
+        Args:
+            patterns: motifs propres à l'outil
+            root: racine du parcours, pour les motifs ancrés
+            user_config: ajouter les motifs du fichier utilisateur (user_rules_path())
+        """
+        self.root = str(Path(root)) if root is not None else None
+        self.patterns = list(patterns) + (load_user_patterns() if user_config else [])
+        self.buckets = {}     # (réintégration, dossiers seuls) → RuleBucket
+        self.name_cache = {}  # (nom, dossier?) → décision sur le seul nom
+        self.compile()
+
+    def compile(self):
+        """Répartit les motifs par nature et les compile en une expression par catégorie"""
+        for key in [(False, False), (False, True), (True, False), (True, True)]:
+            self.buckets[key] = RuleBucket()
+
+        for line in self.patterns:
+            pattern = line.strip()
+            if not pattern or pattern.startswith('#'):
+                continue
+
+            negate = pattern.startswith('!')
+            if negate:
+                pattern = pattern[1:]
+            dir_only = pattern.endswith('/')
+            pattern = pattern.rstrip('/')
+            if not pattern:
+                continue
+
+            bucket = self.buckets[(negate, dir_only)]
+            if '/' in pattern:
+                bucket.path_globs.append(translate(pattern.lstrip('/')))
+            elif GLOB_CHARS & set(pattern):
+                bucket.name_globs.append(translate(pattern))
+            else:
+                bucket.names.add(pattern)
+
+        for bucket in self.buckets.values():
+            bucket.compile()
+
+        self.has_path_rules = any(b.path_regex is not None for b in self.buckets.values())
+        self.has_negations = any(
+            b.names or b.name_regex is not None or b.path_regex is not None
+            for (negate, dir_only), b in self.buckets.items() if negate
+        )
+
+    def hit(self, negate, relative, name, is_dir):
+        """Une règle de la nature demandée vise-t-elle cette entrée ?"""
+        key = (negate, name, is_dir)
+        by_name = self.name_cache.get(key)
+        if by_name is None:
+            by_name = self.buckets[(negate, False)].match_name(name) or (
+                is_dir and self.buckets[(negate, True)].match_name(name))
+            if len(self.name_cache) > 100000:
+                self.name_cache.clear()
+            self.name_cache[key] = by_name
+        if by_name:
+            return True
+
+        if relative is None or not self.has_path_rules:
+            return False
+        return self.buckets[(negate, False)].match_path(relative) or (
+            is_dir and self.buckets[(negate, True)].match_path(relative))
+
+    def match(self, relative, name, is_dir=True):
+        """
+        Décision pour une entrée
+
+        Args:
+            relative: chemin relatif à la racine (séparateur '/'), None si inconnu
+            name: nom de l'entrée
+        """
+        if not self.hit(False, relative, name, is_dir):
+            return False
+        return not (self.has_negations and self.hit(True, relative, name, is_dir))
+
+    def relative(self, path):
+        """Chemin relatif à la racine avec '/', None hors racine ou sans racine"""
+        if self.root is None:
+            return None
+        path = str(path)
+        if path == self.root:
+            return ''
+        if path.startswith(self.root) and path[len(self.root):len(self.root) + 1] == os.sep:
+            return path[len(self.root) + 1:].replace(os.sep, '/')
+        if self.root.endswith(os.sep) and path.startswith(self.root):
+            return path[len(self.root):].replace(os.sep, '/')
+        return None
+
+    def join(self, parent, name):
+        return f"{parent}/{name}" if parent else name
+
+    def ignored(self, path, is_dir=True):
+        """Décision pour un chemin complet"""
+        path = Path(path)
+        return self.match(self.relative(path), path.name, is_dir)
+
+    def ignored_within(self, path, is_dir=False):
+        """Vrai si path ou l'un de ses dossiers parents sous la racine est exclu"""
+        relative = self.relative(path)
+        if relative is None:
+            return self.ignored(path, is_dir)
+
+        parts = relative.split('/') if relative else []
+        current = ''
+        for index, part in enumerate(parts):
+            current = self.join(current, part)
+            last = index == len(parts) - 1
+            if self.match(current, part, is_dir if last else True):
+                return True
+        return False
+
+    def prune(self, root, dirs, files=None):
+        """Élague dirs sur place (signature des fonctions prune de ParallelScanner et os.walk)"""
+        parent = self.relative(root) if self.has_path_rules else None
+        dirs[:] = [d for d in dirs if not self.match(self.join(parent, d) if parent is not None else None, d, True)]
+
+    def keep_files(self, root, files):
+        """Fichiers de root non exclus"""
+        parent = self.relative(root) if self.has_path_rules else None
+        return [f for f in files if not self.match(self.join(parent, f) if parent is not None else None, f, False)]
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Merkle Tree - Empreinte de contenu par répertoire
+Calcul ascendant sur l'instantané partagé: deux sous-arbres identiques ont la même empreinte
+"""
+
+import os
+import sys
+import hashlib
+from pathlib import Path
+from collections import defaultdict
+
+# Ajouter le répertoire parent pour les imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.fs_snapshot import get_snapshot
+from utils.hash_service import HashService
+
+class MerkleTree:
+    """
+    Empreinte de chaque répertoire à partir des noms et empreintes de ses enfants
+
+    Un fichier contribue par son nom, sa taille et son empreinte de contenu; un
+    sous-répertoire par son nom et sa propre empreinte. Le nom du répertoire
+    lui-même n'entre pas dans son empreinte: une copie renommée reste détectée.
+    Un sous-arbre incomplet (fichier non téléchargé, entrée illisible) n'a pas
+    d'empreinte et n'est jamais déclaré identique.
+    """
+
+    def __init__(self, fingerprint, hasher=None, ignore=()):
+        """
+        Args:
+            fingerprint: fonction (chemin, taille, stat) → Fingerprint ou None
+            hasher: HashService utilisé pour lire les fichiers en parallèle
+            ignore: noms exclus de l'empreinte (métadonnées propres à chaque service)
+        """
+        self.fingerprint = fingerprint
+        self.hasher = hasher or HashService()
+        self.ignore = frozenset(ignore)
+        self.nodes = {}   # répertoire → (empreinte ou None, taille, fichiers)
+        self.files = {}   # fichier → (taille, Fingerprint ou None)
+
+    def build(self, top):
+        """Calcule l'empreinte de top et de tous ses sous-répertoires (mémorisées)"""
+        snapshot = get_snapshot(top)
+        order = []
+        for root, dirs, files in snapshot.walk(top):
+            order.append(root)
+            # Les sous-arbres déjà calculés ne sont pas reparcourus
+            dirs[:] = [d for d in dirs if os.path.join(root, d) not in self.nodes]
+
+        # Empreintes de contenu en une seule série de lectures parallèles
+        sizes = {}
+        for root in order:
+            record = snapshot.directories[root]
+            for name in record['files']:
+                item = record['entries'][name]
+                path = os.path.join(root, name)
+                if name not in self.ignore and not item.is_symlink and path not in self.files:
+                    sizes[path] = item.size
+
+        digests = self.hasher.run(list(sizes), lambda path, st: self.fingerprint(path, sizes[path], st))
+        for path, size in sizes.items():
+            self.files[path] = (size, digests.get(path))
+
+        # Ordre préfixe inversé: chaque enfant est traité avant son parent
+        for root in reversed(order):
+            self.nodes[root] = self.combine(root, snapshot.directories[root])
+
+        return self.nodes.get(str(Path(top)))
+
+    def combine(self, root, record):
+        """Empreinte d'un répertoire à partir de celles de ses enfants"""
+        entries = record['entries']
+        complete = not record['errors']
+        children = []
+        size = files = 0
+
+        for name in record['files'] + record['dirs']:
+            if name in self.ignore:
+                continue
+            path = os.path.join(root, name)
+            item = entries[name]
+
+            if item.is_symlink:
+                # Un lien compte par sa cible, jamais suivie
+                try:
+                    children.append((name, b'l' + os.fsencode(os.readlink(path))))
+                except OSError:
+                    complete = False
+                continue
+
+            if item.is_dir:
+                digest, child_size, child_files = self.nodes.get(path, (None, 0, 0))
+                size += child_size
+                files += child_files
+                if digest is None:
+                    complete = False
+                else:
+                    children.append((name, b'd' + digest))
+                continue
+
+            file_size, fingerprint = self.files.get(path, (item.size, None))
+            size += file_size
+            files += 1
+            if fingerprint is None:
+                complete = False
+            else:
+                children.append((name, b'f' + file_size.to_bytes(8, 'little') + fingerprint.digest))
+
+        if not complete:
+            return (None, size, files)
+
+        hasher = hashlib.blake2b(digest_size=16)
+        for name, value in sorted(children):
+            encoded = os.fsencode(name)
+            # Longueurs préfixées: aucune ambiguïté entre noms et condensés
+            hasher.update(len(encoded).to_bytes(4, 'little') + encoded)
+            hasher.update(len(value).to_bytes(4, 'little') + value)
+        return (hasher.digest(), size, files)
+
+    def duplicates(self, min_size=1):
+        """
+        Sous-arbres identiques, les plus hauts seulement
+
+        Un groupe dont chaque membre est contenu dans un parent lui-même dupliqué
+        est déjà couvert par le groupe du parent et n'est pas répété.
+
+        Returns:
+            liste de dicts {'paths', 'size', 'files', 'wasted'} triée par espace gaspillé
+        """
+        by_digest = defaultdict(list)
+        for path, (digest, size, files) in self.nodes.items():
+            if digest is not None and files and size >= min_size:
+                by_digest[digest].append(path)
+
+        duplicated = {digest for digest, paths in by_digest.items() if len(paths) > 1}
+
+        groups = []
+        for digest, paths in by_digest.items():
+            if len(paths) < 2:
+                continue
+
+            uncovered = [p for p in paths if self.nodes.get(os.path.dirname(p), (None,))[0] not in duplicated]
+            if not uncovered:
+                continue
+
+            # Les copies couvertes sont comptées avec leur parent
+            copies = len(uncovered) if len(uncovered) < len(paths) else len(paths) - 1
+            digest, size, files = self.nodes[paths[0]]
+            groups.append({'paths': sorted(paths), 'size': size, 'files': files, 'wasted': size * copies})
+
+        return sorted(groups, key=lambda g: g['wasted'], reverse=True)
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Parallel Scanner - Parcours parallèle d'arborescences
+Listages concurrents par vol de tâches, résultats diffusés au fil de l'eau comme os.walk
+"""
+
+import os
+import queue
+import threading
+from collections import deque
+from pathlib import Path
+
+class ScanState:
+    """État partagé entre les workers d'un parcours"""
+
+    def __init__(self, workers, queue_size):
+        self.deques = [deque() for _ in range(workers)]
+        self.condition = threading.Condition()
+        self.results = queue.Queue(maxsize=queue_size)
+        self.pending = 0          # Répertoires planifiés pas encore listés
+        self.visited = {}         # (st_dev, st_ino) → premier chemin de chaque répertoire
+        self.stopped = False
+        self.error = None
+
+class ParallelScanner:
+    def __init__(self, workers=None, per_root=None, queue_size=1024):
+        # Listage limité par la latence (montages réseau, FUSE): plus de threads que de coeurs
+        self.workers = workers or min(32, (os.cpu_count() or 1) * 4)
+        self.per_root = {str(Path(k)): v for k, v in (per_root or {}).items()}
+        self.queue_size = queue_size
+        self.lock = threading.Lock()
+        self.errors = 0
+        self.links = []   # (lien vers un dossier, cible résolue), relevés sans être suivis
+        self.loops = []   # (chemin, chemin déjà parcouru): même répertoire atteint deux fois
+
+    def workers_for(self, root):
+        """Concurrence configurée pour la racine (ou son plus proche parent configuré)"""
+        path = Path(root)
+        for candidate in [path] + list(path.parents):
+            if str(candidate) in self.per_root:
+                return self.per_root[str(candidate)]
+        return self.workers
+
+    def scan(self, root, prune=None, workers=None, stats=False):
+        """
+        Parcourt root en parallèle et produit des tuples (root, dirs, files)
+
+        Args:
+            root: racine du parcours
+            prune: fonction (root, dirs, files) appliquée dans le worker avant la
+                   descente; elle élague avec dirs[:] = ... exactement comme sous os.walk
+                   (et peut aussi filtrer files[:] avant le relevé des stats)
+            workers: nombre de listages simultanés (sinon selon per_root)
+            stats: produire (root, dirs, files, stats), stats associant à chaque
+                   fichier régulier son os.stat_result (voir file_stats)
+
+        Les répertoires sont produits dans l'ordre où leur listage se termine.
+        """
+        count = max(1, workers or self.workers_for(root))
+        state = ScanState(count, self.queue_size)
+        state.deques[0].append(str(root))
+        state.pending = 1
+        self.errors = 0
+        self.links = []
+        self.loops = []
+
+        threads = [
+            threading.Thread(target=self.worker, args=(state, index, prune, stats), daemon=True)
+            for index in range(count)
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                item = state.results.get()
+                if item is None:
+                    break
+                yield item
+        finally:
+            # Arrêt anticipé du consommateur (break) ou fin normale
+            with state.condition:
+                state.stopped = True
+                state.condition.notify_all()
+            for thread in threads:
+                thread.join()
+
+        if state.error:
+            raise state.error
+
+    def files(self, root, prune=None, keep=None, workers=None):
+        """
+        Fichiers réguliers sous root: tuples (Path, os.stat_result)
+
+        Chaque fichier est stat-é une seule fois, dans un worker; le résultat
+        accompagne le chemin, l'appelant n'a plus besoin d'is_file() ni de stat().
+
+        Args:
+            keep: fonction (root, files) → noms à garder, appliquée avant tout stat
+        """
+        def prune_all(current, dirs, files):
+            if prune:
+                prune(current, dirs, files)
+            if keep:
+                files[:] = keep(current, files)
+
+        for current, dirs, files, stats in self.scan(root, prune=prune_all, workers=workers, stats=True):
+            base = Path(current)
+            for name in files:
+                st = stats.get(name)
+                if st is not None:
+                    yield base / name, st
+
+    def worker(self, state, index, prune, stats=False):
+        """Liste les répertoires de sa file, puis vole ceux des autres workers"""
+        while True:
+            path = self.next_task(state, index)
+            if path is None:
+                return
+
+            children = []
+            try:
+                result, links = self.list_directory(path) if self.first_visit(state, path) else (None, set())
+                if result is not None:
+                    root, dirs, files, entries = result
+                    if prune:
+                        prune(root, dirs, files)
+                    if stats:
+                        self.emit(state, (root, dirs, files, self.file_stats(entries, files)))
+                    else:
+                        self.emit(state, (root, dirs, files))
+                    # Comme os.walk: les liens vers des dossiers ne sont pas suivis
+                    children = [os.path.join(root, d) for d in dirs if d not in links]
+            except Exception as e:
+                with state.condition:
+                    state.error = state.error or e
+                    state.stopped = True
+
+            with state.condition:
+                # Nouvelles tâches en tête de sa propre file (profondeur d'abord, localité)
+                state.deques[index].extend(reversed(children))
+                state.pending += len(children) - 1
+                finished = state.pending == 0 or state.stopped
+                state.condition.notify_all()
+
+            if finished:
+                self.emit(state, None, force=True)
+
+    def next_task(self, state, index):
+        """Prend la dernière tâche de sa file, sinon la plus ancienne d'un autre worker"""
+        with state.condition:
+            while True:
+                if state.stopped:
+                    return None
+
+                own = state.deques[index]
+                if own:
+                    return own.pop()
+
+                for offset in range(1, len(state.deques)):
+                    victim = state.deques[(index + offset) % len(state.deques)]
+                    if victim:
+                        return victim.popleft()
+
+                if state.pending == 0:
+                    return None
+                state.condition.wait()
+
+    def first_visit(self, state, path):
+        """
+        Enregistre un répertoire par (st_dev, st_ino); faux s'il a déjà été parcouru
+
+        Un montage lié ou une jonction peut ramener vers un répertoire déjà vu:
+        sans ce contrôle le parcours compterait deux fois, voire bouclerait.
+        """
+        try:
+            st = os.stat(path)
+        except OSError:
+            return True  # Le listage signalera l'erreur
+        if not st.st_ino:
+            return True  # Pas d'inode fiable sur ce système de fichiers
+
+        key = (st.st_dev, st.st_ino)
+        with state.condition:
+            first = state.visited.get(key)
+            if first is None:
+                state.visited[key] = path
+                return True
+        with self.lock:
+            self.loops.append((path, first))
+        return False
+
+    def list_directory(self, path):
+        """Liste un répertoire: ((root, dirs, files, DirEntry des fichiers), liens vers des dossiers)"""
+        dirs = []
+        files = []
+        entries = {}
+        links = set()
+
+        try:
+            with os.scandir(path) as iterator:
+                for entry in iterator:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+
+                    if is_dir:
+                        dirs.append(entry.name)
+                        if entry.is_symlink():
+                            links.add(entry.name)
+                            with self.lock:
+                                self.links.append((entry.path, os.path.realpath(entry.path)))
+                    else:
+                        files.append(entry.name)
+                        entries[entry.name] = entry
+        except OSError:
+            with self.lock:
+                self.errors += 1
+            return None, links
+
+        return (path, dirs, files, entries), links
+
+    def file_stats(self, entries, names):
+        """
+        os.stat_result des fichiers réguliers parmi names
+
+        Le type vient du DirEntry (d_type sous Unix, sans appel système); seul
+        stat() interroge le disque, une fois, et les liens sont suivis comme par
+        Path.is_file(). Sous Windows ce stat est même fourni par le listage.
+        """
+        stats = {}
+        for name in names:
+            entry = entries.get(name)
+            if entry is None:
+                continue
+            try:
+                if entry.is_file():
+                    stats[name] = entry.stat()
+            except OSError:
+                with self.lock:
+                    self.errors += 1
+        return stats
+
+    def emit(self, state, item, force=False):
+        """Transmet un résultat au consommateur sans bloquer un arrêt anticipé"""
+        while force or not state.stopped:
+            try:
+                state.results.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                if force and state.stopped:
+                    return
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Path Index - Index d'inclusion de chemins par arbre de composants
+Répond à « quelles racines contiennent X » et « quelles racines sont sous Y » en O(profondeur)
+"""
+
+from pathlib import Path
+
+class PathIndex:
+    """
+    Arbre des composants de chemin (un noeud par dossier)
+
+    Contrairement à str.startswith, la comparaison se fait composant par
+    composant: /a/Photos ne contient pas /a/Photos2.
+    """
+
+    def __init__(self, items=()):
+        """
+        Args:
+            items: tuples (chemin, valeur) à indexer
+        """
+        self.root = self.new_node()
+        self.count = 0
+        for path, value in items:
+            self.add(path, value)
+
+    def new_node(self):
+        """Noeud vide: enfants par nom de composant, valeurs attachées à ce chemin"""
+        return {'children': {}, 'values': []}
+
+    def parts(self, path):
+        """Composants du chemin"""
+        return Path(path).parts
+
+    def add(self, path, value=None):
+        """Indexe path; plusieurs valeurs peuvent partager un même chemin"""
+        node = self.root
+        for part in self.parts(path):
+            node = node['children'].setdefault(part, self.new_node())
+        node['values'].append(path if value is None else value)
+        self.count += 1
+
+    def containing(self, path):
+        """Valeurs des chemins indexés qui contiennent path (lui compris), du plus haut au plus profond"""
+        found = list(self.root['values'])
+        node = self.root
+        for part in self.parts(path):
+            node = node['children'].get(part)
+            if node is None:
+                break
+            found.extend(node['values'])
+        return found
+
+    def nearest(self, path):
+        """Valeur du chemin indexé le plus profond qui contient path, None sinon"""
+        best = self.root['values'][-1] if self.root['values'] else None
+        node = self.root
+        for part in self.parts(path):
+            node = node['children'].get(part)
+            if node is None:
+                break
+            if node['values']:
+                best = node['values'][-1]
+        return best
+
+    def under(self, path):
+        """Valeurs des chemins indexés situés sous path (lui compris)"""
+        node = self.root
+        for part in self.parts(path):
+            node = node['children'].get(part)
+            if node is None:
+                return []
+
+        found = []
+        pending = [node]
+        while pending:
+            node = pending.pop()
+            found.extend(node['values'])
+            pending.extend(node['children'].values())
+        return found
+
+    def __contains__(self, path):
+        """Vrai si un chemin indexé contient path"""
+        node = self.root
+        if node['values']:
+            return True
+        for part in self.parts(path):
+            node = node['children'].get(part)
+            if node is None:
+                return False
+            if node['values']:
+                return True
+        return False
+
+    def __len__(self):
+        return self.count
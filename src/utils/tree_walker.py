@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Tree Walker - Parcours unique partagé par plusieurs détecteurs
+Chaque détecteur enregistre ses rappels par dossier et par fichier; un seul listage du disque
+"""
+
+import os
+import sys
+import bisect
+from pathlib import Path
+from collections import defaultdict
+
+# Ajouter le répertoire parent pour les imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.parallel_scanner import ParallelScanner
+
+class TreeWalker:
+    """
+    Parcours parallèle dont chaque répertoire est présenté à tous les visiteurs
+
+    Les rappels s'exécutent dans le thread appelant, dans l'ordre où les
+    listages se terminent: ils n'ont besoin d'aucun verrou. Un dossier
+    écarté par skip n'est ni visité ni parcouru, mais reste visible dans la
+    liste dirs de son parent (un détecteur peut y repérer node_modules ou
+    venv) et est relevé dans pruned: qui a besoin de sa taille la mesure à
+    part, pour les seuls dossiers qui l'intéressent.
+    """
+
+    def __init__(self, skip=None, scanner=None, measure=False):
+        """
+        Args:
+            skip: fonction (Path) → bool, vrai pour un dossier à ignorer avec tout son contenu
+            scanner: ParallelScanner à utiliser (un nouveau par défaut)
+            measure: agréger pendant le parcours la taille et le nombre de fichiers
+                     de chaque sous-arbre (dans sizes), dossiers ignorés exclus
+        """
+        self.skip = skip
+        self.scanner = scanner or ParallelScanner()
+        self.measure = measure
+        self.directory_visitors = []
+        self.file_visitors = defaultdict(list)   # extension ('' = toutes) → rappels
+        self.stats = {'directories': 0, 'files': 0}
+        self.sizes = {}   # dossier (str) → (octets, fichiers) de son sous-arbre parcouru
+        self.pruned = []   # dossiers (str) écartés par skip, triés en fin de parcours
+
+    def on_directory(self, callback):
+        """Enregistre callback(root_path, dirs, files), appelé une fois par dossier"""
+        self.directory_visitors.append(callback)
+
+    def on_file(self, callback, extensions=None):
+        """
+        Enregistre callback(root_path, name, st), appelé pour chaque fichier
+
+        st est l'os.stat_result (liens suivis) relevé par le parcours en mode
+        measure; None hors de ce mode, ou pour ce qui n'est pas un fichier
+        régulier (lien cassé, fichier disparu pendant le parcours).
+
+        Args:
+            extensions: extensions en minuscules avec le point ('.py', ...); toutes si None
+        """
+        for extension in (extensions or ('',)):
+            self.file_visitors[extension].append(callback)
+
+    def walk(self, top):
+        """Parcourt top une seule fois en présentant chaque dossier et fichier aux visiteurs"""
+        top = Path(top)
+        if self.skip and self.skip(top):
+            return self.stats
+
+        listed = {}   # dossier → sous-dossiers avant élagage
+        self.pruned = []
+
+        def prune(root, dirs, files):
+            listed[root] = list(dirs)
+            if self.skip:
+                kept = [d for d in dirs if not self.skip(Path(root) / d)]
+                if len(kept) < len(dirs):
+                    self.pruned.extend(os.path.join(root, d) for d in dirs if d not in kept)
+                    dirs[:] = kept
+
+        every_file = self.file_visitors.get('', [])
+        by_extension = {ext: callbacks for ext, callbacks in self.file_visitors.items() if ext}
+        own = {}   # dossier → [octets, fichiers] de ses seuls fichiers
+
+        for root, dirs, files, *stats in self.scanner.scan(top, prune=prune, stats=self.measure):
+            root_path = Path(root)
+            dirs = listed.pop(root, dirs)
+
+            if self.measure:
+                file_stats = stats[0]
+                own[root] = [sum(st.st_size for st in file_stats.values()), len(file_stats)]
+
+            self.stats['directories'] += 1
+            self.stats['files'] += len(files)
+
+            for callback in self.directory_visitors:
+                callback(root_path, dirs, files)
+
+            if every_file or by_extension:
+                file_stats = stats[0] if stats else {}
+                for name in files:
+                    st = file_stats.get(name)
+                    for callback in by_extension.get(os.path.splitext(name)[1].lower(), ()):
+                        callback(root_path, name, st)
+                    for callback in every_file:
+                        callback(root_path, name, st)
+
+        if self.measure:
+            self.sizes = self.aggregate(own)
+        self.pruned.sort()
+        return self.stats
+
+    def pruned_within(self, path):
+        """Dossiers écartés par skip situés dans path, path compris (après walk)"""
+        path = str(path)
+        index = bisect.bisect_left(self.pruned, path)
+        found = [path] if self.pruned[index:index + 1] == [path] else []
+        # Chemins de même préfixe contigus une fois triés
+        prefix = path.rstrip(os.sep) + os.sep
+        for pruned in self.pruned[bisect.bisect_left(self.pruned, prefix):]:
+            if not pruned.startswith(prefix):
+                break
+            found.append(pruned)
+        return found
+
+    def aggregate(self, own):
+        """Totaux par sous-arbre, de bas en haut: chaque enfant s'ajoute à son parent avant que celui-ci ne remonte"""
+        for root in sorted(own, key=lambda root: root.count(os.sep), reverse=True):
+            parent = own.get(os.path.dirname(root))
+            if parent is not None and parent is not own[root]:
+                parent[0] += own[root][0]
+                parent[1] += own[root][1]
+        return {root: tuple(totals) for root, totals in own.items()}
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Tests de l'ActionExecutor
+Reprise après interruption, revérification avant suppression, annulation puis reprise
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from utils.action_executor import ActionExecutor, write_plan
+from utils.backup_manager import BackupManager
+from utils.duplicate_finder import DuplicateFinder
+from utils.fingerprint import stat_fingerprint
+
+def setup_plan(tmp_path, names=('copy1.txt', 'copy2.txt')):
+    """Un fichier gardé, des copies à supprimer et un déplacement"""
+    finder = DuplicateFinder(use_cache=False)
+    keep = tmp_path / 'keep.txt'
+    keep.write_bytes(b'duplicate' * 100)
+    digest = str(finder.full_hash(keep))
+
+    actions = []
+    for name in names:
+        (tmp_path / name).write_bytes(b'duplicate' * 100)
+        actions.append({'op': 'delete', 'path': tmp_path / name, 'keep': keep,
+                        'keep_expect': stat_fingerprint(keep), 'digest': digest})
+
+    (tmp_path / 'note.txt').write_text('note')
+    actions.append({'op': 'move', 'path': tmp_path / 'note.txt', 'destination': tmp_path / 'notes' / 'note.txt'})
+
+    plan_path = write_plan(tmp_path / 'plan.json', actions)
+    backups = BackupManager(store_dir=tmp_path / 'store', run_name='run', finder=finder)
+    return plan_path, backups
+
+def journal_states(executor):
+    return {action_id: record['state'] for action_id, record in executor.load_journal().items()}
+
+def test_run_applies_plan(tmp_path):
+    plan_path, backups = setup_plan(tmp_path)
+    executor = ActionExecutor(plan_path, backups=backups)
+
+    stats = executor.run()
+
+    assert stats['done'] == 3
+    assert not (tmp_path / 'copy1.txt').exists()
+    assert (tmp_path / 'notes' / 'note.txt').exists()
+    assert (tmp_path / 'keep.txt').exists()
+
+def test_delete_skipped_when_keeper_changed(tmp_path):
+    plan_path, backups = setup_plan(tmp_path)
+    (tmp_path / 'keep.txt').write_bytes(b'something else')
+
+    stats = ActionExecutor(plan_path, backups=backups).run()
+
+    assert stats['skipped'] == 2
+    assert (tmp_path / 'copy1.txt').exists()
+    assert (tmp_path / 'copy2.txt').exists()
+
+def test_delete_without_keeper_refused(tmp_path):
+    (tmp_path / 'file.txt').write_text('data')
+    plan_path = write_plan(tmp_path / 'plan.json', [{'op': 'delete', 'path': tmp_path / 'file.txt'}])
+    backups = BackupManager(store_dir=tmp_path / 'store', run_name='run', finder=DuplicateFinder(use_cache=False))
+
+    stats = ActionExecutor(plan_path, backups=backups).run()
+
+    assert stats['skipped'] == 1
+    assert (tmp_path / 'file.txt').exists()
+
+def interrupt_after_begin(executor, actions):
+    """Simule un arrêt brutal: intentions journalisées, résultats jamais écrits"""
+    with open(executor.journal_path, 'a', encoding='utf-8') as journal:
+        executor.append(journal, [executor.begin_record(action) for action in actions])
+
+def test_interrupted_delete_reconciled_with_manifest(tmp_path):
+    plan_path, backups = setup_plan(tmp_path)
+    executor = ActionExecutor(plan_path, backups=backups)
+    actions = executor.load_plan()
+    interrupt_after_begin(executor, actions[:2])
+
+    # copy1 sauvegardé et supprimé avant l'arrêt; copy2 supprimé sans sauvegarde
+    backups.backup_and_remove(tmp_path / 'copy1.txt')
+    (tmp_path / 'copy2.txt').unlink()
+
+    stats = ActionExecutor(plan_path, backups=backups).run()
+
+    states = executor.load_journal()
+    assert states[0]['state'] == 'done'
+    assert states[0]['backup_run'] == 'run'
+    assert Path(states[0]['backup']).exists()
+    assert states[1]['state'] == 'failed'
+    assert states[2]['state'] == 'done'
+    assert stats == {'done': 2, 'skipped': 0, 'failed': 1, 'already': 0}
+
+def test_interrupted_action_not_yet_applied_is_replayed(tmp_path):
+    plan_path, backups = setup_plan(tmp_path)
+    executor = ActionExecutor(plan_path, backups=backups)
+    interrupt_after_begin(executor, executor.load_plan())
+
+    stats = ActionExecutor(plan_path, backups=backups).run()
+
+    assert stats['done'] == 3
+    assert set(journal_states(executor).values()) == {'done'}
+    assert not (tmp_path / 'copy1.txt').exists()
+
+def test_rollback_then_rerun(tmp_path):
+    plan_path, backups = setup_plan(tmp_path)
+    ActionExecutor(plan_path, backups=backups).run()
+
+    executor = ActionExecutor(plan_path, backups=backups)
+    assert executor.rollback() == 3
+    assert (tmp_path / 'copy1.txt').read_bytes() == b'duplicate' * 100
+    assert (tmp_path / 'note.txt').exists()
+    assert not (tmp_path / 'notes' / 'note.txt').exists()
+
+    # Annulé: un simple run ne rejoue rien
+    stats = ActionExecutor(plan_path, backups=backups).run()
+    assert stats['already'] == 3
+    assert (tmp_path / 'copy1.txt').exists()
+
+    # Rejeu explicite: les fichiers restaurés sont revérifiés puis traités
+    stats = ActionExecutor(plan_path, backups=backups).run(reapply=True)
+    assert stats['done'] == 3
+    assert not (tmp_path / 'copy1.txt').exists()
+    assert (tmp_path / 'notes' / 'note.txt').exists()
+
+def test_rollback_follows_journal_order(tmp_path):
+    (tmp_path / 'a').write_text('a')
+    # Deux déplacements chaînés: seul l'ordre inverse d'exécution les défait
+    plan_path = write_plan(tmp_path / 'plan.json', [
+        {'op': 'move', 'path': tmp_path / 'b', 'destination': tmp_path / 'c', 'expect': {}},
+        {'op': 'move', 'path': tmp_path / 'a', 'destination': tmp_path / 'b'},
+    ])
+    backups = BackupManager(store_dir=tmp_path / 'store', run_name='run', finder=DuplicateFinder(use_cache=False))
+    executor = ActionExecutor(plan_path, backups=backups)
+
+    # Exécution dans l'ordre 1 puis 0, comme après une reprise
+    with open(executor.journal_path, 'a', encoding='utf-8') as journal:
+        actions = executor.load_plan()
+        for action in (actions[1], actions[0]):
+            executor.move(Path(action['path']), Path(action['destination']))
+            executor.append(journal, [{'id': action['id'], 'state': 'done', 'time': time.time()}])
+    assert (tmp_path / 'c').read_text() == 'a'
+
+    assert executor.rollback() == 2
+    assert (tmp_path / 'a').read_text() == 'a'
+    assert not (tmp_path / 'b').exists()
+    assert not (tmp_path / 'c').exists()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Tests du BackupManager
+Sauvegarde puis restauration, inodes partagés, objets existants vérifiés
+"""
+
+import os
+import sys
+import json
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from utils.backup_manager import BackupManager
+from utils.duplicate_finder import DuplicateFinder
+
+def make_store(tmp_path, run_name='run'):
+    return BackupManager(store_dir=tmp_path / 'store', run_name=run_name, finder=DuplicateFinder(use_cache=False))
+
+def test_backup_and_remove_then_restore(tmp_path):
+    path = tmp_path / 'data' / 'file.txt'
+    path.parent.mkdir()
+    path.write_bytes(b'content' * 100)
+    os.chmod(path, 0o640)
+    os.utime(path, ns=(1_000_000_000_000_000_000, 1_000_000_000_000_000_000))
+
+    store = make_store(tmp_path)
+    target = store.backup_and_remove(path)
+
+    assert not path.exists()
+    assert target.read_bytes() == b'content' * 100
+    entries = store.read_manifest(store.manifest_path)
+    assert [entry['path'] for entry in entries] == [str(path.absolute())]
+
+    assert store.restore() == 1
+    assert path.read_bytes() == b'content' * 100
+    assert os.stat(path).st_mode & 0o777 == 0o640
+    assert os.stat(path).st_mtime_ns == 1_000_000_000_000_000_000
+
+def test_shared_inode_is_copied_not_moved(tmp_path):
+    path = tmp_path / 'file.txt'
+    other = tmp_path / 'other_name.txt'
+    path.write_bytes(b'shared' * 100)
+    os.link(path, other)
+
+    store = make_store(tmp_path)
+    target = store.backup_and_remove(path)
+
+    # L'objet ne doit pas être l'inode encore joignable par l'autre lien
+    assert not path.exists()
+    assert os.stat(target).st_ino != os.stat(other).st_ino
+    other.write_bytes(b'modified')
+    assert target.read_bytes() == b'shared' * 100
+
+    assert store.restore() == 1
+    assert path.read_bytes() == b'shared' * 100
+
+def test_existing_object_reused_only_if_valid(tmp_path):
+    first = tmp_path / 'first.txt'
+    second = tmp_path / 'second.txt'
+    first.write_bytes(b'same' * 100)
+    second.write_bytes(b'same' * 100)
+
+    store = make_store(tmp_path)
+    target = store.backup_and_remove(first)
+    assert store.backup_and_remove(second) == target
+    assert store.stats['reused'] == 1
+
+    # Objet altéré dans le magasin: jamais utilisé pour justifier une suppression
+    third = tmp_path / 'third.txt'
+    third.write_bytes(b'same' * 100)
+    os.chmod(target, 0o644)
+    target.write_bytes(b'corrupted')
+    store.backup_and_remove(third)
+
+    assert store.stats['reused'] == 1
+    assert target.read_bytes() == b'same' * 100
+
+def test_manifest_only_lists_existing_objects(tmp_path):
+    path = tmp_path / 'file.txt'
+    path.write_bytes(b'abc' * 100)
+
+    store = make_store(tmp_path)
+    store.backup_and_remove(path)
+
+    with open(store.manifest_path, encoding='utf-8') as f:
+        for line in f:
+            entry = json.loads(line)
+            assert store.lookup(entry['path']) is not None
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Tests de la détection des synchronisations récursives
+Cycles trouvés par Tarjan et décrits par de vrais arcs, liens symboliques jamais suivis
+"""
+
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from analyzers.cloud_nesting_analyzer import CloudNestingAnalyzer
+from utils.fs_snapshot import clear_snapshots
+
+def make_analyzer(tmp_path, services, monkeypatch):
+    # Cache d'empreintes de l'analyseur créé sous ce HOME de test
+    monkeypatch.setenv('HOME', str(tmp_path / 'home'))
+    clear_snapshots()
+    analyzer = CloudNestingAnalyzer(home_path=tmp_path)
+    for name in services:
+        path = tmp_path / name
+        path.mkdir(exist_ok=True)
+        analyzer.cloud_services[name] = {'paths': [path]}
+        analyzer.cloud_index.add(path, (name, path))
+    return analyzer
+
+def cycles(analyzer):
+    return [issue for issue in analyzer.nesting_issues if issue['type'] == 'recursive_sync']
+
+def assert_real_cycle(graph, cycle):
+    assert cycle[0] == cycle[-1]
+    for source, target in zip(cycle, cycle[1:]):
+        assert target in graph[source]
+
+def test_symlink_loop_between_services(tmp_path, monkeypatch):
+    analyzer = make_analyzer(tmp_path, ('Dropbox', 'OneDrive', 'Other'), monkeypatch)
+    os.symlink(tmp_path / 'OneDrive', tmp_path / 'Dropbox' / 'to_onedrive')
+    os.symlink(tmp_path / 'Dropbox', tmp_path / 'OneDrive' / 'to_dropbox')
+    # Lien à sens unique: aucun cycle pour Other
+    os.symlink(tmp_path / 'Dropbox', tmp_path / 'Other' / 'to_dropbox')
+
+    analyzer.detect_recursive_sync()
+
+    found = cycles(analyzer)
+    assert len(found) == 1
+    assert found[0]['services'] == ['Dropbox', 'OneDrive']
+    assert sorted(found[0]['cycle'][:-1]) == ['Dropbox', 'OneDrive']
+    assert len(analyzer.symlink_edges) == 3
+
+def test_symlink_to_own_parent_is_a_cycle(tmp_path, monkeypatch):
+    analyzer = make_analyzer(tmp_path, ('Dropbox',), monkeypatch)
+    (tmp_path / 'Dropbox' / 'sub').mkdir()
+    os.symlink(tmp_path / 'Dropbox', tmp_path / 'Dropbox' / 'sub' / 'up')
+
+    analyzer.detect_recursive_sync()
+
+    assert [issue['cycle'] for issue in cycles(analyzer)] == [['Dropbox', 'Dropbox']]
+
+def test_cycle_follows_existing_edges(tmp_path, monkeypatch):
+    analyzer = make_analyzer(tmp_path, (), monkeypatch)
+    # Membres de la composante dans un ordre qui n'est pas un chemin du graphe
+    graph = {'A': {'C'}, 'B': {'A'}, 'C': {'B', 'D'}, 'D': {'A'}}
+
+    components = analyzer.strongly_connected_components(graph)
+
+    assert len(components) == 1
+    cycle = analyzer.cycle_through(graph, components[0])
+    assert_real_cycle(graph, cycle)
+    assert cycle in (['A', 'C', 'B', 'A'], ['A', 'C', 'D', 'A'])
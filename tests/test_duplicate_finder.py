@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Tests du DuplicateFinder
+Regroupement par contenu réel: même taille ne suffit pas, liens physiques non comptés
+"""
+
+import io
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from utils.duplicate_finder import DuplicateFinder
+
+def make_finder():
+    # Petits blocs: le début/fin ne couvre pas tout le contenu des fichiers de test
+    return DuplicateFinder(block_size=64, use_cache=False)
+
+def group_files(groups):
+    return sorted(sorted(Path(p).name for p in group['files']) for group in groups.values())
+
+def test_same_size_different_content_not_grouped(tmp_path):
+    head = b'h' * 200
+    tail = b't' * 200
+    (tmp_path / 'a.bin').write_bytes(head + b'A' * 1000 + tail)
+    (tmp_path / 'b.bin').write_bytes(head + b'A' * 1000 + tail)
+    # Même taille, même début et même fin: seule la vérification complète les distingue
+    (tmp_path / 'c.bin').write_bytes(head + b'A' * 500 + b'B' + b'A' * 499 + tail)
+
+    finder = make_finder()
+    groups = finder.find_duplicates(sorted(tmp_path.iterdir()))
+
+    assert group_files(groups) == [['a.bin', 'b.bin']]
+
+def test_stream_duplicates_matches_find_duplicates(tmp_path):
+    for name, content in (('a', b'x' * 3000), ('b', b'x' * 3000), ('c', b'y' * 3000), ('d', b'z' * 10)):
+        (tmp_path / name).write_bytes(content)
+    items = [(path, os.stat(path)) for path in sorted(tmp_path.iterdir())]
+
+    streamed = make_finder().stream_duplicates(items)
+    batch = make_finder().find_duplicates(items)
+
+    assert group_files(streamed) == group_files(batch) == [['a', 'b']]
+
+def test_hardlinks_not_reported_as_duplicates(tmp_path):
+    original = tmp_path / 'original.bin'
+    original.write_bytes(b'data' * 1000)
+    os.link(original, tmp_path / 'link.bin')
+
+    finder = make_finder()
+    groups = finder.find_duplicates(sorted(tmp_path.iterdir()))
+
+    assert groups == {}
+    assert finder.stats['hardlinks']['files'] == 1
+
+def test_hardlink_kept_aside_within_real_group(tmp_path):
+    original = tmp_path / 'a.bin'
+    original.write_bytes(b'data' * 1000)
+    os.link(original, tmp_path / 'a_link.bin')
+    (tmp_path / 'copy.bin').write_bytes(b'data' * 1000)
+
+    groups = make_finder().find_duplicates(sorted(tmp_path.iterdir()))
+
+    assert len(groups) == 1
+    group = next(iter(groups.values()))
+    # Un seul chemin par inode parmi les doublons, l'autre lien à part
+    assert len(group['files']) == 2
+    assert len(group['links']) == 1
+
+def test_revalidate_detects_changed_content(tmp_path):
+    path = tmp_path / 'a.bin'
+    path.write_bytes(b'a' * 1000)
+    (tmp_path / 'b.bin').write_bytes(b'a' * 1000)
+
+    finder = make_finder()
+    groups = finder.find_duplicates(sorted(tmp_path.iterdir()))
+    fingerprint, group = next(iter(groups.items()))
+
+    assert finder.revalidate(path, group['expect'][str(path)], fingerprint)
+    path.write_bytes(b'b' * 1000)
+    assert not finder.revalidate(path, group['expect'][str(path)], fingerprint)
+
+class ShortReads(io.RawIOBase):
+    """Lecteur qui rend peu d'octets par appel, comme certains montages réseau"""
+    def __init__(self, data):
+        self.data = data
+        self.position = 0
+
+    def readinto(self, buffer):
+        chunk = self.data[self.position:self.position + min(7, len(buffer))]
+        buffer[:len(chunk)] = chunk
+        self.position += len(chunk)
+        return len(chunk)
+
+def test_read_block_fills_buffer_despite_short_reads():
+    buffer = bytearray(64)
+    finder = make_finder()
+
+    with memoryview(buffer) as view:
+        assert finder.read_block(ShortReads(b'a' * 100), view) == 64
+    assert bytes(buffer) == b'a' * 64
+
+    with memoryview(buffer) as view:
+        assert finder.read_block(ShortReads(b'b' * 10), view) == 10
+
+def test_compared_group_uses_full_content(tmp_path):
+    for name in ('a', 'b'):
+        (tmp_path / name).write_bytes(b'h' * 100 + b'same' * 500 + b't' * 100)
+    (tmp_path / 'c').write_bytes(b'h' * 100 + b'diff' * 500 + b't' * 100)
+
+    finder = make_finder()
+    groups = finder.find_duplicates(sorted(tmp_path.iterdir()))
+
+    assert finder.stats['compared_groups'] == 1
+    assert group_files(groups) == [['a', 'b']]
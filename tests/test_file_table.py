@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Tests de la FileTable
+Dossiers et types stockés une fois, chemins reconstruits, recherche par dossier
+"""
+
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from utils.file_table import FileTable
+
+def make_table(tmp_path):
+    paths = []
+    for directory, names in (('photos', ('a.jpg', 'b.jpg', 'été.png')), ('docs', ('a.jpg', 'notes.txt'))):
+        (tmp_path / directory).mkdir()
+        for name in names:
+            (tmp_path / directory / name).write_text(name)
+            paths.append(tmp_path / directory / name)
+
+    table = FileTable()
+    rows = [table.add(path, os.stat(path), kind=path.suffix) for path in paths]
+    return table, paths, rows
+
+def test_directories_and_kinds_interned(tmp_path):
+    table, paths, rows = make_table(tmp_path)
+
+    assert len(table) == 5
+    assert table.dirs == [str(tmp_path / 'photos'), str(tmp_path / 'docs')]
+    assert table.kinds == ['.jpg', '.png', '.txt']
+    assert [table.path(row) for row in rows] == [str(path) for path in paths]
+    assert table.name(rows[2]) == 'été.png'
+    assert table.kind_of(rows[3]) == '.jpg'
+    assert table.size[rows[4]] == len('notes.txt')
+
+def test_rows_of_finds_requested_paths(tmp_path):
+    table, paths, rows = make_table(tmp_path)
+
+    found = table.rows_of([paths[3], paths[1], tmp_path / 'docs' / 'missing.txt', tmp_path / 'other' / 'a.jpg'])
+
+    assert found == {str(paths[3]): rows[3], str(paths[1]): rows[1]}
+
+def test_rows_of_index_follows_additions(tmp_path):
+    table, paths, rows = make_table(tmp_path)
+    assert table.rows_of([paths[0]]) == {str(paths[0]): rows[0]}
+
+    extra = tmp_path / 'photos' / 'c.jpg'
+    extra.write_text('c')
+    row = table.add(extra, os.stat(extra), kind='.jpg')
+
+    assert table.rows_of([extra]) == {str(extra): row}
+    assert len(table.kinds) == 3
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Tests du FilesystemSnapshot incrémental
+Répertoires inchangés repris tels quels, répertoires modifiés relistés
+"""
+
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from utils.fs_snapshot import FilesystemSnapshot
+from utils.duplicate_finder import DuplicateFinder
+
+PAST = (1_600_000_000, 1_600_000_000)
+
+def make_tree(tmp_path):
+    for name in ('a', 'b', 'c'):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / f'{name}.txt').write_text(name * 10)
+    # mtimes fixés: seuls les changements du test les font bouger
+    for path in (tmp_path / 'a', tmp_path / 'b', tmp_path / 'c', tmp_path):
+        os.utime(path, PAST)
+
+def test_unchanged_directories_reused(tmp_path):
+    make_tree(tmp_path)
+    first = FilesystemSnapshot(tmp_path)
+    second = FilesystemSnapshot(tmp_path, previous=first.directories)
+
+    assert first.listed == 4
+    assert second.reused == 4
+    assert second.listed == 0
+    # Entrées reprises sans nouvel lstat
+    assert second.entry(tmp_path / 'a' / 'a.txt') is first.entry(tmp_path / 'a' / 'a.txt')
+
+def test_changed_directory_relisted(tmp_path):
+    make_tree(tmp_path)
+    first = FilesystemSnapshot(tmp_path)
+
+    (tmp_path / 'b' / 'new.txt').write_text('new')
+    (tmp_path / 'c' / 'c.txt').unlink()
+    second = FilesystemSnapshot(tmp_path, previous=first.directories)
+
+    assert second.listed == 2
+    assert second.reused == 2
+    assert second.entry(tmp_path / 'b' / 'new.txt') is not None
+    assert second.entry(tmp_path / 'c' / 'c.txt') is None
+    assert sorted(name for _, _, files in second.walk() for name in files) == ['a.txt', 'b.txt', 'new.txt']
+
+def test_stale_size_dropped_from_duplicate_candidates(tmp_path):
+    make_tree(tmp_path)
+    (tmp_path / 'a' / 'copy.txt').write_text('a' * 10)
+    os.utime(tmp_path / 'a', PAST)
+    first = FilesystemSnapshot(tmp_path)
+
+    # Réécrit sur place: le répertoire est repris avec l'ancienne taille
+    (tmp_path / 'a' / 'copy.txt').write_text('a' * 20)
+    second = FilesystemSnapshot(tmp_path, previous=first.directories)
+    candidates = [(tmp_path / 'a' / name, second.entry(tmp_path / 'a' / name).size)
+                  for name in ('a.txt', 'copy.txt')]
+
+    assert second.entry(tmp_path / 'a' / 'copy.txt').size == 10
+    assert DuplicateFinder(use_cache=False).find_duplicates(candidates) == {}
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Tests du PathIndex
+Inclusion composant par composant, jamais par simple préfixe de chaîne
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from utils.path_index import PathIndex
+
+def make_index():
+    return PathIndex([
+        ('/home/u/Dropbox', 'dropbox'),
+        ('/home/u/Dropbox/Photos', 'photos'),
+        ('/home/u/OneDrive', 'onedrive'),
+    ])
+
+def test_containing_compares_components():
+    index = make_index()
+
+    assert index.containing('/home/u/Dropbox/Photos/2020') == ['dropbox', 'photos']
+    assert index.containing('/home/u/Dropbox/Photos2') == ['dropbox']
+    assert index.containing('/home/u/DropboxOld/file') == []
+    assert index.nearest('/home/u/Dropbox/Photos/a.jpg') == 'photos'
+    assert index.nearest('/home/u/Documents') is None
+
+def test_under_lists_nested_roots():
+    index = make_index()
+
+    assert sorted(index.under('/home/u')) == ['dropbox', 'onedrive', 'photos']
+    assert sorted(index.under('/home/u/Dropbox')) == ['dropbox', 'photos']
+    assert index.under('/home/u/Drop') == []
+
+def test_membership_and_shared_paths():
+    index = make_index()
+    index.add('/home/u/OneDrive', 'onedrive_business')
+
+    assert '/home/u/OneDrive/Docs' in index
+    assert '/home/u/OneDriveX' not in index
+    assert index.containing('/home/u/OneDrive') == ['onedrive', 'onedrive_business']
+    assert len(index) == 4
@@ -58,6 +58,22 @@ class SmartOptimizerTests:
             
             # Utils
             'src/utils/check_cloud_sync_status.py',
+            'src/utils/fs_snapshot.py',
+            'src/utils/duplicate_finder.py',
+            'src/utils/hash_cache.py',
+            'src/utils/directory_sizer.py',
+            'src/utils/parallel_scanner.py',
+            'src/utils/cloud_placeholders.py',
+            'src/utils/hash_service.py',
+            'src/utils/fingerprint.py',
+            'src/utils/file_linker.py',
+            'src/utils/backup_manager.py',
+            'src/utils/action_executor.py',
+            'src/utils/merkle_tree.py',
+            'src/utils/path_index.py',
+            'src/utils/tree_walker.py',
+            'src/utils/ignore_rules.py',
+            'src/utils/file_table.py',
             
             # Scripts
             'scripts/quick_cloud_safety_check.sh',
@@ -134,7 +150,23 @@ class SmartOptimizerTests:
             'src/optimizers/cloud_optimizer.py',
             'src/optimizers/cloud_deduplication_optimizer.py',
             'src/reorganizers/smart_reorganizer.py',
-            'src/utils/check_cloud_sync_status.py'
+            'src/utils/check_cloud_sync_status.py',
+            'src/utils/fs_snapshot.py',
+            'src/utils/duplicate_finder.py',
+            'src/utils/hash_cache.py',
+            'src/utils/directory_sizer.py',
+            'src/utils/parallel_scanner.py',
+            'src/utils/cloud_placeholders.py',
+            'src/utils/hash_service.py',
+            'src/utils/fingerprint.py',
+            'src/utils/file_linker.py',
+            'src/utils/backup_manager.py',
+            'src/utils/action_executor.py',
+            'src/utils/merkle_tree.py',
+            'src/utils/path_index.py',
+            'src/utils/tree_walker.py',
+            'src/utils/ignore_rules.py',
+            'src/utils/file_table.py'
         ]
         
         for file_path in python_files:
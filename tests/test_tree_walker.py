@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Tests du TreeWalker
+Élagage des dossiers ignorés, tailles agrégées et stat transmis aux visiteurs
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from utils.tree_walker import TreeWalker
+
+def make_tree(tmp_path):
+    (tmp_path / 'proj' / 'node_modules' / 'pkg').mkdir(parents=True)
+    (tmp_path / 'proj' / 'src').mkdir()
+    (tmp_path / 'proj' / 'main.py').write_bytes(b'x' * 10)
+    (tmp_path / 'proj' / 'src' / 'lib.py').write_bytes(b'y' * 20)
+    (tmp_path / 'proj' / 'node_modules' / 'pkg' / 'index.js').write_bytes(b'z' * 1000)
+
+def skip_node_modules(path):
+    return path.name == 'node_modules'
+
+def test_skipped_directory_pruned_but_visible(tmp_path):
+    make_tree(tmp_path)
+    walker = TreeWalker(skip=skip_node_modules)
+    visited = {}
+    walker.on_directory(lambda root, dirs, files: visited.setdefault(str(root), sorted(dirs)))
+
+    walker.walk(tmp_path)
+
+    assert str(tmp_path / 'proj' / 'node_modules') not in visited
+    assert str(tmp_path / 'proj' / 'node_modules' / 'pkg') not in visited
+    # Toujours listé chez le parent pour les détecteurs
+    assert visited[str(tmp_path / 'proj')] == ['node_modules', 'src']
+    assert walker.pruned == [str(tmp_path / 'proj' / 'node_modules')]
+
+def test_measure_prunes_and_sizes_walked_subtrees(tmp_path):
+    make_tree(tmp_path)
+    walker = TreeWalker(skip=skip_node_modules, measure=True)
+    visited = []
+    walker.on_directory(lambda root, dirs, files: visited.append(root.name))
+
+    stats = walker.walk(tmp_path)
+
+    assert 'pkg' not in visited and 'node_modules' not in visited
+    assert stats['directories'] == 3
+    assert walker.sizes[str(tmp_path / 'proj')] == (30, 2)
+    assert walker.sizes[str(tmp_path)] == (30, 2)
+    assert str(tmp_path / 'proj' / 'node_modules') not in walker.sizes
+    assert walker.pruned_within(tmp_path / 'proj') == [str(tmp_path / 'proj' / 'node_modules')]
+    assert walker.pruned_within(tmp_path / 'proj' / 'src') == []
+
+def test_file_visitors_receive_walk_stat(tmp_path):
+    make_tree(tmp_path)
+    seen = {}
+    walker = TreeWalker(skip=skip_node_modules, measure=True)
+    walker.on_file(lambda root, name, st: seen.setdefault(name, st.st_size), extensions={'.py'})
+
+    walker.walk(tmp_path)
+
+    assert seen == {'main.py': 10, 'lib.py': 20}
+
+def test_file_visitors_without_measure_get_no_stat(tmp_path):
+    make_tree(tmp_path)
+    seen = {}
+    walker = TreeWalker(skip=skip_node_modules)
+    walker.on_file(lambda root, name, st: seen.setdefault(name, st))
+
+    walker.walk(tmp_path)
+
+    assert seen == {'main.py': None, 'lib.py': None}